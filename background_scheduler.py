@@ -0,0 +1,192 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+
+PAUSED = math.inf
+COALESCE_SLACK = 0.1
+
+class ScheduledTask:
+    def __init__(self, name, callback, interval, idle_interval=None, ui_only=False, dispatch=None, once=False):
+        self.name = name
+        self.callback = callback
+        self.interval = interval
+        self.idle_interval = interval if idle_interval is None else idle_interval
+        self.ui_only = ui_only
+        self.dispatch = dispatch
+        self.once = once
+        self.due = PAUSED
+        self.runs = 0
+
+class BackgroundScheduler:
+    """One thread for all periodic background work
+
+    Tasks that fall due within COALESCE_SLACK of each other run in the same
+    wakeup. While no game process exists every task switches to its
+    idle_interval (PAUSED stops it), and ui_only tasks stop entirely while the
+    settings window is hidden. dispatch, when given, is used to hand the
+    callback to another thread (e.g. the Qt GUI thread) instead of running it here.
+    """
+
+    def __init__(self, slack=COALESCE_SLACK):
+        self.slack = slack
+        self.tasks = {}
+        self.heap = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.game_running = True
+        self.ui_visible = False
+        self.thread = None
+        self.wakeups = 0
+        self.started_at = None
+        self.cpu_started_at = None
+        self.thread_cpu = 0.0
+
+    def _ensure_started(self):
+        if self.thread is None:
+            self.started_at = time.monotonic()
+            self.cpu_started_at = time.process_time()
+            self.thread = threading.Thread(target=self._run, daemon=True, name="BackgroundScheduler")
+            self.thread.start()
+
+    def _current_interval(self, task):
+        if task.ui_only and not self.ui_visible:
+            return PAUSED
+        return task.interval if self.game_running else task.idle_interval
+
+    def _reschedule(self, task, now, first=False):
+        interval = self._current_interval(task)
+        if interval == PAUSED:
+            task.due = PAUSED
+            return
+        task.due = now + (0 if first and not task.once else interval)
+        heapq.heappush(self.heap, (task.due, next(self.counter), task))
+
+    def add_task(self, name, callback, interval, idle_interval=None, ui_only=False, dispatch=None, run_now=True):
+        """Run callback every interval seconds (idle_interval while the game is not running)"""
+        with self.condition:
+            task = ScheduledTask(name, callback, interval, idle_interval, ui_only, dispatch)
+            self._replace(name, task)
+            self._reschedule(task, time.monotonic(), first=run_now)
+            self._ensure_started()
+            self.condition.notify()
+        return task
+
+    def call_later(self, delay, callback, name=None):
+        """Run callback once after delay seconds (replaces a pending call with the same name)"""
+        with self.condition:
+            name = name or f"once-{next(self.counter)}"
+            task = ScheduledTask(name, callback, delay, delay, once=True)
+            self._replace(name, task)
+            self._reschedule(task, time.monotonic())
+            self._ensure_started()
+            self.condition.notify()
+        return task
+
+    def _replace(self, name, task):
+        previous = self.tasks.get(name)
+        if previous:
+            previous.due = PAUSED
+        self.tasks[name] = task
+
+    def remove_task(self, name):
+        with self.condition:
+            task = self.tasks.pop(name, None)
+            if task:
+                task.due = PAUSED
+
+    def _rescan(self):
+        now = time.monotonic()
+        self.heap = []
+        for task in self.tasks.values():
+            if task.once:
+                if task.due != PAUSED:
+                    heapq.heappush(self.heap, (task.due, next(self.counter), task))
+                continue
+            interval = self._current_interval(task)
+            if interval == PAUSED:
+                task.due = PAUSED
+            elif task.due == PAUSED:
+                self._reschedule(task, now, first=True)
+            else:
+                task.due = min(task.due, now + interval)
+                heapq.heappush(self.heap, (task.due, next(self.counter), task))
+        self.condition.notify()
+
+    def set_game_running(self, running):
+        with self.condition:
+            if running != self.game_running:
+                self.game_running = running
+                self._rescan()
+
+    def set_ui_visible(self, visible):
+        with self.condition:
+            if visible != self.ui_visible:
+                self.ui_visible = visible
+                self._rescan()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    while self.heap and self.heap[0][2].due != self.heap[0][0]:
+                        heapq.heappop(self.heap)
+                    if not self.heap:
+                        self.condition.wait()
+                        continue
+                    wait = self.heap[0][0] - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self.condition.wait(wait)
+                self.wakeups += 1
+                now = time.monotonic()
+                ready = []
+                while self.heap and self.heap[0][0] <= now + self.slack:
+                    due, _, task = heapq.heappop(self.heap)
+                    if task.due != due or self.tasks.get(task.name) is not task or task in ready:
+                        continue
+                    ready.append(task)
+                for task in ready:
+                    if task.once:
+                        task.due = PAUSED
+                        del self.tasks[task.name]
+                    else:
+                        self._reschedule(task, now)
+            for task in ready:
+                task.runs += 1
+                try:
+                    if task.dispatch:
+                        task.dispatch(task.callback)
+                    else:
+                        task.callback()
+                except Exception as e:
+                    print(f"Error in scheduled task {task.name}: {e}")
+            # CPU time of this thread alone: the wakeups plus the tasks run here,
+            # not the ones dispatched to another thread
+            self.thread_cpu = time.thread_time()
+
+    def get_stats(self):
+        """Wakeups per second and CPU share since the scheduler started
+
+        cpu_percent is the scheduler thread's own CPU time; process_cpu_percent
+        is the whole process, for comparison.
+        """
+        with self.condition:
+            if self.started_at is None:
+                return {'wakeups': 0, 'wakeups_per_second': 0.0, 'cpu_percent': 0.0,
+                        'process_cpu_percent': 0.0, 'tasks': {}}
+            elapsed = max(time.monotonic() - self.started_at, 1e-9)
+            process_cpu = time.process_time() - self.cpu_started_at
+            return {
+                'wakeups': self.wakeups,
+                'wakeups_per_second': self.wakeups / elapsed,
+                'cpu_percent': 100.0 * self.thread_cpu / elapsed,
+                'process_cpu_percent': 100.0 * process_cpu / elapsed,
+                'game_running': self.game_running,
+                'ui_visible': self.ui_visible,
+                'tasks': {name: {'runs': task.runs, 'interval': self._current_interval(task)}
+                          for name, task in self.tasks.items()},
+            }
+
+scheduler = BackgroundScheduler()
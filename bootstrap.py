@@ -0,0 +1,135 @@
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+class BootstrapPhase:
+    def __init__(self, name, fn, after=(), worker=False, detached=False, on_done=None):
+        self.name = name
+        self.fn = fn
+        self.after = tuple(after)
+        self.worker = worker or detached
+        self.detached = detached
+        self.on_done = on_done
+        self.state = 'pending'
+        self.result = None
+        self.error = None
+        self.thread = None
+        self.started = None
+        self.finished = None
+
+class Bootstrap:
+    """Runs startup phases as soon as the phases they depend on have finished
+
+    Worker phases run on their own daemon thread; the others run on the thread
+    that calls run() (the Qt GUI thread), in the order they were added. run()
+    returns once every non-detached phase has finished, failed or been skipped
+    because a dependency failed. Detached phases (e.g. the update check) keep
+    running afterwards and hand their result to on_done on their own thread.
+    When a StartupProfiler is given every phase is also recorded there.
+    """
+
+    def __init__(self, name="startup", profiler=None):
+        self.name = name
+        self.profiler = profiler
+        self.phases = {}
+        self.started_at = None
+        self._done = queue.Queue()
+
+    def add(self, name, fn, after=(), worker=False, detached=False, on_done=None):
+        for dependency in after:
+            if dependency not in self.phases:
+                raise ValueError(f"Phase {name} depends on unknown phase {dependency}")
+            if self.phases[dependency].detached:
+                raise ValueError(f"Phase {name} cannot depend on detached phase {dependency}")
+        phase = BootstrapPhase(name, fn, after, worker, detached, on_done)
+        self.phases[name] = phase
+        return phase
+
+    def result(self, name):
+        return self.phases[name].result
+
+    def _execute(self, phase):
+        phase.thread = threading.current_thread().name
+        phase.started = time.perf_counter()
+        try:
+            with self.profiler.phase(phase.name) if self.profiler else nullcontext():
+                phase.result = phase.fn()
+            phase.state = 'done'
+        except Exception as e:
+            phase.error = e
+            phase.state = 'failed'
+            print(f"Startup phase {phase.name} failed: {e}")
+        phase.finished = time.perf_counter()
+
+    def _run_worker(self, phase):
+        self._execute(phase)
+        if phase.detached:
+            if phase.on_done and phase.state == 'done':
+                try:
+                    phase.on_done(phase.result)
+                except Exception as e:
+                    print(f"Error handling result of startup phase {phase.name}: {e}")
+        else:
+            self._done.put(phase)
+
+    def _ready(self, phase):
+        states = [self.phases[dependency].state for dependency in phase.after]
+        if any(state in ('failed', 'skipped') for state in states):
+            phase.state = 'skipped'
+            print(f"Skipping startup phase {phase.name}: a dependency failed")
+            return False
+        return all(state == 'done' for state in states)
+
+    def run(self):
+        self.started_at = time.perf_counter()
+        waiting = {name for name, phase in self.phases.items() if not phase.detached}
+        in_flight = 0
+        while True:
+            gui_ready = []
+            for phase in self.phases.values():
+                if phase.state != 'pending' or not self._ready(phase):
+                    continue
+                if phase.worker:
+                    phase.state = 'running'
+                    if not phase.detached:
+                        in_flight += 1
+                    threading.Thread(target=self._run_worker, args=(phase,), daemon=True,
+                                     name=f"Bootstrap-{phase.name}").start()
+                else:
+                    gui_ready.append(phase)
+            waiting = {name for name in waiting if self.phases[name].state in ('pending', 'running')}
+            if gui_ready:
+                gui_ready[0].state = 'running'
+                self._execute(gui_ready[0])
+                continue
+            if not waiting:
+                break
+            if in_flight == 0:
+                for name in waiting:
+                    self.phases[name].state = 'skipped'
+                break
+            self._done.get()
+            in_flight -= 1
+        return {name: phase.result for name, phase in self.phases.items() if phase.state == 'done'}
+
+    def timeline(self):
+        """[(name, state, thread, start_ms, end_ms)] relative to run(), in start order"""
+        rows = []
+        for phase in self.phases.values():
+            if phase.started is None:
+                rows.append((phase.name, phase.state, None, None, None))
+                continue
+            end = None if phase.finished is None else (phase.finished - self.started_at) * 1000
+            rows.append((phase.name, phase.state, phase.thread, (phase.started - self.started_at) * 1000, end))
+        return sorted(rows, key=lambda row: float('inf') if row[3] is None else row[3])
+
+    def report(self):
+        print(f"{self.name} timeline:")
+        for name, state, thread, start, end in self.timeline():
+            if start is None:
+                print(f"  {name:<18} {state}")
+            elif end is None:
+                print(f"  {name:<18} {start:8.1f} ms ->  (running)   [{thread}]")
+            else:
+                print(f"  {name:<18} {start:8.1f} ms -> {end:8.1f} ms  {state} [{thread}]")
@@ -0,0 +1,228 @@
+import bisect
+import threading
+import time
+from collections import deque
+
+from rtt_prober import RttWindow, WINDOW_SIZE
+
+SEQ_MOD = 1 << 32
+MAX_PENDING_SEGMENTS = 512
+MAX_PENDING_TIMESTAMPS = 512
+HISTOGRAM_EDGES_MS = (10, 20, 30, 50, 75, 100, 150, 200, 300, 500, 1000)
+SAMPLE_MAX_AGE = 3.0
+STALL_THRESHOLD = 2.0
+STALL_ACTIONS = ('off', 'warn', 'logout')
+
+def seq_after(a, b):
+    """True if sequence number a is after b (RFC 1982 serial arithmetic)"""
+    return a != b and ((a - b) % SEQ_MOD) < (SEQ_MOD >> 1)
+
+def seq_at_or_after(a, b):
+    return a == b or seq_after(a, b)
+
+def tcp_timestamps(options):
+    """(tsval, tsecr) from a scapy TCP options list, or None"""
+    for name, value in options:
+        if name == 'Timestamp':
+            return value
+    return None
+
+def tcp_payload_length(ip, tcp):
+    """Payload bytes of a captured TCP segment
+
+    Segments captured on the sending host before TSO/LSO segmentation can carry
+    ip.len == 0 or a length that does not match the captured bytes, so ip.len
+    is only trusted when it is set and fits inside what was captured.
+    """
+    captured = len(tcp.payload)
+    if ip.len:
+        declared = ip.len - ip.ihl * 4 - tcp.dataofs * 4
+        if 0 <= declared <= captured:
+            return declared
+    return captured
+
+class ConnectionStats:
+    """Passive RTT for one game connection, taken from the captured segments
+
+    With TCP timestamps the echoed TSecr identifies exactly which of our
+    segments is being acknowledged. Without them, our outbound end sequences
+    are matched to the server's cumulative ACKs and, following Karn's rule,
+    segments that were sent more than once never produce a sample.
+    """
+
+    def __init__(self, conn_id, window=WINDOW_SIZE):
+        self.conn_id = conn_id
+        self.window = RttWindow(window)
+        self.histogram = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        self.pending = deque()
+        self.timestamps = {}
+        self.timestamp_order = deque()
+        self.highest_end = None
+        self.last_sample_time = None
+        self.last_inbound_time = None
+        self.retransmissions = 0
+        self.source = None
+        # Taken by the sniffer thread and by StallDetector/get_stats readers of pending
+        self._lock = threading.RLock()
+
+    def on_outbound(self, seq, payload_len, now, timestamps=None):
+        if payload_len <= 0:
+            return
+        with self._lock:
+            self._track_outbound(seq, payload_len, now, timestamps)
+
+    def _track_outbound(self, seq, payload_len, now, timestamps):
+        if timestamps:
+            tsval = timestamps[0]
+            if tsval not in self.timestamps:
+                self.timestamps[tsval] = now
+                self.timestamp_order.append(tsval)
+                if len(self.timestamp_order) > MAX_PENDING_TIMESTAMPS:
+                    self.timestamps.pop(self.timestamp_order.popleft(), None)
+        end = (seq + payload_len) % SEQ_MOD
+        if self.highest_end is not None and not seq_after(end, self.highest_end):
+            # Retransmission: every pending segment it overlaps is now ambiguous
+            self.retransmissions += 1
+            for segment in self.pending:
+                if seq_after(segment[0], seq):
+                    segment[2] = True
+            return
+        self.highest_end = end
+        self.pending.append([end, now, False])
+        if len(self.pending) > MAX_PENDING_SEGMENTS:
+            self.pending.popleft()
+
+    def on_inbound(self, ack, now, timestamps=None):
+        with self._lock:
+            self._track_inbound(ack, now, timestamps)
+
+    def _track_inbound(self, ack, now, timestamps):
+        self.last_inbound_time = now
+        acked = None
+        while self.pending and seq_at_or_after(ack, self.pending[0][0]):
+            acked = self.pending.popleft()
+        if acked is None:
+            # Only ACKs of new data give a sample (RFC 7323 section 4.1)
+            return
+        sample = None
+        if timestamps and timestamps[1] in self.timestamps:
+            tsecr = timestamps[1]
+            sample = now - self.timestamps[tsecr]
+            self.source = 'timestamp'
+            while self.timestamp_order:
+                tsval = self.timestamp_order.popleft()
+                self.timestamps.pop(tsval, None)
+                if tsval == tsecr:
+                    break
+        elif not acked[2]:
+            sample = now - acked[1]
+            self.source = 'ack'
+        if sample is not None and sample >= 0:
+            self._add_sample(sample * 1000, now)
+
+    def _add_sample(self, rtt_ms, now):
+        with self._lock:
+            self.window.add(rtt_ms)
+            self.histogram[bisect.bisect_right(HISTOGRAM_EDGES_MS, rtt_ms)] += 1
+            self.last_sample_time = now
+
+    def has_recent_sample(self, max_age=SAMPLE_MAX_AGE):
+        return self.last_sample_time is not None and time.time() - self.last_sample_time <= max_age
+
+    def stalled_for(self, now=None):
+        """Seconds since the server last sent anything while our data is unacknowledged"""
+        with self._lock:
+            if not self.pending:
+                return 0.0
+            since = self.pending[0][1]
+            last_inbound = self.last_inbound_time
+        now = time.time() if now is None else now
+        if last_inbound is not None and last_inbound > since:
+            since = last_inbound
+        return max(0.0, now - since)
+
+    def get_stats(self):
+        with self._lock:
+            stats = self.window.summary()
+            stats['histogram'] = list(zip(HISTOGRAM_EDGES_MS + (None,), self.histogram))
+        stats['source'] = self.source
+        stats['target'] = self.conn_id
+        stats['retransmissions'] = self.retransmissions
+        stats['stalled_for'] = self.stalled_for()
+        return stats
+
+class StallDetector:
+    """Fires on_stall(stats, stalled_for) once per stall of any watched connection
+
+    The thread sleeps until the earliest moment a connection could cross the
+    threshold and re-checks then, so the packet path does no extra work and a
+    stall is reported as soon as it reaches the threshold.
+    """
+
+    def __init__(self, on_stall, threshold=STALL_THRESHOLD):
+        self.on_stall = on_stall
+        self.threshold = threshold
+        self.connections = {}
+        self.reported = {}
+        self._wake = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def watch(self, stats):
+        with self._wake:
+            self.connections[stats.conn_id] = stats
+            self._ensure_started()
+            self._wake.notify()
+
+    def unwatch(self, conn_id):
+        with self._wake:
+            self.connections.pop(conn_id, None)
+            self.reported.pop(conn_id, None)
+
+    def set_threshold(self, threshold):
+        with self._wake:
+            self.threshold = threshold
+            self._wake.notify()
+
+    def stop(self):
+        with self._wake:
+            self._running = False
+            self._wake.notify()
+
+    def _ensure_started(self):
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True, name="StallDetector")
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            fired = []
+            with self._wake:
+                if not self._running:
+                    return
+                if not self.connections:
+                    self._wake.wait()
+                    continue
+                now = time.time()
+                wait = self.threshold
+                for conn_id, stats in self.connections.items():
+                    try:
+                        stalled = stats.stalled_for(now)
+                    except Exception as e:
+                        print(f"Error checking {conn_id} for a stall: {e}")
+                        continue
+                    if stalled >= self.threshold:
+                        marker = stats.last_inbound_time
+                        if conn_id not in self.reported or self.reported[conn_id] != marker:
+                            self.reported[conn_id] = marker
+                            fired.append((stats, stalled))
+                    else:
+                        wait = min(wait, self.threshold - stalled)
+                if not fired:
+                    self._wake.wait(max(wait, 0.001))
+            for stats, stalled in fired:
+                try:
+                    self.on_stall(stats, stalled)
+                except Exception as e:
+                    print(f"Error in stall handler: {e}")
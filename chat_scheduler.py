@@ -0,0 +1,225 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+import window_tracker
+from input_utils import precise_wait
+
+# Path of Exile starts rejecting chat with "You are sending messages too fast"
+# somewhere past a handful of lines in quick succession; stay under that.
+CHAT_BURST = 4
+CHAT_RATE = 1.5
+ACTION_INTERVAL = 0.1
+MAX_PENDING = 16
+# A continuation due within this window is taken off the heap and waited for
+# precisely on the worker; longer delays leave the queue free meanwhile
+PRECISE_WAIT_WINDOW = 0.02
+
+class TokenBucket:
+    """Token bucket that lets a cost larger than the burst go into debt
+
+    Such a cost waits for a full bucket and is then charged in full, so the
+    tokens go negative and later acquisitions wait until the debt is repaid.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def try_acquire(self, now=None, cost=1.0):
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= min(cost, self.capacity):
+            self.tokens -= cost
+            return True
+        return False
+
+    def wait_time(self, now=None, cost=1.0):
+        """Seconds until cost tokens can be taken (0 if they can be taken now)"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        required = min(cost, self.capacity)
+        if self.tokens >= required:
+            return 0.0
+        return (required - self.tokens) / self.rate
+
+class ChatScheduler:
+    """Delivers chat actions in order, as fast as the chat flood limit allows
+
+    Each action key (a command or whisper text) has its own token bucket so a
+    bouncing or auto-repeating hotkey cannot spam the same line, but different
+    actions never cancel each other: they queue behind the global chat bucket.
+    An action that wants to be called again later (a macro between two delays)
+    waits on a timer heap instead of the worker, so other actions keep flowing.
+    """
+
+    def __init__(self, chat_rate=CHAT_RATE, chat_burst=CHAT_BURST, action_interval=ACTION_INTERVAL,
+                 max_pending=MAX_PENDING, require_focus=True):
+        self.chat_bucket = TokenBucket(chat_rate, chat_burst)
+        self.action_interval = action_interval
+        self.max_pending = max_pending
+        self.require_focus = require_focus
+        self.action_buckets = {}
+        self.pending = deque()
+        self.timed = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.running = False
+        self.worker = None
+        self.stats = {
+            'submitted': 0,
+            'queued': 0,
+            'delivered': 0,
+            'dropped': 0,
+            'dropped_rate_limited': 0,
+            'dropped_overflow': 0,
+            'dropped_unfocused': 0,
+            'interrupted': 0,
+            'total_delay': 0.0,
+            'max_delay': 0.0,
+        }
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+            self.worker = threading.Thread(target=self._run, daemon=True, name="ChatScheduler")
+            self.worker.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.pending.clear()
+            timed, self.timed = self.timed, []
+            self.condition.notify_all()
+            worker, self.worker = self.worker, None
+        if worker and worker is not threading.current_thread():
+            worker.join(1.0)
+        for entry in timed:
+            self._cancel(entry[3])
+
+    def submit(self, action_key, deliver, cost=1, cancel=None):
+        """Queue deliver() for action_key; returns False if the action was dropped
+
+        cost is the number of chat lines deliver() sends (macros send several)
+        and is charged once, on the first call. deliver() may return a number of
+        seconds after which it is called again; cancel(), if given, runs when
+        such an action is cut off part-way by lost focus, an error or stop().
+        """
+        if not self.running:
+            self.start()
+        now = time.monotonic()
+        with self.condition:
+            self.stats['submitted'] += 1
+            bucket = self.action_buckets.get(action_key)
+            if bucket is None:
+                bucket = TokenBucket(1.0 / self.action_interval, 1)
+                self.action_buckets[action_key] = bucket
+            if not bucket.try_acquire(now):
+                self._drop('dropped_rate_limited')
+                return False
+            if len(self.pending) >= self.max_pending:
+                self._drop('dropped_overflow')
+                return False
+            self.pending.append((now, deliver, cost, cancel))
+            self.stats['queued'] += 1
+            self.condition.notify()
+        return True
+
+    def _drop(self, reason):
+        self.stats['dropped'] += 1
+        self.stats[reason] += 1
+
+    def _cancel(self, cancel):
+        if cancel:
+            try:
+                cancel()
+            except Exception as e:
+                print(f"Error cancelling chat action: {e}")
+
+    def _next_item(self):
+        """Wait for the next due continuation or deliverable action; None once stopped
+
+        Called with self.condition held. Returns (due, enqueued, deliver, cost,
+        cancel); due is set for continuations, enqueued for first calls.
+        """
+        while self.running:
+            now = time.monotonic()
+            if self.timed and self.timed[0][0] - now <= PRECISE_WAIT_WINDOW:
+                due, _, deliver, cancel = heapq.heappop(self.timed)
+                return due, None, deliver, 0, cancel
+            timeout = self.timed[0][0] - now - PRECISE_WAIT_WINDOW if self.timed else None
+            if self.pending:
+                wait = self.chat_bucket.wait_time(cost=self.pending[0][2])
+                if wait <= 0:
+                    enqueued, deliver, cost, cancel = self.pending.popleft()
+                    return None, enqueued, deliver, cost, cancel
+                timeout = wait if timeout is None else min(timeout, wait)
+            self.condition.wait(timeout)
+        return None
+
+    def _run(self):
+        while True:
+            with self.condition:
+                item = self._next_item()
+            if item is None:
+                return
+            due, enqueued, deliver, cost, cancel = item
+            if due is not None:
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    precise_wait(remaining)
+            # An action dropped for focus sends nothing, so it must not spend chat budget
+            if self.require_focus and not window_tracker.is_game_focused():
+                self._cancel(cancel)
+                with self.condition:
+                    if enqueued is None:
+                        self.stats['interrupted'] += 1
+                    else:
+                        self._drop('dropped_unfocused')
+                continue
+            if enqueued is not None:
+                with self.condition:
+                    self.chat_bucket.try_acquire(cost=cost)
+            try:
+                again = deliver()
+            except Exception as e:
+                print(f"Error delivering chat action: {e}")
+                self._cancel(cancel)
+                again = None
+            stopped = False
+            with self.condition:
+                if enqueued is not None:
+                    delay = time.monotonic() - enqueued
+                    self.stats['delivered'] += 1
+                    self.stats['total_delay'] += delay
+                    self.stats['max_delay'] = max(self.stats['max_delay'], delay)
+                if again is not None:
+                    if self.running:
+                        heapq.heappush(self.timed, (time.monotonic() + again, next(self.counter), deliver, cancel))
+                    else:
+                        stopped = True
+            if stopped:
+                self._cancel(cancel)
+
+    def get_stats(self):
+        with self.condition:
+            stats = dict(self.stats)
+            stats['pending'] = len(self.pending)
+        delivered = stats.pop('delivered')
+        total_delay = stats.pop('total_delay')
+        stats['delivered'] = delivered
+        stats['avg_delay_ms'] = (total_delay / delivered * 1000) if delivered else 0.0
+        stats['max_delay_ms'] = stats.pop('max_delay') * 1000
+        return stats
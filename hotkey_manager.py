@@ -1,134 +1,157 @@
-import time
 import keyboard
-import ctypes
-from input_utils import execute_command_batched, execute_whisper_batched
+import window_tracker
+from chat_scheduler import ChatScheduler
+from input_utils import execute_command_batched, execute_whisper_batched, MacroRun, macro_chat_lines
 
 class HotkeyManager:
     def __init__(self, settings, execute_callback=None):
         self.settings = settings
         self.whisper_settings = {}
-        self.registered_hotkeys = set()
+        self.macro_settings = {}
+        self.hotkey_handles = {}
+        self.bindings = {}
         self.execute_callback = execute_callback or self.execute_command
-        self.last_executed = {}
-        self.last_execution_time = 0
-        self.execution_cooldown = 0.1          
+        self.execution_cooldown = 0.1
+        self.chat_scheduler = ChatScheduler(action_interval=self.execution_cooldown)
+        self.paste_mode = False
+        window_tracker.start_tracking()
     def set_whisper_settings(self, whisper_settings):
         self.whisper_settings = whisper_settings
         
+    def set_macro_settings(self, macro_settings):
+        self.macro_settings = macro_settings
+        
+    def set_paste_mode(self, enabled):
+        self.paste_mode = bool(enabled)
+        
     def is_poe_window_active(self):
-        try:
-            hwnd = ctypes.windll.user32.GetForegroundWindow()
-            length = ctypes.windll.user32.GetWindowTextLengthW(hwnd)
-            buff = ctypes.create_unicode_buffer(length + 1)
-            ctypes.windll.user32.GetWindowTextW(hwnd, buff, length + 1)
-            window_title = buff.value
-            return "Path of Exile" in window_title
-        except Exception as e:
-            print(f"Error checking window: {e}")
-            return False
+        return window_tracker.is_game_focused()
             
     def clear_all_hotkeys(self):
-        try:
-            for hotkey_id in list(self.registered_hotkeys):
-                try:
-                    keyboard.remove_hotkey(hotkey_id)
-                except Exception as e:
-                    pass
-            self.registered_hotkeys.clear()
-        except Exception as e:
-            pass
+        for hotkey, hotkey_id in list(self.hotkey_handles.items()):
+            try:
+                keyboard.remove_hotkey(hotkey_id)
+            except Exception as e:
+                pass
+        self.hotkey_handles.clear()
+        self.bindings = {}
             
     def register_all_hotkeys(self):
+        """Bring the keyboard hooks in line with the current settings; returns the number of hook changes"""
         try:
-            self.clear_all_hotkeys()
-            time.sleep(0.1)
-            
-            self.register_hotkeys()
-            self.register_whisper_hotkeys()
-        except Exception as e:
-            pass
+            desired = {}
+            for binding in self.build_bindings():
+                hotkey, action = binding[0], binding[1:]
+                desired[hotkey] = desired.get(hotkey, ()) + (action,)
             
-    def register_hotkeys(self):
-        try:
-            for cmd_id, cmd_data in self.settings.items():
-                if cmd_id == 'logout':
-                    continue
-                    
-                hotkey = cmd_data.get('hotkey')
-                if not hotkey or not isinstance(hotkey, str) or hotkey.startswith('mouse'):
-                    continue
-                    
-                cmd_text = cmd_data.get('text')
-                if not cmd_text:
+            added = []
+            for hotkey in desired:
+                if hotkey in self.hotkey_handles:
                     continue
-                    
-                def execute_command_if_poe(cmd_text=cmd_text, hotkey=hotkey):
-                    if self.is_poe_window_active():
-                        self.execute_command(cmd_text)
-                
                 try:
-                    hotkey_id = keyboard.add_hotkey(hotkey, execute_command_if_poe, suppress=False)
-                    self.registered_hotkeys.add(hotkey_id)
+                    self.hotkey_handles[hotkey] = keyboard.add_hotkey(
+                        hotkey, lambda hotkey=hotkey: self.dispatch_hotkey(hotkey), suppress=False)
+                    added.append(hotkey)
                 except Exception as e:
                     print(f"Failed to register hotkey {hotkey}")
-        except Exception as e:
-            print(f"Error in register_hotkeys")
             
-    def register_whisper_hotkeys(self):
-        try:
-            if not self.whisper_settings:
-                return
-                
-            for cmd_id, cmd_data in self.whisper_settings.items():
-                hotkey = cmd_data.get('hotkey')
-                if not hotkey or not isinstance(hotkey, str) or hotkey.startswith('mouse'):
+            # Actions for keys that stay hooked switch over here in one assignment
+            self.bindings = desired
+            
+            removed = []
+            for hotkey in list(self.hotkey_handles):
+                if hotkey not in desired:
+                    try:
+                        keyboard.remove_hotkey(self.hotkey_handles[hotkey])
+                    except Exception as e:
+                        pass
+                    del self.hotkey_handles[hotkey]
+                    removed.append(hotkey)
+            return len(added) + len(removed)
+        except Exception as e:
+            print(f"Error registering hotkeys: {e}")
+            return 0
+    
+    def build_bindings(self):
+        """(hotkey, kind, id, payload) for every command, whisper and macro that can be bound"""
+        bindings = []
+        sources = [('command', self.settings), ('whisper', self.whisper_settings or {}), ('macro', self.macro_settings or {})]
+        for kind, entries in sources:
+            for entry_id, data in entries.items():
+                if kind == 'command' and entry_id == 'logout':
                     continue
-                    
-                cmd_text = cmd_data.get('text')
-                if not cmd_text:
+                hotkey = data.get('hotkey')
+                if not hotkey or not isinstance(hotkey, str) or hotkey.startswith('mouse'):
                     continue
-                    
-                def execute_whisper_if_poe(cmd_text=cmd_text, hotkey=hotkey):
-                    if self.is_poe_window_active():
-                        self.execute_whisper(cmd_text)
-                
-                try:
-                    hotkey_id = keyboard.add_hotkey(hotkey, execute_whisper_if_poe, suppress=False)
-                    self.registered_hotkeys.add(hotkey_id)
-                except Exception as e:
-                    print(f"Failed to register whisper hotkey {hotkey}")
-        except Exception as e:
-            print(f"Error in register_whisper_hotkeys: {e}")
+                if kind == 'macro':
+                    payload = data.get('steps')
+                    if not payload:
+                        continue
+                    bindings.append((hotkey.lower(), kind, entry_id, payload))
+                else:
+                    payload = data.get('text')
+                    if not payload:
+                        continue
+                    bindings.append((hotkey.lower(), kind, entry_id, payload))
+        return bindings
+    
+    def dispatch_hotkey(self, hotkey):
+        """Runs in the keyboard hook thread: look up what the key is bound to right now"""
+        actions = self.bindings.get(hotkey)
+        if not actions or not self.is_poe_window_active():
+            return
+        for kind, entry_id, payload in actions:
+            if kind == 'command':
+                self.execute_command(payload)
+            elif kind == 'whisper':
+                self.execute_whisper(payload)
+            elif kind == 'macro':
+                self.execute_macro(entry_id, payload)
             
     def execute_command(self, command_text):
         try:
-            current_time = time.time()
-            if current_time - self.last_execution_time < self.execution_cooldown:
-                return
-            self.last_execution_time = current_time
-            execute_command_batched(command_text)
+            self.chat_scheduler.submit(
+                ('command', command_text),
+                lambda: execute_command_batched(command_text, paste=self.paste_mode)
+            )
         except Exception as e:
             print(f"Error executing command: {e}")
             
     def execute_whisper(self, whisper_text):
         try:
-            current_time = time.time()
-            if current_time - self.last_execution_time < self.execution_cooldown:
-                return
-            self.last_execution_time = current_time
-            execute_whisper_batched(whisper_text)
+            self.chat_scheduler.submit(
+                ('whisper', whisper_text),
+                lambda: execute_whisper_batched(whisper_text, paste=self.paste_mode)
+            )
         except Exception as e:
             print(f"Error executing whisper: {e}")
             
+    def execute_macro(self, macro_id, steps):
+        try:
+            run = MacroRun(steps, paste=self.paste_mode)
+            self.chat_scheduler.submit(
+                ('macro', macro_id),
+                run.step,
+                cost=max(1, macro_chat_lines(steps)),
+                cancel=run.release
+            )
+        except Exception as e:
+            print(f"Error executing macro: {e}")
+            
+    def get_delivery_stats(self):
+        return self.chat_scheduler.get_stats()
+            
     def set_show_settings_callback(self, callback):
         self.show_settings_callback = callback
         keyboard.add_hotkey('f10', callback, suppress=False)
         
-    def update_settings(self, new_settings, new_whisper_settings=None):
+    def update_settings(self, new_settings, new_whisper_settings=None, new_macro_settings=None):
         try:
             self.settings = new_settings
             if new_whisper_settings:
                 self.whisper_settings = new_whisper_settings
-            self.register_all_hotkeys()
+            if new_macro_settings is not None:
+                self.macro_settings = new_macro_settings
+            return self.register_all_hotkeys()
         except Exception as e:
-            pass
+            return 0
@@ -0,0 +1,356 @@
+import ctypes
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+from ctypes import wintypes
+
+INPUT_KEYBOARD = 1
+KEYEVENTF_KEYUP = 0x0002
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [("dx", wintypes.LONG),
+                ("dy", wintypes.LONG),
+                ("mouseData", wintypes.DWORD),
+                ("dwFlags", wintypes.DWORD),
+                ("time", wintypes.DWORD),
+                ("dwExtraInfo", ctypes.POINTER(wintypes.ULONG))]
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [("wVk", wintypes.WORD),
+                ("wScan", wintypes.WORD),
+                ("dwFlags", wintypes.DWORD),
+                ("time", wintypes.DWORD),
+                ("dwExtraInfo", ctypes.POINTER(wintypes.ULONG))]
+
+class HARDWAREINPUT(ctypes.Structure):
+    _fields_ = [("uMsg", wintypes.DWORD),
+                ("wParamL", wintypes.WORD),
+                ("wParamH", wintypes.WORD)]
+
+class INPUT_union(ctypes.Union):
+    _fields_ = [("mi", MOUSEINPUT),
+                ("ki", KEYBDINPUT),
+                ("hi", HARDWAREINPUT)]
+
+class INPUT(ctypes.Structure):
+    _fields_ = [("type", wintypes.DWORD),
+                ("union", INPUT_union)]
+
+# Virtual-key code -> (evdev KEY_* suffix, X11 keysym name) for the keys the app can send
+LINUX_KEY_NAMES = {
+    0x08: ('BACKSPACE', 'BackSpace'), 0x09: ('TAB', 'Tab'), 0x0D: ('ENTER', 'Return'),
+    0x10: ('LEFTSHIFT', 'Shift_L'), 0x11: ('LEFTCTRL', 'Control_L'), 0x12: ('LEFTALT', 'Alt_L'),
+    0x13: ('PAUSE', 'Pause'), 0x14: ('CAPSLOCK', 'Caps_Lock'), 0x1B: ('ESC', 'Escape'),
+    0x20: ('SPACE', 'space'), 0x21: ('PAGEUP', 'Prior'), 0x22: ('PAGEDOWN', 'Next'),
+    0x23: ('END', 'End'), 0x24: ('HOME', 'Home'), 0x25: ('LEFT', 'Left'), 0x26: ('UP', 'Up'),
+    0x27: ('RIGHT', 'Right'), 0x28: ('DOWN', 'Down'), 0x2D: ('INSERT', 'Insert'),
+    0x2E: ('DELETE', 'Delete'),
+    0xA0: ('LEFTSHIFT', 'Shift_L'), 0xA1: ('RIGHTSHIFT', 'Shift_R'),
+    0xA2: ('LEFTCTRL', 'Control_L'), 0xA3: ('RIGHTCTRL', 'Control_R'),
+    0xA4: ('LEFTALT', 'Alt_L'), 0xA5: ('RIGHTALT', 'Alt_R'),
+    0xBA: ('SEMICOLON', 'semicolon'), 0xBB: ('EQUAL', 'equal'), 0xBC: ('COMMA', 'comma'),
+    0xBD: ('MINUS', 'minus'), 0xBE: ('DOT', 'period'), 0xBF: ('SLASH', 'slash'),
+    0xC0: ('GRAVE', 'grave'), 0xDB: ('LEFTBRACE', 'bracketleft'), 0xDC: ('BACKSLASH', 'backslash'),
+    0xDD: ('RIGHTBRACE', 'bracketright'), 0xDE: ('APOSTROPHE', 'apostrophe'),
+}
+for _vk in range(0x30, 0x3A):
+    LINUX_KEY_NAMES[_vk] = (chr(_vk), chr(_vk))
+for _vk in range(0x41, 0x5B):
+    LINUX_KEY_NAMES[_vk] = (chr(_vk), chr(_vk).lower())
+for _n in range(1, 13):
+    LINUX_KEY_NAMES[0x6F + _n] = (f'F{_n}', f'F{_n}')
+
+# US-layout character -> virtual key, matching what VkKeyScanW returns with the shift state dropped
+US_CHAR_TO_VK = {' ': 0x20, ';': 0xBA, ':': 0xBA, '=': 0xBB, '+': 0xBB, ',': 0xBC, '<': 0xBC,
+                 '-': 0xBD, '_': 0xBD, '.': 0xBE, '>': 0xBE, '/': 0xBF, '?': 0xBF, '`': 0xC0,
+                 '~': 0xC0, '[': 0xDB, '{': 0xDB, '\\': 0xDC, '|': 0xDC, ']': 0xDD, '}': 0xDD,
+                 "'": 0xDE, '"': 0xDE, '\n': 0x0D, '\t': 0x09}
+for _digit, _shifted in zip('1234567890', '!@#$%^&*()'):
+    US_CHAR_TO_VK[_shifted] = ord(_digit)
+
+RecordedEvent = namedtuple('RecordedEvent', ['timestamp', 'key_code', 'up', 'batch'])
+
+class InputBackend:
+    """Delivers batches of (virtual_key, up) events to the focused window"""
+    name = "base"
+
+    def send_events(self, events):
+        raise NotImplementedError
+
+    def char_to_vk(self, char):
+        if 'a' <= char <= 'z' or 'A' <= char <= 'Z' or '0' <= char <= '9':
+            return ord(char.upper())
+        return US_CHAR_TO_VK.get(char, 0x41)
+
+    def is_key_down(self, key_code):
+        return False
+
+    def get_clipboard_text(self):
+        return None
+
+    def set_clipboard_text(self, text):
+        return False
+
+    def close(self):
+        pass
+
+class WindowsSendInputBackend(InputBackend):
+    """SendInput with a pre-allocated INPUT pool, one syscall per batch"""
+    name = "sendinput"
+
+    def __init__(self, pool_size=128):
+        import win32clipboard
+        import win32con
+        self._clipboard = win32clipboard
+        self._cf_text = win32con.CF_UNICODETEXT
+        self._user32 = ctypes.windll.user32
+        # Without a prototype ctypes passes a str as a wchar_t* pointer instead of one WCHAR
+        self._user32.VkKeyScanW.argtypes = [ctypes.c_wchar]
+        self._user32.VkKeyScanW.restype = ctypes.c_short
+        self._extra_ptr = ctypes.pointer(ctypes.c_ulong(0))
+        self._pool = []
+        self._grow_pool(pool_size)
+        self._vk_cache = {}
+
+    def _grow_pool(self, count):
+        for _ in range(count):
+            union = INPUT_union()
+            union.ki = KEYBDINPUT(0, 0, 0, 0, self._extra_ptr)
+            self._pool.append(INPUT(INPUT_KEYBOARD, union))
+
+    def _input_from_pool(self, index, key_code, up):
+        if index >= len(self._pool):
+            self._grow_pool(32)
+        input_struct = self._pool[index]
+        input_struct.union.ki.wVk = key_code
+        input_struct.union.ki.dwFlags = KEYEVENTF_KEYUP if up else 0
+        return input_struct
+
+    def send_events(self, events):
+        count = len(events)
+        if not count:
+            return
+        input_array = (INPUT * count)()
+        for idx, (key_code, up) in enumerate(events):
+            input_array[idx] = self._input_from_pool(idx, key_code, up)
+        self._user32.SendInput(count, ctypes.byref(input_array), ctypes.sizeof(INPUT))
+
+    def char_to_vk(self, char):
+        key_code = self._vk_cache.get(char)
+        if key_code is None:
+            try:
+                scan = self._user32.VkKeyScanW(char)
+            except ctypes.ArgumentError:
+                # Outside the BMP: does not fit in one UTF-16 WCHAR
+                scan = -1
+            key_code = scan & 0xFF if scan != -1 else 0x41
+            self._vk_cache[char] = key_code
+        return key_code
+
+    def is_key_down(self, key_code):
+        return bool(self._user32.GetAsyncKeyState(key_code) & 0x8000)
+
+    def _open_clipboard(self, retries=10):
+        for _ in range(retries):
+            try:
+                self._clipboard.OpenClipboard()
+                return True
+            except Exception:
+                time.sleep(0.005)
+        return False
+
+    def get_clipboard_text(self):
+        if not self._open_clipboard():
+            return None
+        try:
+            if self._clipboard.IsClipboardFormatAvailable(self._cf_text):
+                return self._clipboard.GetClipboardData(self._cf_text)
+            return None
+        except Exception:
+            return None
+        finally:
+            self._clipboard.CloseClipboard()
+
+    def set_clipboard_text(self, text):
+        if not self._open_clipboard():
+            return False
+        try:
+            self._clipboard.EmptyClipboard()
+            if text is not None:
+                self._clipboard.SetClipboardData(self._cf_text, text)
+            return True
+        except Exception:
+            return False
+        finally:
+            self._clipboard.CloseClipboard()
+
+class LinuxInputBackend(InputBackend):
+    """uinput virtual keyboard (python-evdev) with an XTest (python-xlib) fallback
+
+    uinput works under X11 and Wayland but needs write access to /dev/uinput;
+    XTest only needs a DISPLAY. Proton games see either one as a real keyboard.
+    """
+
+    def __init__(self, prefer="uinput"):
+        self._uinput = None
+        self._display = None
+        self._codes = {}
+        order = ["uinput", "xtest"] if prefer == "uinput" else ["xtest", "uinput"]
+        for method in order:
+            try:
+                if method == "uinput":
+                    self._open_uinput()
+                else:
+                    self._open_xtest()
+                self.name = method
+                break
+            except Exception:
+                continue
+        else:
+            raise RuntimeError("Neither uinput (python-evdev) nor XTest (python-xlib) is usable")
+        if self._display is None:
+            try:
+                from Xlib import display
+                self._display = display.Display()
+            except Exception:
+                pass
+
+    def _open_uinput(self):
+        from evdev import UInput, ecodes
+        for vk, (evdev_name, _) in LINUX_KEY_NAMES.items():
+            code = ecodes.ecodes.get('KEY_' + evdev_name)
+            if code is not None:
+                self._codes[vk] = code
+        self._ecodes = ecodes
+        self._uinput = UInput({ecodes.EV_KEY: sorted(set(self._codes.values()))},
+                              name="xddbot-keyboard")
+
+    def _open_xtest(self):
+        from Xlib import X, XK, display
+        from Xlib.ext import xtest
+        self._display = display.Display()
+        if not self._display.has_extension('XTEST'):
+            raise RuntimeError("XTEST extension missing")
+        for vk, (_, keysym_name) in LINUX_KEY_NAMES.items():
+            keycode = self._display.keysym_to_keycode(XK.string_to_keysym(keysym_name))
+            if keycode:
+                self._codes[vk] = keycode
+        self._x = X
+        self._xtest = xtest
+
+    def send_events(self, events):
+        if not events:
+            return
+        if self._uinput is not None:
+            ecodes = self._ecodes
+            for key_code, up in events:
+                code = self._codes.get(key_code)
+                if code is None:
+                    continue
+                self._uinput.write(ecodes.EV_KEY, code, 0 if up else 1)
+                self._uinput.syn()
+        else:
+            for key_code, up in events:
+                code = self._codes.get(key_code)
+                if code is None:
+                    continue
+                self._xtest.fake_input(self._display, self._x.KeyRelease if up else self._x.KeyPress, code)
+            self._display.sync()
+
+    def is_key_down(self, key_code):
+        if self._display is None:
+            return False
+        keysym_name = LINUX_KEY_NAMES.get(key_code, (None, None))[1]
+        if not keysym_name:
+            return False
+        try:
+            from Xlib import XK
+            keycode = self._display.keysym_to_keycode(XK.string_to_keysym(keysym_name))
+            keymap = self._display.query_keymap()
+            return bool(keymap[keycode // 8] & (1 << (keycode % 8)))
+        except Exception:
+            return False
+
+    def get_clipboard_text(self):
+        if not shutil.which("xclip"):
+            return None
+        try:
+            result = subprocess.run(["xclip", "-selection", "clipboard", "-o"],
+                                    capture_output=True, timeout=1)
+            return result.stdout.decode("utf-8", "replace") if result.returncode == 0 else None
+        except Exception:
+            return None
+
+    def set_clipboard_text(self, text):
+        if not shutil.which("xclip"):
+            return False
+        try:
+            subprocess.run(["xclip", "-selection", "clipboard", "-i"],
+                           input=(text or "").encode("utf-8"), timeout=1, check=True)
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        if self._uinput is not None:
+            self._uinput.close()
+            self._uinput = None
+
+class RecordingBackend(InputBackend):
+    """In-memory backend that records every event with a perf_counter timestamp"""
+    name = "recording"
+
+    def __init__(self):
+        self.events = []
+        self.batches = 0
+        self.clipboard = None
+        self.pressed = set()
+        self._lock = threading.Lock()
+
+    def send_events(self, events):
+        if not events:
+            return
+        with self._lock:
+            batch = self.batches
+            self.batches += 1
+            for key_code, up in events:
+                self.events.append(RecordedEvent(time.perf_counter(), key_code, up, batch))
+                if up:
+                    self.pressed.discard(key_code)
+                else:
+                    self.pressed.add(key_code)
+
+    def sequence(self):
+        """Return the recorded (key_code, up) pairs without timestamps"""
+        with self._lock:
+            return [(event.key_code, event.up) for event in self.events]
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+            self.batches = 0
+
+    def is_key_down(self, key_code):
+        return key_code in self.pressed
+
+    def get_clipboard_text(self):
+        return self.clipboard
+
+    def set_clipboard_text(self, text):
+        self.clipboard = text
+        return True
+
+def create_default_backend():
+    """Pick the input backend for this platform (XDDBOT_INPUT_BACKEND overrides it)"""
+    requested = os.environ.get("XDDBOT_INPUT_BACKEND", "").lower()
+    if requested == "recording":
+        return RecordingBackend()
+    if sys.platform == "win32":
+        return WindowsSendInputBackend()
+    if sys.platform.startswith("linux"):
+        return LinuxInputBackend(prefer="xtest" if requested == "xtest" else "uinput")
+    raise RuntimeError(f"No input backend for platform {sys.platform}")
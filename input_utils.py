@@ -1,57 +1,25 @@
 import ctypes
+import os
+import sys
 import time
-from ctypes import wintypes
+import threading
 
-INPUT_KEYBOARD = 1
-KEYEVENTF_KEYUP = 0x0002
-VK_RETURN = 0x0D
+from input_backends import create_default_backend
 
-class MOUSEINPUT(ctypes.Structure):
-    _fields_ = [("dx", wintypes.LONG),
-                ("dy", wintypes.LONG),
-                ("mouseData", wintypes.DWORD),
-                ("dwFlags", wintypes.DWORD),
-                ("time", wintypes.DWORD),
-                ("dwExtraInfo", ctypes.POINTER(wintypes.ULONG))]
-
-class KEYBDINPUT(ctypes.Structure):
-    _fields_ = [("wVk", wintypes.WORD),
-                ("wScan", wintypes.WORD),
-                ("dwFlags", wintypes.DWORD),
-                ("time", wintypes.DWORD),
-                ("dwExtraInfo", ctypes.POINTER(wintypes.ULONG))]
-
-class HARDWAREINPUT(ctypes.Structure):
-    _fields_ = [("uMsg", wintypes.DWORD),
-                ("wParamL", wintypes.WORD),
-                ("wParamH", wintypes.WORD)]
-
-class INPUT_union(ctypes.Union):
-    _fields_ = [("mi", MOUSEINPUT),
-                ("ki", KEYBDINPUT),
-                ("hi", HARDWAREINPUT)]
-
-class INPUT(ctypes.Structure):
-    _fields_ = [("type", wintypes.DWORD),
-                ("union", INPUT_union)]
-
-KEY_CODE_CACHE = {}
-for char in range(256):
-    try:
-        vk = ctypes.windll.user32.VkKeyScanW(chr(char))
-        KEY_CODE_CACHE[char] = vk & 0xFF
-    except:
-        KEY_CODE_CACHE[char] = 0
+VK_RETURN = 0x0D
+VK_CONTROL = 0x11
+VK_V = 0x56
 
-EXTRA = ctypes.c_ulong(0)
-EXTRA_PTR = ctypes.pointer(EXTRA)
+CLIPBOARD_RESTORE_DELAY = 0.25
+SPIN_THRESHOLD = 0.002
+CREATE_WAITABLE_TIMER_HIGH_RESOLUTION = 0x00000002
+TIMER_ALL_ACCESS = 0x1F0003
+_clipboard_lock = threading.Lock()
+_pending_restore = None
 
-INPUT_POOL_SIZE = 128
-INPUT_POOL = []
-for _ in range(INPUT_POOL_SIZE):
-    union = INPUT_union()
-    union.ki = KEYBDINPUT(0, 0, 0, 0, EXTRA_PTR)
-    INPUT_POOL.append(INPUT(INPUT_KEYBOARD, union))
+_backend = None
+_backend_lock = threading.Lock()
+_instance_lock = None
 
 VK_CODE = {
     'backspace': 0x08, 'tab': 0x09, 'clear': 0x0C, 'enter': 0x0D, 'shift': 0x10,
@@ -78,137 +46,346 @@ VK_CODE = {
     '/': 0xBF, '\\': 0xDC
 }
 
+KEY_ALIASES = {
+    'space': 'spacebar', 'escape': 'esc', 'return': 'enter', 'control': 'ctrl',
+    'left': 'left_arrow', 'right': 'right_arrow', 'up': 'up_arrow', 'down': 'down_arrow',
+    'pageup': 'page_up', 'pagedown': 'page_down', 'insert': 'ins', 'delete': 'del'
+}
+
+_wait_timer = threading.local()
+
+def get_backend():
+    """Return the active input backend, creating the platform default on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_default_backend()
+    return _backend
+
+def set_backend(backend):
+    """Swap the input backend (e.g. a RecordingBackend for tests and benchmarks)"""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
+
 def send_key(key_code, up=False):
-    """Send a keyboard input event to Windows"""
-    ii_ = INPUT_union()
-    ii_.ki = KEYBDINPUT(key_code, 0, KEYEVENTF_KEYUP if up else 0, 0, EXTRA_PTR)
-    x = INPUT(INPUT_KEYBOARD, ii_)
-    ctypes.windll.user32.SendInput(1, ctypes.byref(x), ctypes.sizeof(x))
+    """Send a single keyboard input event"""
+    get_backend().send_events([(key_code, up)])
 
 def press_and_release(key_code):
     """Press and release a key"""
-    send_key(key_code)
-    send_key(key_code, up=True)
+    get_backend().send_events([(key_code, False), (key_code, True)])
 
 def type_string(string):
     """Type a string by simulating key presses"""
-    for char in string:
-        if char == '/':
-            key_code = VK_CODE.get('/')
-            press_and_release(key_code)
-        else:
-            char_upper = char.upper()
-            key_code = ord(char_upper)
-            press_and_release(key_code)
-
-def get_input_from_pool(index, key_code, up=False):
-    """Get a pre-allocated input structure from the pool and configure it for a key press/release"""
-    if index >= len(INPUT_POOL):
-        for _ in range(32):
-            union = INPUT_union()
-            union.ki = KEYBDINPUT(0, 0, 0, 0, EXTRA_PTR)
-            INPUT_POOL.append(INPUT(INPUT_KEYBOARD, union))
-    
-    input_struct = INPUT_POOL[index]
-    input_struct.union.ki.wVk = key_code
-    input_struct.union.ki.dwFlags = KEYEVENTF_KEYUP if up else 0
-    
-    return input_struct
-
-def create_key_input(key_code, up=False):
-    """Create a keyboard input event with optimized structure creation"""
-    return INPUT(
-        INPUT_KEYBOARD,
-        INPUT_union(ki=KEYBDINPUT(key_code, 0, KEYEVENTF_KEYUP if up else 0, 0, EXTRA_PTR))
-    )
-
-def send_batched_input(inputs):
-    """Send multiple input events in a single Windows API call"""
-    if not inputs:
+    get_backend().send_events(text_events(string))
+
+def text_events(text, backend=None):
+    """Translate text into (key_code, up) press/release pairs"""
+    backend = backend or get_backend()
+    events = []
+    for char in text:
+        key_code = VK_CODE['/'] if char == '/' else backend.char_to_vk(char)
+        events.append((key_code, False))
+        events.append((key_code, True))
+    return events
+
+def chat_events(text, whisper=False, backend=None):
+    """Events that open chat (Ctrl+Enter replies to the last whisper), type text and send it"""
+    if whisper:
+        events = [(VK_CONTROL, False), (VK_RETURN, False), (VK_RETURN, True), (VK_CONTROL, True)]
+    else:
+        events = [(VK_RETURN, False), (VK_RETURN, True)]
+    events += text_events(text, backend)
+    events += [(VK_RETURN, False), (VK_RETURN, True)]
+    return events
+
+def paste_events(whisper=False):
+    """Fixed-size burst that opens chat, pastes the clipboard and sends it"""
+    events = [(VK_CONTROL, False)] if whisper else []
+    events += [(VK_RETURN, False), (VK_RETURN, True)]
+    if not whisper:
+        events.append((VK_CONTROL, False))
+    events += [(VK_V, False), (VK_V, True), (VK_CONTROL, True),
+               (VK_RETURN, False), (VK_RETURN, True)]
+    return events
+
+def execute_command_batched(command_text, paste=False):
+    """Execute a command as a single batched input burst"""
+    if paste and paste_text_batched(command_text, whisper=False):
         return
-    input_array = (INPUT * len(inputs))(*inputs)
-    ctypes.windll.user32.SendInput(len(inputs), ctypes.byref(input_array), ctypes.sizeof(INPUT))
+    backend = get_backend()
+    backend.send_events(chat_events(command_text, whisper=False, backend=backend))
 
-def execute_command_batched(command_text):
-    """Execute a command using batched input events with optimized structure reuse"""
-    input_count = 4 + (len(command_text) * 2)
-    
-    INPUT_ARRAY_TYPE = INPUT * input_count
-    
-    input_array = INPUT_ARRAY_TYPE()
-    
-    idx = 0
+def execute_whisper_batched(whisper_text, paste=False):
+    """Reply to the last whisper as a single batched input burst"""
+    if paste and paste_text_batched(whisper_text, whisper=True):
+        return
+    backend = get_backend()
+    backend.send_events(chat_events(whisper_text, whisper=True, backend=backend))
+
+def key_name_to_vk(name):
+    """Resolve a key name as written in settings ('f5', 'enter', 'ctrl') to a virtual key"""
+    name = name.strip().lower()
+    return VK_CODE.get(KEY_ALIASES.get(name, name))
+
+def compile_macro(steps, backend=None, paste=False):
+    """Compile macro steps into as few input batches as the delays allow
     
-    input_array[idx] = get_input_from_pool(idx, VK_RETURN, False)
-    idx += 1
-    input_array[idx] = get_input_from_pool(idx, VK_RETURN, True)
-    idx += 1
+    Steps are dicts: {'type': 'command'|'whisper', 'text': ...} or
+    {'type': 'key', 'key': name, 'action': 'press'|'down'|'up'}, each with an
+    optional 'delay_ms' to wait after it. Returns [(events, paste_line, delay_seconds), ...]:
+    events are sent first, then paste_line, a (text, whisper) pair, goes through
+    the clipboard. With paste=False chat lines are typed and paste_line is None;
+    with paste=True every chat line ends its segment, since the clipboard holds one line.
+    """
+    backend = backend or get_backend()
+    segments = []
+    events = []
+    for step in steps:
+        step_type = step.get('type')
+        if step_type in ('command', 'whisper'):
+            whisper = step_type == 'whisper'
+            if paste:
+                segments.append((events, (step.get('text', ''), whisper), 0.0))
+                events = []
+            else:
+                events += chat_events(step.get('text', ''), whisper=whisper, backend=backend)
+        elif step_type == 'key':
+            key_code = key_name_to_vk(step.get('key', ''))
+            if key_code is None:
+                print(f"Unknown macro key: {step.get('key')}")
+                continue
+            action = step.get('action', 'press')
+            if action in ('press', 'down'):
+                events.append((key_code, False))
+            if action in ('press', 'up'):
+                events.append((key_code, True))
+        elif step_type != 'delay':
+            print(f"Unknown macro step type: {step_type}")
+            continue
+        delay = max(0.0, float(step.get('delay_ms', 0) or 0)) / 1000.0
+        if delay > 0:
+            if events or not segments:
+                segments.append((events, None, delay))
+                events = []
+            else:
+                last_events, last_paste, last_delay = segments[-1]
+                segments[-1] = (last_events, last_paste, last_delay + delay)
+    if events:
+        segments.append((events, None, 0.0))
+    return segments
+
+def macro_chat_lines(steps):
+    """Number of chat lines a macro sends, for flood-limit accounting"""
+    return sum(1 for step in steps if step.get('type') in ('command', 'whisper'))
+
+def precise_wait(seconds):
+    """Wait with sub-millisecond accuracy
     
-    for char in command_text:
-        if char == '/':
-            key_code = VK_CODE.get('/')
+    On Windows the bulk of the wait uses a high-resolution waitable timer
+    (time.sleep rounds up to the 15.6 ms system tick on older Pythons);
+    elsewhere it uses a short sleep. The last SPIN_THRESHOLD is spun on
+    perf_counter.
+    """
+    deadline = time.perf_counter() + seconds
+    coarse = seconds - SPIN_THRESHOLD
+    if coarse > 0:
+        timer = _get_wait_timer()
+        if timer:
+            due = ctypes.c_longlong(-int(coarse * 10_000_000))
+            if ctypes.windll.kernel32.SetWaitableTimer(timer, ctypes.byref(due), 0, None, None, False):
+                ctypes.windll.kernel32.WaitForSingleObject(timer, 0xFFFFFFFF)
+            else:
+                time.sleep(coarse)
         else:
-            key_code = KEY_CODE_CACHE.get(ord(char.upper()), 0x41)
-        
-        input_array[idx] = get_input_from_pool(idx, key_code, False)
-        idx += 1
-        
-        input_array[idx] = get_input_from_pool(idx, key_code, True)
-        idx += 1
-    
-    input_array[idx] = get_input_from_pool(idx, VK_RETURN, False)
-    idx += 1
-    input_array[idx] = get_input_from_pool(idx, VK_RETURN, True)
-    
-    ctypes.windll.user32.SendInput(input_count, ctypes.byref(input_array), ctypes.sizeof(INPUT))
+            time.sleep(coarse)
+    while time.perf_counter() < deadline:
+        pass
 
-def execute_whisper_batched(whisper_text):
-    """Execute a whisper using batched input events with optimized structure reuse"""
-    input_count = 4 + (len(whisper_text) * 2) + 2
-    
-    INPUT_ARRAY_TYPE = INPUT * input_count
-    
-    input_array = INPUT_ARRAY_TYPE()
+def _get_wait_timer():
+    """Per-thread high-resolution waitable timer handle (None when unavailable)"""
+    if sys.platform != 'win32':
+        return None
+    timer = getattr(_wait_timer, 'handle', False)
+    if timer is False:
+        try:
+            timer = ctypes.windll.kernel32.CreateWaitableTimerExW(
+                None, None, CREATE_WAITABLE_TIMER_HIGH_RESOLUTION, TIMER_ALL_ACCESS) or None
+        except Exception:
+            timer = None
+        _wait_timer.handle = timer
+    return timer
+
+class MacroRun:
+    """One run of a macro, delivered a segment at a time
     
-    idx = 0
+    step() sends the next delay-separated segment and returns the seconds to
+    wait before calling it again, or None once the macro is done. Keys pressed
+    by a 'down' step stay held across segments until their 'up' step; whatever
+    is still held when the macro ends, fails or is cut off by release() is let go.
+    """
     
-    input_array[idx] = get_input_from_pool(idx, 0x11, False)
-    idx += 1
+    def __init__(self, steps, paste=False, backend=None):
+        self.steps = steps
+        self.paste = paste
+        self.backend = backend
+        self.segments = None
+        self.index = 0
+        self.held = []
     
-    input_array[idx] = get_input_from_pool(idx, VK_RETURN, False)
-    idx += 1
+    def step(self):
+        if self.segments is None:
+            self.backend = self.backend or get_backend()
+            self.segments = compile_macro(self.steps, self.backend, paste=self.paste)
+        if self.index >= len(self.segments):
+            self.release()
+            return None
+        events, paste_line, delay = self.segments[self.index]
+        self.index += 1
+        try:
+            self._send(events)
+            if paste_line:
+                text, whisper = paste_line
+                if not paste_text_batched(text, whisper=whisper):
+                    self._send(chat_events(text, whisper=whisper, backend=self.backend))
+        except Exception:
+            self.release()
+            raise
+        if self.index >= len(self.segments) and not delay:
+            self.release()
+            return None
+        return delay
     
-    input_array[idx] = get_input_from_pool(idx, VK_RETURN, True)
-    idx += 1
+    def _send(self, events):
+        # Count every key pressed in this batch as held before sending, so a
+        # batch that fails part-way is still released
+        for key_code, up in events:
+            if not up and key_code not in self.held:
+                self.held.append(key_code)
+        self.backend.send_events(events)
+        for key_code, up in events:
+            if up and key_code in self.held:
+                self.held.remove(key_code)
+            elif not up and key_code not in self.held:
+                self.held.append(key_code)
     
-    input_array[idx] = get_input_from_pool(idx, 0x11, True)
-    idx += 1
+    def release(self):
+        """Let go of every key the macro still holds down"""
+        held, self.held = self.held, []
+        if not held:
+            return
+        try:
+            self.backend.send_events([(key_code, True) for key_code in reversed(held)])
+        except Exception as e:
+            print(f"Error releasing macro keys: {e}")
+
+def execute_macro_batched(steps, paste=False):
+    """Run a macro in the calling thread: one SendInput call per delay-separated segment"""
+    run = MacroRun(steps, paste=paste)
+    try:
+        while True:
+            delay = run.step()
+            if delay is None:
+                return
+            if delay:
+                precise_wait(delay)
+    finally:
+        run.release()
+
+def _restore_clipboard(token):
+    """Put back the clipboard text that was saved by the first pending paste"""
+    global _pending_restore
+    with _clipboard_lock:
+        if _pending_restore is None or _pending_restore[2] is not token:
+            return
+        backend, previous = _pending_restore[3], _pending_restore[1]
+        _pending_restore = None
+        if previous is None:
+            # Nothing textual was saved (empty, or an image/files): setting None would empty the clipboard
+            return
+        backend.set_clipboard_text(previous)
+
+def paste_text_batched(text, whisper=False):
+    """Deliver text through the clipboard as one constant-size input burst
     
-    for char in whisper_text:
-        if char == '/':
-            key_code = VK_CODE.get('/')
+    The burst is Enter (Ctrl+Enter for whispers), Ctrl+V, Enter no matter how long
+    the message is. The previous clipboard text is restored once the game has had
+    time to read the pasted text; back-to-back pastes share one restore.
+    """
+    global _pending_restore
+    backend = get_backend()
+    with _clipboard_lock:
+        if _pending_restore is not None:
+            previous = _pending_restore[1]
         else:
-            key_code = KEY_CODE_CACHE.get(ord(char.upper()), 0x41)
+            previous = backend.get_clipboard_text()
+        if not backend.set_clipboard_text(text):
+            return False
+        if _pending_restore is not None:
+            _pending_restore[0].cancel()
         
-        input_array[idx] = get_input_from_pool(idx, key_code, False)
-        idx += 1
+        backend.send_events(paste_events(whisper))
         
-        input_array[idx] = get_input_from_pool(idx, key_code, True)
-        idx += 1
-    
-    input_array[idx] = get_input_from_pool(idx, VK_RETURN, False)
-    idx += 1
-    input_array[idx] = get_input_from_pool(idx, VK_RETURN, True)
+        token = object()
+        restore_timer = threading.Timer(CLIPBOARD_RESTORE_DELAY, _restore_clipboard, args=(token,))
+        restore_timer.daemon = True
+        _pending_restore = (restore_timer, previous, token, backend)
+        restore_timer.start()
+    return True
+
+def benchmark_delivery(messages=None, iterations=20):
+    """Time typed vs. pasted delivery for each message
     
-    ctypes.windll.user32.SendInput(input_count, ctypes.byref(input_array), ctypes.sizeof(INPUT))
+    Returns {(text, mode): (milliseconds per send, events per send)}. With a real
+    backend every send types into the focused window, so focus an empty text field first.
+    """
+    if messages is None:
+        messages = ["hideout", "Sorry, I DCd that item to standard"]
+    results = {}
+    for text in messages:
+        for mode, paste in (("typed", False), ("paste", True)):
+            events = len(paste_events(True) if paste else chat_events(text, whisper=True))
+            start = time.perf_counter()
+            for _ in range(iterations):
+                execute_whisper_batched(text, paste=paste)
+            elapsed = (time.perf_counter() - start) / iterations
+            results[(text, mode)] = (elapsed * 1000, events)
+            time.sleep(CLIPBOARD_RESTORE_DELAY * 2)
+    return results
 
 def check_single_instance():
     """Check if another instance of the application is already running"""
+    global _instance_lock
+    if sys.platform != 'win32':
+        try:
+            import fcntl
+            import tempfile
+            _instance_lock = open(os.path.join(tempfile.gettempdir(), 'xddbot.lock'), 'w')
+            fcntl.flock(_instance_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+        except Exception:
+            return True
     mutex_name = "Global\\XDDBotSingleInstance"
     try:
-        mutex = ctypes.windll.kernel32.CreateMutexW(None, 1, mutex_name)
+        _instance_lock = ctypes.windll.kernel32.CreateMutexW(None, 1, mutex_name)
         if ctypes.windll.kernel32.GetLastError() == 183:
             return False
         return True
     except:
-        return True 
\ No newline at end of file
+        return True
+
+if __name__ == "__main__":
+    if "--record" in sys.argv:
+        from input_backends import RecordingBackend
+        set_backend(RecordingBackend())
+    else:
+        print("Focus an empty text field, benchmark starts in 3 seconds...")
+        time.sleep(3)
+    print(f"Input backend: {get_backend().name}")
+    for (text, mode), (ms, events) in benchmark_delivery().items():
+        print(f"{mode:>6} {len(text):3d} chars: {ms:.3f} ms per send, {events} events")
@@ -1,6 +1,11 @@
 import os
 import sys
+import importlib
+from startup_profiler import profiler
+profiler.profile_imports()
 import npcap_detector
+import update_checker
+from bootstrap import Bootstrap
 from PyQt5.QtWidgets import QApplication, QMessageBox, QVBoxLayout, QLabel, QPushButton, QDialog
 from PyQt5.QtCore import Qt, QUrl
 from PyQt5.QtGui import QDesktopServices
@@ -11,6 +16,8 @@ def launch_main_app():
         main.main()
     except Exception as e:
         print(f"Error launching main app: {e}")
+        if update_checker.rollback_update(f"failed to start ({e})"):
+            return
         QMessageBox.critical(None, "Error", f"Failed to start the application: {e}")
 
 class NpcapRequiredDialog(QDialog):
@@ -53,13 +60,23 @@ class NpcapRequiredDialog(QDialog):
         QDesktopServices.openUrl(QUrl("https://npcap.com/dist/npcap-1.81.exe"))
 
 def main():
+    update_checker.wait_for_restarting_parent()
+    if update_checker.apply_staged_update():
+        return
+    
     app = QApplication(sys.argv)
     
     if len(sys.argv) > 1 and sys.argv[1] == "--main":
         import main as main_module
         return main_module.main()
     
-    if npcap_detector.is_npcap_installed():
+    boot = Bootstrap("launcher startup", profiler=profiler)
+    boot.add('npcap_check', npcap_detector.is_npcap_installed, worker=True)
+    boot.add('import_main', lambda: importlib.import_module('main'))
+    results = boot.run()
+    boot.report()
+    
+    if results.get('npcap_check'):
         launch_main_app()
         return
     
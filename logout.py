@@ -5,10 +5,13 @@ import sys
 import logging
 import psutil
 import keyboard
-from scapy.all import IP, TCP, send, sniff, ARP, Ether, srp, conf, get_if_addr, get_if_hwaddr, sendp
+from scapy.all import IP, TCP, send, AsyncSniffer, ARP, Ether, srp, conf, get_if_addr, get_if_hwaddr, sendp
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Set
 import os
+from background_scheduler import scheduler, PAUSED
+import process_watcher
+from capture_stats import ConnectionStats, StallDetector, tcp_payload_length, tcp_timestamps, STALL_THRESHOLD, STALL_ACTIONS
 
 APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".xddbot")
 os.makedirs(APP_DATA_DIR, exist_ok=True)
@@ -36,6 +39,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger("PoELogout")
 
+SCAN_INTERVAL = 1.0
+EVENTS = ('connection_added', 'connection_removed', 'armed', 'stall_detected')
+
+_subscribers: Dict[str, list] = {event: [] for event in EVENTS}
+
+def subscribe(event, callback):
+    """callback(payload) runs on the engine thread that raised the event"""
+    if event not in _subscribers:
+        raise ValueError(f"Unknown event {event!r}, expected one of {EVENTS}")
+    _subscribers[event].append(callback)
+
+def unsubscribe(event, callback):
+    if callback in _subscribers.get(event, ()):
+        _subscribers[event].remove(callback)
+
+def _publish(event, payload):
+    for callback in list(_subscribers[event]):
+        try:
+            callback(payload)
+        except Exception as e:
+            logger.error(f"Error in {event} subscriber: {e}")
+ACTIVE_STATE_TIMEOUT = 10
+
 THREAD_PRIORITY_HIGHEST = None
 if sys.platform == 'win32':
     try:
@@ -150,143 +176,293 @@ class ScapyPacketSender:
         return result
 
 class ConnectionMonitor:
-    def __init__(self, game_port: int, seq_tracker: SequenceTracker):
+    def __init__(self, game_port: int, seq_tracker: SequenceTracker, stall_detector: Optional[StallDetector] = None):
         self.game_port = game_port
         self.seq_tracker = seq_tracker
+        self.stall_detector = stall_detector
         self.monitored_connections: Set[str] = set()
         self.stop_event = threading.Event()
         self.monitor_threads = {}
+        self.connection_stops: Dict[str, threading.Event] = {}
+        self.connections: Dict[str, Connection] = {}
+        self.connection_stats: Dict[str, ConnectionStats] = {}
+        # The scan runs on the scheduler thread, process events on the watcher
+        # thread and set_game_port/stop on the caller's; all of them change the
+        # dicts above, so they do it under this lock
+        self._lock = threading.RLock()
     
     def start(self):
-        self.scanner_thread = threading.Thread(target=self._scan_connections, daemon=True)
-        self.scanner_thread.start()
+        process_watcher.watcher.add_listener(self._on_game_process)
+        process_watcher.start_watching()
+        scheduler.add_task('connection_scan', self._scan_connections, SCAN_INTERVAL,
+                           idle_interval=PAUSED)
     
     def stop(self):
-        self.stop_event.set()
-        for thread in self.monitor_threads.values():
+        process_watcher.watcher.remove_listener(self._on_game_process)
+        scheduler.remove_task('connection_scan')
+        with self._lock:
+            self.stop_event.set()
+            threads = list(self.monitor_threads.values())
+            for conn_id in list(self.connection_stops):
+                self._forget_connection(conn_id)
+        if self.stall_detector:
+            self.stall_detector.stop()
+        for thread in threads:
             thread.join(0.5)
     
+    def set_game_port(self, game_port):
+        """Drop connections on the old port and rescan right away"""
+        with self._lock:
+            self.game_port = game_port
+            for conn in list(self.connections.values()):
+                if conn.remote_port != game_port:
+                    self._forget_connection(conn.id)
+        scheduler.call_later(0, self._scan_connections, name='connection_rescan')
+    
+    def _on_game_process(self, event, pid):
+        if event == 'exited':
+            with self._lock:
+                for conn in list(self.connections.values()):
+                    if conn.pid == pid:
+                        self._forget_connection(conn.id)
+    
+    def _game_processes(self):
+        if process_watcher.watcher.mode:
+            processes = []
+            for pid in process_watcher.watcher.get_pids():
+                try:
+                    processes.append(psutil.Process(pid))
+                except psutil.NoSuchProcess:
+                    continue
+            return processes
+        return [proc for proc in psutil.process_iter(['name', 'pid'])
+                if "PathOfExile" in (proc.info['name'] or "")]
+    
     def get_poe_connections(self) -> List[Connection]:
         connections = []
-        for proc in psutil.process_iter(['name', 'pid']):
+        for proc in self._game_processes():
             try:
-                if "PathOfExile" in proc.info['name']:
-                    for conn in proc.net_connections(kind='inet'):
-                        if conn.status == 'ESTABLISHED' and conn.laddr and conn.raddr:
-                            if conn.raddr.port == self.game_port:
-                                connections.append(Connection(
-                                    pid=proc.info['pid'],
-                                    local_ip=conn.laddr.ip,
-                                    local_port=conn.laddr.port,
-                                    remote_ip=conn.raddr.ip,
-                                    remote_port=conn.raddr.port,
-                                ))
+                for conn in proc.net_connections(kind='inet'):
+                    if conn.status == 'ESTABLISHED' and conn.laddr and conn.raddr:
+                        if conn.raddr.port == self.game_port:
+                            connections.append(Connection(
+                                pid=proc.pid,
+                                local_ip=conn.laddr.ip,
+                                local_port=conn.laddr.port,
+                                remote_ip=conn.raddr.ip,
+                                remote_port=conn.raddr.port,
+                            ))
             except:
                 continue
         return connections
     
+    def get_tracked_connections(self) -> List[Connection]:
+        with self._lock:
+            return list(self.connections.values())
+    
+    def get_passive_rtt(self):
+        """Passive RTT summary of the first connection with recent samples, or None"""
+        with self._lock:
+            connection_stats = list(self.connection_stats.values())
+        for stats in connection_stats:
+            if stats.has_recent_sample():
+                return stats.get_stats()
+        return None
+    
+    def _forget_connection(self, conn_id):
+        """Stop monitoring conn_id; the caller holds self._lock"""
+        conn = self.connections.get(conn_id)
+        stop = self.connection_stops.pop(conn_id, None)
+        if stop:
+            stop.set()
+        self.monitored_connections.discard(conn_id)
+        self.monitor_threads.pop(conn_id, None)
+        self.connections.pop(conn_id, None)
+        self.connection_stats.pop(conn_id, None)
+        if self.stall_detector:
+            self.stall_detector.unwatch(conn_id)
+        if conn:
+            _publish('connection_removed', conn)
+    
     def _scan_connections(self):
-        prev_connections = set()
-        while not self.stop_event.is_set():
+        if self.stop_event.is_set():
+            return
+        try:
+            current = {conn.id: conn for conn in self.get_poe_connections()}
+        except:
+            return
+        with self._lock:
+            if self.stop_event.is_set():
+                return
             try:
-                current_connections = set()
-                for conn in self.get_poe_connections():
-                    current_connections.add(conn.id)
-                    if conn.id not in self.monitored_connections:
-                        self.monitored_connections.add(conn.id)
+                for conn_id, conn in current.items():
+                    if conn_id not in self.monitored_connections:
+                        self.monitored_connections.add(conn_id)
+                        self.connections[conn_id] = conn
+                        self.connection_stops[conn_id] = threading.Event()
+                        self.connection_stats[conn_id] = ConnectionStats(conn_id)
+                        if self.stall_detector:
+                            self.stall_detector.watch(self.connection_stats[conn_id])
                         monitor_thread = threading.Thread(
                             target=self._monitor_connection, 
                             args=(conn,),
                             daemon=True
                         )
-                        self.monitor_threads[conn.id] = monitor_thread
+                        self.monitor_threads[conn_id] = monitor_thread
                         monitor_thread.start()
-                
-                closed_connections = prev_connections - current_connections
-                for conn_id in closed_connections:
-                    if conn_id in self.monitored_connections:
-                        self.monitored_connections.remove(conn_id)
-                        if conn_id in self.monitor_threads:
-                            del self.monitor_threads[conn_id]
-                
-                prev_connections = current_connections
-                time.sleep(1)
+                        _publish('connection_added', conn)
+            
+                for conn_id in list(self.monitored_connections - set(current)):
+                    self._forget_connection(conn_id)
             except:
-                time.sleep(1)
+                pass
     
     def _monitor_connection(self, conn: Connection):
         filter_str = f"host {conn.remote_ip} and port {conn.remote_port} and tcp"
         
+        with self._lock:
+            stats = self.connection_stats.get(conn.id)
+            stop = self.connection_stops.get(conn.id)
+        
         def packet_callback(pkt):
             if TCP in pkt and IP in pkt:
-                if pkt[IP].src == conn.local_ip and pkt[TCP].sport == conn.local_port:
-                    seq = pkt[TCP].seq
-                    payload_len = len(pkt[TCP].payload)
+                ip, tcp = pkt[IP], pkt[TCP]
+                payload_len = tcp_payload_length(ip, tcp)
+                timestamps = tcp_timestamps(tcp.options) if tcp.dataofs > 5 else None
+                if ip.src == conn.local_ip and tcp.sport == conn.local_port:
+                    seq = tcp.seq
                     next_seq = seq + payload_len if payload_len > 0 else seq
                     self.seq_tracker.update(conn.id, next_seq)
+                    if stats:
+                        stats.on_outbound(seq, payload_len, float(pkt.time), timestamps)
+                elif stats and 'A' in tcp.flags:
+                    stats.on_inbound(tcp.ack, float(pkt.time), timestamps)
         
+        if stop is None:
+            return
         try:
-            sniff(
-                filter=filter_str,
-                prn=packet_callback,
-                stop_filter=lambda _: self.stop_event.is_set(),
-                store=0
-            )
+            sniffer = AsyncSniffer(filter=filter_str, prn=packet_callback, store=0)
+            sniffer.start()
+            stop.wait()
+            sniffer.stop()
         except:
             pass
 
 class PoELogoutTool:
-    def __init__(self, hotkey='f9', game_port=6112, packet_threads=4):
+    def __init__(self, hotkey='f9', game_port=6112, packet_threads=4, stall_threshold=STALL_THRESHOLD, stall_action='warn'):
+        if stall_action not in STALL_ACTIONS:
+            raise ValueError(f"stall_action must be one of {STALL_ACTIONS}")
         self.hotkey = hotkey
         self.game_port = game_port
+        self.stall_action = stall_action
+        self.hotkey_hook = None
+        self.stall_detector = StallDetector(self._on_stall, stall_threshold)
         self.is_active = False
         self.running = True
         self.active_attack = False
         self.last_active_time = 0
         self.seq_tracker = SequenceTracker()
         self.packet_sender = ScapyPacketSender(num_threads=packet_threads)
-        self.connection_monitor = ConnectionMonitor(game_port, self.seq_tracker)
+        self.connection_monitor = ConnectionMonitor(game_port, self.seq_tracker, self.stall_detector)
         self.router_mac = None
         self.router_ip = None
         self.local_iface = None
         self.use_layer2 = False
     
     def start(self):
+        """Start capturing; the router MAC is resolved in the background so the hotkey can be armed right away"""
+        self.connection_monitor.start()
+        threading.Thread(target=self._resolve_router, daemon=True, name="RouterLookup").start()
+    
+    def _resolve_router(self):
         try:
             self._get_router_mac()
             if self.router_mac:
                 self.use_layer2 = True
         except:
             pass
-        self.connection_monitor.start()
-        threading.Thread(target=self._state_watchdog, daemon=True).start()
+    
+    def reconfigure(self, hotkey=None, game_port=None, packet_threads=None, stall_threshold=None, stall_action=None):
+        """Apply new settings in place, keeping the capture, sequence tracker and router lookup
+
+        Returns the names of the settings that actually changed.
+        """
+        if stall_action is not None and stall_action not in STALL_ACTIONS:
+            raise ValueError(f"stall_action must be one of {STALL_ACTIONS}")
+        changed = set()
+        if hotkey is not None and hotkey != self.hotkey:
+            self.hotkey = hotkey
+            if self.hotkey_hook:
+                self.register_hotkey()
+            changed.add('hotkey')
+        if game_port is not None and game_port != self.game_port:
+            self.game_port = game_port
+            self.connection_monitor.set_game_port(game_port)
+            changed.add('game_port')
+        if packet_threads is not None and packet_threads != self.packet_sender.num_threads:
+            self.packet_sender.num_threads = packet_threads
+            changed.add('packet_threads')
+        if stall_threshold is not None and stall_threshold != self.stall_detector.threshold:
+            self.stall_detector.set_threshold(stall_threshold)
+            changed.add('stall_threshold')
+        if stall_action is not None and stall_action != self.stall_action:
+            self.stall_action = stall_action
+            changed.add('stall_action')
+        return changed
+    
+    def _on_stall(self, stats, stalled_for):
+        if self.stall_action == 'off' or not self.running:
+            return
+        logger.warning(f"Connection {stats.conn_id} stalled for {stalled_for:.2f}s "
+                       f"({stats.retransmissions} retransmissions), action: {self.stall_action}")
+        info = {
+            'conn_id': stats.conn_id,
+            'stalled_for': stalled_for,
+            'action': self.stall_action,
+            'stats': stats.get_stats(),
+        }
+        if self.stall_action == 'logout':
+            # Off the detector thread, so a slow logout cannot delay stall checks on other connections
+            threading.Thread(target=self.perform_logout, daemon=True, name="StallLogout").start()
+        _publish('stall_detected', info)
     
     def _state_watchdog(self):
-        while self.running:
-            if self.is_active and time.time() - self.last_active_time > 10:
-                self.is_active = False
-            time.sleep(1)
+        if self.is_active and time.time() - self.last_active_time > ACTIVE_STATE_TIMEOUT:
+            self.is_active = False
     
     def stop(self):
         self.running = False
+        self.unregister_hotkey()
         self.connection_monitor.stop()
+        _publish('armed', False)
     
     def register_hotkey(self):
+        """Hook the logout hotkey, then drop our previous hook; other hotkeys are left alone"""
+        previous = self.hotkey_hook
         try:
-            try:
-                keyboard.unhook_all()
-            except:
-                pass
-            keyboard.add_hotkey(self.hotkey, self.perform_logout, suppress=False)
-            if not any(self.hotkey in k for k in keyboard._hotkeys.keys()):
-                keyboard.on_press_key(self.hotkey, lambda _: self.perform_logout())
-            return True
+            hook = keyboard.add_hotkey(self.hotkey, self.perform_logout, suppress=False)
+            self.hotkey_hook = (keyboard.remove_hotkey, hook)
         except Exception as e:
             try:
-                keyboard.on_press_key(self.hotkey, lambda _: self.perform_logout())
-                return True
+                hook = keyboard.on_press_key(self.hotkey, lambda _: self.perform_logout())
+                self.hotkey_hook = (keyboard.unhook, hook)
             except:
                 return False
+        self._remove_hook(previous)
+        _publish('armed', True)
+        return True
+    
+    def unregister_hotkey(self):
+        self._remove_hook(self.hotkey_hook)
+        self.hotkey_hook = None
+    
+    def _remove_hook(self, hook):
+        if hook:
+            remove, handle = hook
+            try:
+                remove(handle)
+            except:
+                pass
     
     def _get_router_mac(self):
         if self.router_mac is not None:
@@ -390,6 +566,7 @@ class PoELogoutTool:
         
         self.is_active = True
         self.last_active_time = time.time()
+        scheduler.call_later(ACTIVE_STATE_TIMEOUT + 0.5, self._state_watchdog, name='logout_watchdog')
         
         try:
             if self.use_layer2:
@@ -445,15 +622,26 @@ class PoELogoutTool:
 
 tool_instance = None
 
-def init_logout_tool(hotkey='f9', game_port=6112, packet_threads=4):
+def init_logout_tool(hotkey='f9', game_port=6112, packet_threads=4, stall_threshold=STALL_THRESHOLD, stall_action='warn'):
     global tool_instance
     try:
-        tool_instance = PoELogoutTool(hotkey, game_port, packet_threads)
+        tool_instance = PoELogoutTool(hotkey, game_port, packet_threads, stall_threshold, stall_action)
         tool_instance.start()
         return True
     except:
         return False
 
+def configure_logout_tool(**settings):
+    """Reconfigure the running tool in place, or start one if none is running
+
+    Returns the set of changed setting names, or None when a new tool had to be started.
+    """
+    if tool_instance and tool_instance.running:
+        return tool_instance.reconfigure(**settings)
+    if init_logout_tool(**settings):
+        register_logout_hotkey()
+    return None
+
 def register_logout_hotkey():
     global tool_instance
     if not tool_instance:
@@ -478,7 +666,7 @@ def get_connection_info():
     if not tool_instance:
         return "Logout tool not initialized"
     try:
-        connections = tool_instance.connection_monitor.get_poe_connections()
+        connections = tool_instance.connection_monitor.get_tracked_connections()
         if not connections:
             return "No active PoE connection"
         
@@ -491,6 +679,20 @@ def get_connection_info():
     except:
         return "Error retrieving connection info"
 
+def get_server_target():
+    """(remote_ip, remote_port) of the tracked game server connection, or None"""
+    if not tool_instance:
+        return None
+    connections = tool_instance.connection_monitor.get_tracked_connections()
+    if not connections:
+        return None
+    return connections[0].remote_ip, connections[0].remote_port
+
+def get_passive_rtt():
+    if not tool_instance:
+        return None
+    return tool_instance.connection_monitor.get_passive_rtt()
+
 def shutdown_logout_tool():
     global tool_instance
     if tool_instance:
@@ -506,9 +708,22 @@ if __name__ == '__main__':
         parser.add_argument('--hotkey', type=str, default='f9', help='Custom hotkey to use')
         parser.add_argument('--port', type=int, default=6112, help='PoE server port (default: 6112)')
         parser.add_argument('--threads', type=int, default=4, help='Number of parallel threads for packet sending')
+        parser.add_argument('--stall-threshold', type=float, default=STALL_THRESHOLD,
+                            help=f'Seconds without server traffic before a connection counts as stalled (default: {STALL_THRESHOLD})')
+        parser.add_argument('--stall-action', choices=STALL_ACTIONS, default='warn',
+                            help='What to do when a connection stalls (default: warn)')
         args = parser.parse_args()
         
-        if init_logout_tool(hotkey=args.hotkey, game_port=args.port, packet_threads=args.threads):
+        def start_tool():
+            if not init_logout_tool(hotkey=args.hotkey, game_port=args.port, packet_threads=args.threads,
+                                    stall_threshold=args.stall_threshold, stall_action=args.stall_action):
+                return False
+            return True
+        
+        subscribe('stall_detected', lambda info: print(f"Connection stalled for {info['stalled_for']:.2f}s "
+                                                       f"({info['stats']['retransmissions']} retransmissions)"))
+        
+        if start_tool():
             if register_logout_hotkey():
                 pass
             else:
@@ -523,15 +738,17 @@ if __name__ == '__main__':
                             time.sleep(0.5)
                 threading.Thread(target=manual_check, daemon=True).start()
             
+            def ensure_armed():
+                if not tool_instance or not tool_instance.running:
+                    start_tool()
+                    register_logout_hotkey()
+                elif not tool_instance.hotkey_hook:
+                    register_logout_hotkey()
+            
+            scheduler.add_task('logout_rearm', ensure_armed, 5.0, idle_interval=60.0, run_now=False)
             try:
                 while True:
-                    time.sleep(1)
-                    if not tool_instance or not tool_instance.running:
-                        init_logout_tool(hotkey=args.hotkey, game_port=args.port, packet_threads=args.threads)
-                        register_logout_hotkey()
-                    
-                    if hasattr(keyboard, '_hotkeys') and not any(args.hotkey in k for k in keyboard._hotkeys.keys()):
-                        register_logout_hotkey()
+                    time.sleep(3600)
             except KeyboardInterrupt:
                 pass
             finally:
@@ -4,12 +4,12 @@ import json
 import threading
 import time
 import ctypes
+from startup_profiler import profiler
+profiler.profile_imports()
 import keyboard
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QSystemTrayIcon, QMenu, QAction, QStatusBar, QMessageBox, QScrollArea, QFrame, QGridLayout, QCheckBox, QSizePolicy, QTabWidget
 from PyQt5.QtGui import QIcon, QFont, QPixmap, QPainter, QColor, QBrush, QPen
 from PyQt5.QtCore import Qt, QTimer, QPoint
-import win32clipboard
-import subprocess
 try:
     import logout
     import stashscroll
@@ -17,19 +17,35 @@ try:
     import update_checker
 except ImportError as e:
     print(f"Failed to import module: {e}")
-from ui import KeyCaptureWidget, CommandUI, CommandRowCreator
+from ui import KeyCaptureWidget, CommandUI, CommandRowCreator, EngineSignals, GuiInvoker, apply_theme
+from background_scheduler import scheduler
+from rtt_prober import RttProber
 from hotkey_manager import HotkeyManager
-from input_utils import check_single_instance, press_and_release, type_string, VK_RETURN, INPUT, INPUT_union, KEYBDINPUT, KEYEVENTF_KEYUP, INPUT_KEYBOARD
+from input_utils import check_single_instance
+from bootstrap import Bootstrap
+
+SETTINGS_PREBUILD_DELAY_MS = 3000
+
+def read_settings_file():
+    """Parsed poe_settings.json from APP_DATA_DIR, or None when there is none; safe off the GUI thread"""
+    settings_file = os.path.join(update_checker.APP_DATA_DIR, 'poe_settings.json')
+    if not os.path.exists(settings_file):
+        return None
+    with open(settings_file, 'r') as f:
+        return json.load(f)
 
 class CommandHotkeys(QWidget):
-    def __init__(self):
+    def __init__(self, loaded_settings=None, autostart=True):
         super().__init__(None)
+        self.started_at = time.perf_counter()
         print("Initializing application...")
         self.setWindowFlags(Qt.Window | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint) 
         self.setAttribute(Qt.WA_TranslucentBackground)
         
         self.dragging = False
         self.drag_position = None
+        self.connections = {}
+        self.logout_armed = False
         
         self.settings = {
             'logout': {
@@ -77,50 +93,62 @@ class CommandHotkeys(QWidget):
                 'is_editable': True
             }
         }
+        self.macro_settings = {}
+        self.paste_mode = False
         self.ui_components = {}
         self.whisper_components = {}
+        self.command_ui = None
+        self.status_bar = None
+        self.logout_indicator = None
+        self.latency_stats = None
         print("Loading settings...")
-        self.load_settings()
-        print("Initializing UI...")
-        self.init_ui()
+        self.load_settings(loaded_settings)
         
+        self.logout_process = None
+        print("Creating tray icon...")
+        self.create_tray_icon()
+        self.report_startup_milestone("Tray icon shown")
+        
+        self.gui_invoker = GuiInvoker(self)
         print("Creating hotkey manager...")
         self.hotkey_manager = HotkeyManager(self.settings)
         self.hotkey_manager.set_whisper_settings(self.whisper_settings)
-        self.hotkey_manager.set_show_settings_callback(self.show_settings)
+        self.hotkey_manager.set_macro_settings(self.macro_settings)
+        self.hotkey_manager.set_paste_mode(self.paste_mode)
+        self.hotkey_manager.set_show_settings_callback(lambda: self.gui_invoker.post(self.show_settings))
         
         self.startup_timer = QTimer()
         self.startup_timer.setSingleShot(True)
         self.startup_timer.timeout.connect(self.delayed_startup)
-        self.startup_timer.start(200)
-        
-        self.logout_process = None
-        print("Creating tray icon...")
-        self.create_tray_icon()
-        
-        self.connection_timer = QTimer()
-        self.connection_timer.timeout.connect(self.update_connection_display)
-        self.connection_timer.start(2000)
-        
-        self.ping_timer = QTimer()
-        self.ping_timer.timeout.connect(self.update_ping)
-        self.ping_timer.start(1000)
-        
-        self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Expanding)
-        
-        self.setMinimumSize(800, 400)
-        self.setMaximumWidth(800)
+        if autostart:
+            self.startup_timer.start(0)
+        
+        self.prebuild_timer = QTimer()
+        self.prebuild_timer.setSingleShot(True)
+        self.prebuild_timer.timeout.connect(self.ensure_ui)
+        
+        self.engine_signals = EngineSignals(self)
+        self.engine_signals.latency_updated.connect(self.update_ping)
+        self.engine_signals.stall_detected.connect(self.on_stall_detected)
+        self.engine_signals.connection_added.connect(self.on_connection_added)
+        self.engine_signals.connection_removed.connect(self.on_connection_removed)
+        self.engine_signals.armed.connect(self.on_logout_armed)
+        logout.subscribe('stall_detected', self.engine_signals.stall_detected.emit)
+        logout.subscribe('connection_added', self.engine_signals.connection_added.emit)
+        logout.subscribe('connection_removed', self.engine_signals.connection_removed.emit)
+        logout.subscribe('armed', self.engine_signals.armed.emit)
+        self.rtt_prober = RttProber(logout.get_server_target, passive_source=logout.get_passive_rtt)
+        self.rtt_prober.add_listener(self.engine_signals.latency_updated.emit)
+        self.rtt_prober.start()
         
         self.hide()
     def register_all_commands(self):
-        QTimer.singleShot(200, lambda: self._do_register_commands())
+        self._do_register_commands()
         
     def _do_register_commands(self):
         try:
             print("Registering commands...")
             
-            self.hotkey_manager.clear_all_hotkeys()
-            
             for cmd_id, cmd_data in self.settings.items():
                 if cmd_data.get('hotkey'):
                     print(f"  Command {cmd_id}: '{cmd_data.get('text', '')}' with hotkey '{cmd_data.get('hotkey')}'")
@@ -129,9 +157,9 @@ class CommandHotkeys(QWidget):
                 if cmd_data.get('hotkey'):
                     print(f"  Whisper {cmd_id}: '{cmd_data.get('text', '')}' with hotkey '{cmd_data.get('hotkey')}'")
             
-            self.hotkey_manager.update_settings(self.settings, self.whisper_settings)
+            changes = self.hotkey_manager.update_settings(self.settings, self.whisper_settings, self.macro_settings)
             
-            print("Commands registered successfully")
+            print(f"Commands registered successfully ({changes} hook changes)")
         except Exception as e:
             print(f"Error registering commands: {e}")
             import traceback
@@ -142,49 +170,21 @@ class CommandHotkeys(QWidget):
         
         main_container = QWidget()
         main_container.setObjectName("mainContainer")
-        main_container.setStyleSheet("""
-            #mainContainer {
-                background-color: #1c1c1c;
-                border-radius: 10px;
-                border: 1px solid #333333;
-            }
-        """)
         
         title_bar = QWidget()
         title_bar.setObjectName("titleBar")
         title_bar.setFixedHeight(40)
-        title_bar.setStyleSheet("""
-            #titleBar {
-                background-color: #121212;
-                border-top-left-radius: 10px;
-                border-top-right-radius: 10px;
-                border-bottom: 1px solid #333333;
-            }
-        """)
         
         title_layout = QHBoxLayout(title_bar)
         title_layout.setContentsMargins(15, 0, 15, 0)
         title_layout.setSpacing(0)
         
         title_label = QLabel("XDDBot")
-        title_label.setStyleSheet("font-weight: bold; font-size: 14px; background-color: transparent;")
+        title_label.setObjectName("titleLabel")
         
         close_button = QPushButton("×")
         close_button.setObjectName("closeButton")
         close_button.setFixedSize(24, 24)
-        close_button.setStyleSheet("""
-            #closeButton {
-                background-color: transparent;
-                color: #E0E0E0;
-                font-size: 20px;
-                border: none;
-            }
-            #closeButton:hover {
-                background-color: #E04040;
-                color: white;
-                border-radius: 12px;
-            }
-        """)
         close_button.clicked.connect(self.hide)
         
         title_layout.addWidget(title_label)
@@ -210,6 +210,10 @@ class CommandHotkeys(QWidget):
         self.ui_components = self.command_ui.ui_components
         self.whisper_components = self.command_ui.whisper_components
         self.status_bar = self.command_ui.status_bar
+        self.logout_indicator = self.command_ui.logout_indicator
+        self.connection_image = self.command_ui.connection_image
+        self.ping_label = self.command_ui.ping_label
+        self.update_connection_display()
         
         layout = QVBoxLayout(main_container)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -227,13 +231,28 @@ class CommandHotkeys(QWidget):
         
         self.setLayout(main_layout)
         
-        self.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Expanding)
         main_container.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Expanding)
         content_container.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Expanding)
         
-        self.setMinimumSize(650, 500)
+        self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Expanding)
+        
+        self.setMinimumSize(800, 400)
+        self.setMaximumWidth(800)
         
         self.hide()
+    def ensure_ui(self):
+        """Build the settings window the first time it is needed; startup only creates the tray icon and hotkeys"""
+        if self.command_ui is not None:
+            return
+        self.prebuild_timer.stop()
+        started = time.perf_counter()
+        print("Initializing UI...")
+        self.init_ui()
+        if self.latency_stats is not None:
+            self.update_ping(self.latency_stats)
+        print(f"Settings UI built in {(time.perf_counter() - started) * 1000:.0f} ms")
+    def report_startup_milestone(self, milestone):
+        print(f"{milestone} {(time.perf_counter() - self.started_at) * 1000:.0f} ms after startup")
     def create_command_row(self, cmd_id, cmd_settings):
         row_layout = QHBoxLayout()
         row_layout.setSpacing(5)
@@ -245,7 +264,7 @@ class CommandHotkeys(QWidget):
             row_layout.addWidget(text_input, 3)
         else:
             logout_label = QLabel("Logout")
-            logout_label.setStyleSheet("color: #FF3030; font-weight: bold;")
+            logout_label.setObjectName("logoutRowLabel")
             row_layout.addWidget(logout_label, 3)
             
         hotkey_widget = KeyCaptureWidget(cmd_settings['hotkey'])
@@ -320,34 +339,8 @@ class CommandHotkeys(QWidget):
             
             self.setUpdatesEnabled(False)
             
-            tab_widget = self.findChild(QTabWidget)
-            current_tab = 0
-            if tab_widget:
-                current_tab = tab_widget.currentIndex()
-            
-            hotkey = self.settings[cmd_id].get('hotkey')
-            if hotkey:
-                self.hotkey_manager.clear_all_hotkeys()
-            
             del self.settings[cmd_id]
-            
-            components = self.ui_components.pop(cmd_id, None)
-            if components and 'row_layout' in components:
-                row_layout = components['row_layout']
-                
-                if row_layout:
-                    while row_layout.count():
-                        item = row_layout.takeAt(0)
-                        if item.widget():
-                            item.widget().deleteLater()
-                        elif item.layout():
-                            self._clear_layout(item.layout())
-            
-            self.recreate_ui()
-            
-            tab_widget = self.findChild(QTabWidget)
-            if tab_widget:
-                tab_widget.setCurrentIndex(current_tab)
+            self.command_ui.command_model.remove(cmd_id)
             
             current_height = self.height()
             row_height = 40
@@ -355,7 +348,7 @@ class CommandHotkeys(QWidget):
             new_height = max(400, current_height - (row_height + spacing))
             self.resize(self.width(), new_height)
             
-            QTimer.singleShot(100, lambda: self.hotkey_manager.update_settings(self.settings, self.whisper_settings))
+            self.hotkey_manager.update_settings(self.settings, self.whisper_settings)
             
             self.setUpdatesEnabled(True)
             
@@ -366,51 +359,14 @@ class CommandHotkeys(QWidget):
         else:
             print(f"Cannot delete command {cmd_id} - not found or is logout")
 
-    def _clear_layout(self, layout):
-        """Recursively remove all items from a layout"""
-        if layout is not None:
-            while layout.count():
-                item = layout.takeAt(0)
-                widget = item.widget()
-                if widget is not None:
-                    widget.deleteLater()
-                else:
-                    self._clear_layout(item.layout())
-            
     def delete_whisper_command(self, cmd_id):
         if cmd_id in self.whisper_settings:
             print(f"Deleting whisper command {cmd_id}")
             
             self.setUpdatesEnabled(False)
             
-            tab_widget = self.findChild(QTabWidget)
-            current_tab = 1
-            if tab_widget:
-                current_tab = tab_widget.currentIndex()
-            
-            hotkey = self.whisper_settings[cmd_id].get('hotkey')
-            if hotkey:
-                self.hotkey_manager.clear_all_hotkeys()
-            
             del self.whisper_settings[cmd_id]
-            
-            components = self.whisper_components.pop(cmd_id, None)
-            if components and 'row_layout' in components:
-                row_layout = components['row_layout']
-                
-                if row_layout:
-                    while row_layout.count():
-                        item = row_layout.takeAt(0)
-                        if item.widget():
-                            item.widget().deleteLater()
-                        elif item.layout():
-                            self._clear_layout(item.layout())
-            
-            self.recreate_ui()
-            
-            tab_widget = self.findChild(QTabWidget)
-            if tab_widget:
-                tab_widget.setCurrentIndex(current_tab)
+            self.command_ui.whisper_model.remove(cmd_id)
             
             current_height = self.height()
             row_height = 40
@@ -418,7 +374,7 @@ class CommandHotkeys(QWidget):
             new_height = max(400, current_height - (row_height + spacing))
             self.resize(self.width(), new_height)
             
-            QTimer.singleShot(100, lambda: self.hotkey_manager.update_settings(self.settings, self.whisper_settings))
+            self.hotkey_manager.update_settings(self.settings, self.whisper_settings)
             
             self.setUpdatesEnabled(True)
             
@@ -465,23 +421,13 @@ class CommandHotkeys(QWidget):
             
         self.setUpdatesEnabled(False)
         
-        tab_widget = self.findChild(QTabWidget)
-        current_tab = 0
-        if tab_widget:
-            current_tab = tab_widget.currentIndex()
-        
         next_id = 3
         while f'command{next_id}' in self.settings:
             next_id += 1
             
         cmd_id = f'command{next_id}'
         self.settings[cmd_id] = {'label': '', 'text': '', 'hotkey': '', 'is_editable': True}
-        
-        self.recreate_ui()
-        
-        tab_widget = self.findChild(QTabWidget)
-        if tab_widget:
-            tab_widget.setCurrentIndex(current_tab)
+        self.command_ui.command_model.insert(cmd_id, self.settings[cmd_id])
         
         current_height = self.height()
         row_height = 40
@@ -502,23 +448,13 @@ class CommandHotkeys(QWidget):
             
         self.setUpdatesEnabled(False)
         
-        tab_widget = self.findChild(QTabWidget)
-        current_tab = 1
-        if tab_widget:
-            current_tab = tab_widget.currentIndex()
-        
         next_id = len(self.whisper_settings) + 1
         while f'whisper{next_id}' in self.whisper_settings:
             next_id += 1
             
         cmd_id = f'whisper{next_id}'
         self.whisper_settings[cmd_id] = {'label': '', 'text': '', 'hotkey': '', 'is_editable': True}
-        
-        self.recreate_ui()
-        
-        tab_widget = self.findChild(QTabWidget)
-        if tab_widget:
-            tab_widget.setCurrentIndex(current_tab)
+        self.command_ui.whisper_model.insert(cmd_id, self.whisper_settings[cmd_id])
         
         current_height = self.height()
         row_height = 40
@@ -555,6 +491,8 @@ class CommandHotkeys(QWidget):
             result = update_checker.force_update_check()
             if result == 0:
                 QMessageBox.information(self, "Updates", "No new updates available.")
+            elif result == 1:
+                QApplication.quit()
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Could not check for updates: {str(e)}")
     def create_icon_pixmap(self):
@@ -580,30 +518,31 @@ class CommandHotkeys(QWidget):
             else:
                 self.show()
                 self.activateWindow()
-    def load_settings(self):
+    def load_settings(self, loaded_settings=None):
         try:
-            settings_file = os.path.join(update_checker.APP_DATA_DIR, 'poe_settings.json')
-            if os.path.exists(settings_file):
-                with open(settings_file, 'r') as f:
-                    loaded_settings = json.load(f)
-                    if 'commands' in loaded_settings:
-                        for cmd_id, cmd_data in loaded_settings['commands'].items():
-                            if cmd_id in self.settings:
-                                if 'text' in cmd_data:
-                                    self.settings[cmd_id]['text'] = cmd_data['text']
-                                if 'hotkey' in cmd_data:
-                                    self.settings[cmd_id]['hotkey'] = cmd_data['hotkey']
-                            elif cmd_id.startswith('command'):
-                                self.settings[cmd_id] = cmd_data
-                    if 'whispers' in loaded_settings:
-                        for cmd_id, cmd_data in loaded_settings['whispers'].items():
-                            if cmd_id in self.whisper_settings:
-                                if 'text' in cmd_data:
-                                    self.whisper_settings[cmd_id]['text'] = cmd_data['text']
-                                if 'hotkey' in cmd_data:
-                                    self.whisper_settings[cmd_id]['hotkey'] = cmd_data['hotkey']
-                            elif cmd_id.startswith('whisper'):
-                                self.whisper_settings[cmd_id] = cmd_data
+            if loaded_settings is None:
+                loaded_settings = read_settings_file()
+            if loaded_settings is not None:
+                if 'commands' in loaded_settings:
+                    for cmd_id, cmd_data in loaded_settings['commands'].items():
+                        if cmd_id in self.settings:
+                            if 'text' in cmd_data:
+                                self.settings[cmd_id]['text'] = cmd_data['text']
+                            if 'hotkey' in cmd_data:
+                                self.settings[cmd_id]['hotkey'] = cmd_data['hotkey']
+                        elif cmd_id.startswith('command'):
+                            self.settings[cmd_id] = cmd_data
+                if 'whispers' in loaded_settings:
+                    for cmd_id, cmd_data in loaded_settings['whispers'].items():
+                        if cmd_id in self.whisper_settings:
+                            if 'text' in cmd_data:
+                                self.whisper_settings[cmd_id]['text'] = cmd_data['text']
+                            if 'hotkey' in cmd_data:
+                                self.whisper_settings[cmd_id]['hotkey'] = cmd_data['hotkey']
+                        elif cmd_id.startswith('whisper'):
+                            self.whisper_settings[cmd_id] = cmd_data
+                self.macro_settings = self.load_macro_settings(loaded_settings)
+                self.paste_mode = bool(loaded_settings.get('paste_mode', False))
             elif os.path.exists('poe_settings.json'):
                 with open('poe_settings.json', 'r') as f:
                     loaded_settings = json.load(f)
@@ -616,13 +555,25 @@ class CommandHotkeys(QWidget):
                     self.save_settings()
         except Exception as e:
             print(f"Error loading settings: {e}")
+    def load_macro_settings(self, loaded_settings):
+        macros = {}
+        for macro_id, macro_data in loaded_settings.get('macros', {}).items():
+            if not isinstance(macro_data, dict) or not isinstance(macro_data.get('steps'), list):
+                print(f"Ignoring malformed macro {macro_id}")
+                continue
+            macros[macro_id] = {
+                'label': macro_data.get('label', ''),
+                'hotkey': macro_data.get('hotkey', ''),
+                'steps': [step for step in macro_data['steps'] if isinstance(step, dict)]
+            }
+        return macros
     def save_settings(self):
         try:
             print("Saving settings...")
             update_checker.ensure_app_data_dir()
             settings_file = os.path.join(update_checker.APP_DATA_DIR, 'poe_settings.json')
             
-            save_data = {'commands': {}, 'whispers': {}}
+            save_data = {'commands': {}, 'whispers': {}, 'macros': self.macro_settings, 'paste_mode': self.paste_mode}
             
             for cmd_id, cmd_data in self.settings.items():
                 save_data['commands'][cmd_id] = {
@@ -689,7 +640,16 @@ class CommandHotkeys(QWidget):
         if logout_components and 'hotkey' in logout_components:
             self.settings['logout']['hotkey'] = logout_components['hotkey'].get_hotkey()
         
-        self.restart_logout_script()
+        if not self.logout_process:
+            self.start_logout_script()
+            return
+        try:
+            changed = logout.configure_logout_tool(hotkey=self.settings['logout']['hotkey'])
+            if changed:
+                print(f"Logout tool reconfigured: {', '.join(sorted(changed))}")
+        except Exception as e:
+            print(f"Error reconfiguring logout tool, restarting it: {e}")
+            self.restart_logout_script()
     def save_command(self, cmd_id):
         try:
             print(f"Saving command {cmd_id}")
@@ -707,7 +667,7 @@ class CommandHotkeys(QWidget):
                 
             self.save_settings()
             
-            QTimer.singleShot(500, lambda: self._do_register_commands())
+            self._do_register_commands()
             self.status_bar.showMessage(f"Command '{cmd_id}' saved successfully", 3000)
         except Exception as e:
             print(f"Error saving command {cmd_id}: {e}")
@@ -726,7 +686,7 @@ class CommandHotkeys(QWidget):
             
             self.save_settings()
             
-            QTimer.singleShot(500, lambda: self._do_register_commands())
+            self._do_register_commands()
             
             if components['hotkey'].get_hotkey():
                 self.status_bar.showMessage(f"Whisper command saved with hotkey: {components['hotkey'].get_hotkey()}", 3000)
@@ -741,7 +701,14 @@ class CommandHotkeys(QWidget):
     def closeEvent(self, event):
         event.ignore()
         self.hide()
+    def showEvent(self, event):
+        super().showEvent(event)
+        scheduler.set_ui_visible(True)
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        scheduler.set_ui_visible(False)
     def close_application(self):
+        self.rtt_prober.stop()
         if self.logout_process:
             try:
                 logout.shutdown_logout_tool()
@@ -760,23 +727,20 @@ class CommandHotkeys(QWidget):
     def delayed_startup(self):
         print("Performing startup initialization...")
         try:
-            self._do_register_commands()
-            
             self.start_logout_script()
             
-            QTimer.singleShot(300, self._final_startup_attempt)
-            
-            print("Initial startup complete")
+            self._do_register_commands()
         except Exception as e:
             print(f"Error in delayed startup: {e}")
+        self.finish_startup()
+    
+    def finish_startup(self):
+        """Called once the logout and command hotkeys are registered"""
+        self.report_startup_milestone("Hotkeys armed")
+        update_checker.confirm_update_health()
+        if self.command_ui is None:
+            self.prebuild_timer.start(SETTINGS_PREBUILD_DELAY_MS)
             
-    def _final_startup_attempt(self):
-        print("Performing final hotkey registration...")
-        try:
-            self.hotkey_manager.register_all_hotkeys()
-            print("Final registration complete, hotkeys should be active")
-        except Exception as e:
-            print(f"Error in final startup attempt: {e}")
     def apply_all_settings(self):
         try:
             print("Applying all settings...")
@@ -795,13 +759,11 @@ class CommandHotkeys(QWidget):
                 self.whisper_settings[cmd_id]['text'] = components['text'].text()
                 self.whisper_settings[cmd_id]['hotkey'] = components['hotkey'].get_hotkey()
             
-            self.hotkey_manager.clear_all_hotkeys()
-            
             self.save_settings()
             
             self.update_logout_script()
             
-            QTimer.singleShot(100, lambda: self._do_register_commands())
+            self._do_register_commands()
             
             self.setUpdatesEnabled(True)
             
@@ -818,15 +780,8 @@ class CommandHotkeys(QWidget):
         
         self.setUpdatesEnabled(False)
         
-        self.hotkey_manager.clear_all_hotkeys()
-        
         window_pos = self.pos()
         
-        tab_widget = self.findChild(QTabWidget)
-        current_tab = 0
-        if tab_widget:
-            current_tab = tab_widget.currentIndex()
-        
         try:
             update_checker.ensure_app_data_dir()
             settings_file = os.path.join(update_checker.APP_DATA_DIR, 'poe_settings.json')
@@ -864,6 +819,10 @@ class CommandHotkeys(QWidget):
                                 'hotkey': cmd_data.get('hotkey', ''),
                                 'is_editable': cmd_data.get('is_editable', True)
                             }
+                    
+                    self.macro_settings = self.load_macro_settings(loaded_settings)
+                    self.paste_mode = bool(loaded_settings.get('paste_mode', False))
+                    self.hotkey_manager.set_paste_mode(self.paste_mode)
             else:
                 self.status_bar.showMessage("No saved settings found to discard to", 3000)
                 self.setUpdatesEnabled(True)
@@ -876,7 +835,13 @@ class CommandHotkeys(QWidget):
             self.setUpdatesEnabled(True)
             return
             
-        self.recreate_ui()
+        self.command_ui.command_model.set_entries(self.settings)
+        self.command_ui.whisper_model.set_entries(self.whisper_settings)
+        logout_components = self.ui_components.get('logout')
+        if logout_components:
+            logout_components['hotkey'].set_hotkey(self.settings['logout']['hotkey'])
+        if self.logout_indicator:
+            self.logout_indicator.set_hotkey(self.settings['logout']['hotkey'])
         
         base_height = 400
         row_height = 40
@@ -890,11 +855,7 @@ class CommandHotkeys(QWidget):
         
         QApplication.processEvents()
         
-        tab_widget = self.findChild(QTabWidget)
-        if tab_widget:
-            tab_widget.setCurrentIndex(current_tab)
-        
-        QTimer.singleShot(100, lambda: self.hotkey_manager.update_settings(self.settings, self.whisper_settings))
+        self.hotkey_manager.update_settings(self.settings, self.whisper_settings, self.macro_settings)
         
         self.update_logout_script()
         
@@ -903,106 +864,6 @@ class CommandHotkeys(QWidget):
         self.status_bar.showMessage("Changes discarded. Reverted to saved settings.", 3000)
         print("Changes discarded. Reverted to saved settings.")
 
-    def recreate_ui(self):
-        """Recreate the UI to reflect updated settings"""
-        try:
-            if self.layout():
-                old_layout = self.layout()
-                
-                QWidget().setLayout(old_layout)
-            
-            self.command_ui = CommandUI(self)
-            container = self.command_ui.build_ui(
-                self.settings,
-                self.whisper_settings,
-                self.clear_hotkey,
-                self.clear_whisper_hotkey,
-                self.add_new_command,
-                self.add_new_whisper,
-                self.delete_bottom_command,
-                self.delete_bottom_whisper,
-                self.discard_changes,
-                self.apply_all_settings,
-                self.hide
-            )
-            
-            main_container = QWidget()
-            main_container.setObjectName("mainContainer")
-            main_container.setStyleSheet("""
-                #mainContainer {
-                    background-color: #1c1c1c;
-                    border-radius: 10px;
-                    border: 1px solid #333333;
-                }
-            """)
-            
-            title_bar = QWidget()
-            title_bar.setObjectName("titleBar")
-            title_bar.setFixedHeight(40)
-            title_bar.setStyleSheet("""
-                #titleBar {
-                    background-color: #121212;
-                    border-top-left-radius: 10px;
-                    border-top-right-radius: 10px;
-                    border-bottom: 1px solid #333333;
-                }
-            """)
-            
-            title_layout = QHBoxLayout(title_bar)
-            title_layout.setContentsMargins(15, 0, 15, 0)
-            
-            title_label = QLabel("XDDBot")
-            title_label.setStyleSheet("font-weight: bold; font-size: 14px; background-color: transparent;")
-            
-            close_button = QPushButton("×")
-            close_button.setObjectName("closeButton")
-            close_button.setFixedSize(24, 24)
-            close_button.setStyleSheet("""
-                #closeButton {
-                    background-color: transparent;
-                    color: #E0E0E0;
-                    font-size: 20px;
-                    border: none;
-                }
-                #closeButton:hover {
-                    background-color: #E04040;
-                    color: white;
-                    border-radius: 12px;
-                }
-            """)
-            close_button.clicked.connect(self.hide)
-            
-            title_layout.addWidget(title_label)
-            title_layout.addStretch()
-            title_layout.addWidget(close_button)
-            
-            container_layout = QVBoxLayout(main_container)
-            container_layout.setContentsMargins(0, 0, 0, 0)
-            container_layout.setSpacing(0)
-            container_layout.addWidget(title_bar)
-            container_layout.addWidget(container)
-            
-            main_layout = QVBoxLayout()
-            main_layout.setContentsMargins(10, 10, 10, 10)
-            main_layout.addWidget(main_container)
-            self.setLayout(main_layout)
-            
-            title_bar.mousePressEvent = self.title_bar_mouse_press_event
-            title_bar.mouseMoveEvent = self.title_bar_mouse_move_event
-            title_bar.mouseReleaseEvent = self.title_bar_mouse_release_event
-            
-            self.ui_components = self.command_ui.ui_components
-            self.whisper_components = self.command_ui.whisper_components
-            self.status_bar = self.command_ui.status_bar
-            
-            self.connection_label = getattr(self.command_ui, 'connection_label', None)
-            self.connection_image = getattr(self.command_ui, 'connection_image', None)
-            self.ping_label = getattr(self.command_ui, 'ping_label', None)
-        except Exception as e:
-            print(f"Error recreating UI: {e}")
-            import traceback
-            traceback.print_exc()
-
     def title_bar_mouse_press_event(self, event):
         if event.button() == Qt.LeftButton:
             self.dragging = True
@@ -1020,6 +881,7 @@ class CommandHotkeys(QWidget):
             event.accept()
             
     def show(self):
+        self.ensure_ui()
         screen = QApplication.primaryScreen().geometry()
         size = self.geometry()
         self.move((screen.width() - size.width()) // 2, 
@@ -1028,98 +890,94 @@ class CommandHotkeys(QWidget):
         super().show()
 
     def update_connection_display(self):
-        try:
-            connection_info = getattr(logout, 'get_connection_info', lambda: None)()
-            if connection_info and "->" in connection_info:
-                if hasattr(self, 'connection_image') and self.connection_image:
-                    self.connection_image.setVisible(True)
-                if hasattr(self, 'connection_label') and self.connection_label:
-                    self.connection_label.setText("")
-            else:
-                if hasattr(self, 'connection_label') and self.connection_label:
-                    self.connection_label.setText("")
-                if hasattr(self, 'connection_image') and self.connection_image:
-                    self.connection_image.setVisible(False)
-        except Exception:
-            if hasattr(self, 'connection_label') and self.connection_label:
-                self.connection_label.setText("")
-            if hasattr(self, 'connection_image') and self.connection_image:
-                self.connection_image.setVisible(False)
+        indicator = getattr(self, 'logout_indicator', None)
+        if not indicator:
+            return
+        indicator.set_connected(bool(self.connections), ", ".join(sorted(self.connections)))
+        indicator.set_armed(self.logout_armed)
 
-    def update_ping(self):
-        """Update the ping display with current latency to Path of Exile servers"""
-        try:
-            if not hasattr(self, 'ping_label') or self.ping_label is None:
-                return
-            
-            servers = [
-                'login.pathofexile.com',
-                'www.pathofexile.com',
-                'pathofexile.com'
-            ]
-            
-            min_ping = float('inf')
-            for server in servers:
-                try:
-                    result = subprocess.run(['ping', '-n', '1', '-w', '1000', server], 
-                                         capture_output=True, text=True)
-                    
-                    if 'Average = ' in result.stdout:
-                        ping_str = result.stdout.split('Average = ')[-1].split('ms')[0].strip()
-                        ping = int(ping_str)
-                        min_ping = min(min_ping, ping)
-                except:
-                    continue
-            
-            if min_ping != float('inf'):
-                self.ping_label.setText(f"Ping: {min_ping} ms")
-                if min_ping < 100:
-                    self.ping_label.setStyleSheet("color: #00FF00;")
-                elif min_ping < 200:
-                    self.ping_label.setStyleSheet("color: #FFFF00;")
-                else:
-                    self.ping_label.setStyleSheet("color: #FF0000;")
-            else:
-                self.ping_label.setText("Ping: -- ms")
-                self.ping_label.setStyleSheet("color: #FF0000;")
-        except Exception as e:
-            print(f"Error updating ping: {e}")
-            try:
-                if hasattr(self, 'ping_label') and self.ping_label is not None:
-                    self.ping_label.setText("Ping: -- ms")
-                    self.ping_label.setStyleSheet("color: #FF0000;")
-            except:
-                pass
+    def on_connection_added(self, conn):
+        self.connections[conn.id] = conn
+        self.update_connection_display()
+
+    def on_connection_removed(self, conn):
+        self.connections.pop(conn.id, None)
+        self.update_connection_display()
+
+    def on_logout_armed(self, armed):
+        self.logout_armed = armed
+        self.update_connection_display()
+
+    def on_stall_detected(self, info):
+        """Warn about a stalled game connection; runs on the GUI thread via engine_signals"""
+        stalled_for = info['stalled_for']
+        retransmissions = info['stats'].get('retransmissions', 0)
+        if info['action'] == 'logout':
+            message = f"No server response for {stalled_for:.1f}s, logged out"
+        else:
+            message = f"No server response for {stalled_for:.1f}s ({retransmissions} retransmissions)"
+        print(f"Connection stall: {message}")
+        if hasattr(self, 'tray_icon'):
+            self.tray_icon.showMessage("XDDBot", message, QSystemTrayIcon.Warning, 3000)
+        if getattr(self, 'status_bar', None):
+            self.status_bar.showMessage(message, 5000)
+
+    def update_ping(self, stats):
+        """Show the latest RttProber summary; runs on the GUI thread via engine_signals"""
+        self.latency_stats = stats
+        indicator = getattr(self, 'logout_indicator', None)
+        if indicator:
+            indicator.set_latency(stats)
+
+def load_settings_for_startup():
+    try:
+        return read_settings_file()
+    except Exception as e:
+        print(f"Error loading settings: {e}")
+        return {}
+
+def on_update_checked(result):
+    """Runs on the GUI thread once the background check has staged an update"""
+    latest_version, staged_exe = result
+    if latest_version and staged_exe:
+        if update_checker.prompt_for_update(latest_version, None, staged=True) == 1:
+            QApplication.quit()
 
 def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)
+    
     if not check_single_instance():
         QMessageBox.warning(None, "Already Running", "XDDBot is already running.")
         return sys.exit(1)
+    if update_checker.check_update_health():
+        return sys.exit(0)
         
-    app = QApplication(sys.argv)
-    app.setQuitOnLastWindowClosed(False)
     app_font = QFont("Segoe UI", 9)
     app.setFont(app_font)
     
-    app.setStyleSheet("""
-        QWidget {
-            background-color: #1c1c1c;
-            color: #E0E0E0;
-        }
-        QMessageBox, QDialog {
-            background-color: #1c1c1c;
-            color: #E0E0E0;
-        }
-        QLineEdit {
-            font-weight: bold;
-        }
-    """)
-    
-    update_result = update_checker.check_for_update_at_startup()
-    if update_result == 1:
-        return sys.exit(0)
+    invoker = GuiInvoker(app)
+    boot = Bootstrap("main startup", profiler=profiler)
+    boot.add('settings_load', load_settings_for_startup, worker=True)
+    boot.add('theme', lambda: apply_theme(app))
+    boot.add('window', lambda: CommandHotkeys(boot.result('settings_load'), autostart=False),
+             after=('settings_load', 'theme'))
+    boot.add('logout_hotkey', lambda: boot.result('window').start_logout_script(), after=('window',))
+    boot.add('command_hotkeys', lambda: boot.result('window').register_all_commands(), after=('logout_hotkey',))
+    boot.add('update_check', update_checker.check_and_stage_update, after=('command_hotkeys',), detached=True,
+             on_done=lambda result: invoker.post(lambda: on_update_checked(result)))
+    if profiler.enabled:
+        boot.add('ui_build', lambda: boot.result('window').ensure_ui(), after=('command_hotkeys',))
+    boot.run()
     
-    window = CommandHotkeys()
+    window = boot.result('window')
+    if window is None:
+        boot.report()
+        profiler.write_report()
+        return sys.exit(1)
+    window.finish_startup()
+    boot.report()
+    profiler.write_report()
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
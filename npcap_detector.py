@@ -17,7 +17,8 @@ def check_npcap_registry():
 def check_npcap_service():
     """Check if Npcap service exists and is running"""
     try:
-        output = subprocess.check_output("sc query npf", shell=True)
+        output = subprocess.check_output(["sc", "query", "npf"], stderr=subprocess.DEVNULL,
+                                         creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
         return b"RUNNING" in output
     except:
         return False
@@ -31,7 +32,7 @@ def check_npcap_files():
     return all(os.path.exists(file) for file in npcap_files)
 
 def is_npcap_installed():
-    """Check if Npcap is installed using multiple methods"""
+    """Check if Npcap is installed using multiple methods, cheapest first"""
     return (check_npcap_registry() or 
-            check_npcap_service() or 
-            check_npcap_files()) 
\ No newline at end of file
+            check_npcap_files() or 
+            check_npcap_service()) 
\ No newline at end of file
@@ -14,8 +14,17 @@ a = Analysis(
         ('npcap_detector.py', '.'),
         ('update_checker.py', '.'),
         ('input_utils.py', '.'),
+        ('input_backends.py', '.'),
         ('ui_components.py', '.'),
         ('hotkey_manager.py', '.'),
+        ('window_tracker.py', '.'),
+        ('chat_scheduler.py', '.'),
+        ('background_scheduler.py', '.'),
+        ('process_watcher.py', '.'),
+        ('rtt_prober.py', '.'),
+        ('capture_stats.py', '.'),
+        ('bootstrap.py', '.'),
+        ('startup_profiler.py', '.'),
         ('main.py', '.'),
         ('Images/*.webp', 'Images'),
     ],
@@ -24,6 +33,9 @@ a = Analysis(
         'win32con',
         'win32process',
         'win32gui',
+        'win32clipboard',
+        'win32com.client',
+        'pythoncom',
         'psutil',
         'pynput',
         'pynput.keyboard',
@@ -44,6 +56,8 @@ a = Analysis(
         'requests',
         'packaging',
         'packaging.version',
+        'bsdiff4',
+        'zstandard',
         're',
         'json',
     ],
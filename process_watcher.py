@@ -0,0 +1,238 @@
+import ctypes
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+
+import psutil
+
+from background_scheduler import scheduler
+
+GAME_PROCESS_MARKER = "pathofexile"
+POLL_INTERVAL = 3.0
+POLL_INTERVAL_RUNNING = 10.0
+
+# Linux proc connector (linux/connector.h, linux/cn_proc.h)
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+NLMSG_DONE = 3
+PROC_CN_MCAST_LISTEN = 1
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+NLMSG_HEADER = struct.Struct("=IHHII")
+CN_MSG_HEADER = struct.Struct("=IIIIHH")
+PROC_EVENT_HEADER = struct.Struct("=IIQ")
+
+# Windows
+SYNCHRONIZE = 0x00100000
+INFINITE = 0xFFFFFFFF
+
+def is_game_process_name(name):
+    return bool(name) and GAME_PROCESS_MARKER in name.lower()
+
+class GameProcessWatcher:
+    """Reports game processes starting and exiting without scanning the process list
+
+    Starts are taken from the netlink proc connector on Linux and
+    Win32_ProcessStartTrace (WMI) on Windows; exits from a pidfd or a process
+    handle wait on the known PIDs. If no event source is available a slow
+    psutil poll on the background scheduler is used instead.
+    """
+
+    def __init__(self):
+        self.pids = set()
+        self.mode = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._started = False
+
+    def add_listener(self, callback):
+        """callback(event, pid) with event 'started' or 'exited'; runs on a watcher thread"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    @property
+    def game_running(self):
+        return bool(self.pids)
+
+    def get_pids(self):
+        with self._lock:
+            return set(self.pids)
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return self.mode
+            self._started = True
+        for proc in psutil.process_iter(['name', 'pid']):
+            try:
+                if is_game_process_name(proc.info['name']):
+                    self._game_started(proc.info['pid'])
+            except:
+                continue
+        scheduler.set_game_running(self.game_running)
+        if sys.platform == 'win32':
+            source = self._run_wmi
+        elif sys.platform.startswith('linux'):
+            source = self._run_proc_connector
+        else:
+            source = None
+        self.mode = 'poll'
+        if source:
+            ready = threading.Event()
+            result = {}
+            threading.Thread(target=source, args=(ready, result), daemon=True, name="GameProcessWatcher").start()
+            ready.wait(3)
+            if result.get('ok'):
+                self.mode = 'events'
+        if self.mode == 'poll':
+            scheduler.add_task('game_process_poll', self._poll, POLL_INTERVAL_RUNNING, idle_interval=POLL_INTERVAL)
+        return self.mode
+
+    def _fall_back_to_poll(self):
+        """The event source died after start(): poll from now on so game starts are still seen"""
+        self.mode = 'poll'
+        scheduler.add_task('game_process_poll', self._poll, POLL_INTERVAL_RUNNING, idle_interval=POLL_INTERVAL)
+
+    def _game_started(self, pid):
+        with self._lock:
+            if pid in self.pids:
+                return
+            self.pids.add(pid)
+        threading.Thread(target=self._wait_for_exit, args=(pid,), daemon=True, name=f"GameExitWait-{pid}").start()
+        scheduler.set_game_running(True)
+        self._notify('started', pid)
+
+    def _game_exited(self, pid):
+        with self._lock:
+            if pid not in self.pids:
+                return
+            self.pids.discard(pid)
+            running = bool(self.pids)
+        scheduler.set_game_running(running)
+        self._notify('exited', pid)
+
+    def _notify(self, event, pid):
+        for callback in list(self._listeners):
+            try:
+                callback(event, pid)
+            except Exception as e:
+                print(f"Error in process listener: {e}")
+
+    def _wait_for_exit(self, pid):
+        try:
+            if sys.platform == 'win32':
+                kernel32 = ctypes.windll.kernel32
+                handle = kernel32.OpenProcess(SYNCHRONIZE, False, pid)
+                if not handle:
+                    raise OSError("OpenProcess failed")
+                try:
+                    kernel32.WaitForSingleObject(handle, INFINITE)
+                finally:
+                    kernel32.CloseHandle(handle)
+            elif hasattr(os, 'pidfd_open'):
+                fd = os.pidfd_open(pid)
+                try:
+                    select.select([fd], [], [])
+                finally:
+                    os.close(fd)
+            else:
+                psutil.Process(pid).wait()
+        except psutil.NoSuchProcess:
+            pass
+        except Exception:
+            if psutil.pid_exists(pid):
+                # No way to wait on this PID: leave the exit to the poll task
+                if self.mode != 'poll':
+                    scheduler.add_task('game_process_poll', self._poll, POLL_INTERVAL_RUNNING,
+                                       idle_interval=POLL_INTERVAL, run_now=False)
+                return
+        self._game_exited(pid)
+
+    def _poll(self):
+        seen = set()
+        for proc in psutil.process_iter(['name', 'pid']):
+            try:
+                if is_game_process_name(proc.info['name']):
+                    seen.add(proc.info['pid'])
+            except:
+                continue
+        for pid in seen - self.get_pids():
+            self._game_started(pid)
+        for pid in self.get_pids() - seen:
+            self._game_exited(pid)
+
+    def _run_proc_connector(self, ready, result):
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+            sock.bind((os.getpid(), CN_IDX_PROC))
+            op = struct.pack("=I", PROC_CN_MCAST_LISTEN)
+            cn_msg = CN_MSG_HEADER.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(op), 0) + op
+            sock.send(NLMSG_HEADER.pack(NLMSG_HEADER.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid()) + cn_msg)
+        except Exception as e:
+            print(f"Process events unavailable, polling instead: {e}")
+            ready.set()
+            return
+        result['ok'] = True
+        ready.set()
+        event_offset = NLMSG_HEADER.size + CN_MSG_HEADER.size
+        while True:
+            try:
+                data = sock.recv(4096)
+            except OSError as e:
+                print(f"Process events stopped, polling instead: {e}")
+                self._fall_back_to_poll()
+                return
+            if len(data) < event_offset + PROC_EVENT_HEADER.size + 8:
+                continue
+            what = PROC_EVENT_HEADER.unpack_from(data, event_offset)[0]
+            pid, tgid = struct.unpack_from("=II", data, event_offset + PROC_EVENT_HEADER.size)
+            if what == PROC_EVENT_EXEC and pid == tgid:
+                try:
+                    with open(f"/proc/{tgid}/comm") as f:
+                        name = f.read().strip()
+                except OSError:
+                    continue
+                if is_game_process_name(name):
+                    self._game_started(tgid)
+            elif what == PROC_EVENT_EXIT and pid == tgid and tgid in self.pids:
+                self._game_exited(tgid)
+
+    def _run_wmi(self, ready, result):
+        try:
+            import pythoncom
+            import win32com.client
+            pythoncom.CoInitialize()
+            wmi = win32com.client.GetObject("winmgmts:\\\\.\\root\\cimv2")
+            events = wmi.ExecNotificationQuery(
+                "SELECT ProcessID, ProcessName FROM Win32_ProcessStartTrace "
+                f"WHERE ProcessName LIKE '%{GAME_PROCESS_MARKER}%'")
+        except Exception as e:
+            print(f"Process events unavailable, polling instead: {e}")
+            ready.set()
+            return
+        result['ok'] = True
+        ready.set()
+        while True:
+            try:
+                event = events.NextEvent(-1)
+                self._game_started(int(event.ProcessID))
+            except Exception as e:
+                print(f"Process events stopped, polling instead: {e}")
+                self._fall_back_to_poll()
+                return
+
+watcher = GameProcessWatcher()
+
+def start_watching():
+    """Start the shared watcher (safe to call more than once); returns 'events' or 'poll'"""
+    return watcher.start()
+
+def is_game_running():
+    return watcher.game_running
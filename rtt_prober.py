@@ -0,0 +1,180 @@
+import math
+import socket
+import threading
+import time
+from collections import deque
+
+from background_scheduler import scheduler, PAUSED
+
+PROBE_INTERVAL = 1.0
+PROBE_TIMEOUT = 1.0
+WINDOW_SIZE = 60
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an unsorted sequence"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+class RttWindow:
+    """Rolling RTT samples (ms) with RFC 3550 style smoothed jitter"""
+
+    def __init__(self, size=WINDOW_SIZE):
+        self.samples = deque(maxlen=size)
+        self.jitter = 0.0
+        self.attempts = 0
+        self.failures = 0
+        self._last = None
+
+    def add(self, rtt_ms):
+        self.attempts += 1
+        if self._last is not None:
+            self.jitter += (abs(rtt_ms - self._last) - self.jitter) / 16.0
+        self._last = rtt_ms
+        self.samples.append(rtt_ms)
+
+    def add_failure(self):
+        self.attempts += 1
+        self.failures += 1
+
+    def reset(self):
+        self.samples.clear()
+        self.jitter = 0.0
+        self.attempts = 0
+        self.failures = 0
+        self._last = None
+
+    def summary(self):
+        samples = list(self.samples)
+        if not samples:
+            return {'samples': 0, 'last': None, 'min': None, 'avg': None, 'p95': None,
+                    'jitter': None, 'loss': self.failures / self.attempts if self.attempts else 0.0}
+        return {
+            'samples': len(samples),
+            'last': samples[-1],
+            'min': min(samples),
+            'avg': sum(samples) / len(samples),
+            'p95': percentile(samples, 0.95),
+            'jitter': self.jitter,
+            'loss': self.failures / self.attempts if self.attempts else 0.0,
+        }
+
+class RttProber:
+    """Measures TCP connect time to the tracked game server on a worker thread
+
+    target_provider() returns (ip, port) for the current game server or None.
+    The background scheduler wakes the worker once per interval while the game
+    is running and the settings window, the only place the latency is shown, is
+    visible; listeners get the summary dict after every probe. When
+    passive_source() returns recent passive samples from the capture, those
+    are published instead and no connection is opened.
+    """
+
+    def __init__(self, target_provider, interval=PROBE_INTERVAL, timeout=PROBE_TIMEOUT, window=WINDOW_SIZE,
+                 passive_source=None):
+        self.target_provider = target_provider
+        self.passive_source = passive_source
+        self.interval = interval
+        self.timeout = timeout
+        self.window = RttWindow(window)
+        self.target = None
+        self._listeners = []
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback):
+        """callback(stats) runs on the prober thread after every probe"""
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="RttProber")
+        self._thread.start()
+        scheduler.add_task('rtt_probe', self._wake.set, self.interval, idle_interval=PAUSED, ui_only=True)
+
+    def stop(self):
+        self._running = False
+        scheduler.remove_task('rtt_probe')
+        self._wake.set()
+
+    def probe_once(self, ip, port):
+        """One TCP handshake to (ip, port); returns the RTT in ms or None"""
+        family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            start = time.perf_counter()
+            sock.connect((ip, port))
+            return (time.perf_counter() - start) * 1000
+        except OSError:
+            return None
+        finally:
+            sock.close()
+
+    def get_stats(self):
+        with self._lock:
+            stats = self.window.summary()
+        stats['target'] = self.target
+        return stats
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if not self._running:
+                return
+            stats = None
+            if self.passive_source:
+                try:
+                    stats = self.passive_source()
+                except Exception:
+                    stats = None
+            if stats:
+                self._publish(stats)
+                continue
+            try:
+                target = self.target_provider()
+            except Exception:
+                target = None
+            if not target:
+                continue
+            if target != self.target:
+                with self._lock:
+                    self.window.reset()
+                self.target = target
+            rtt = self.probe_once(*target)
+            with self._lock:
+                if rtt is None:
+                    self.window.add_failure()
+                else:
+                    self.window.add(rtt)
+            stats = self.get_stats()
+            stats['source'] = 'probe'
+            self._publish(stats)
+
+    def _publish(self, stats):
+        for callback in list(self._listeners):
+            try:
+                callback(stats)
+            except Exception as e:
+                print(f"Error in RTT listener: {e}")
+
+if __name__ == "__main__":
+    import sys
+    host = sys.argv[1] if len(sys.argv) > 1 else "pathofexile.com"
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 443
+    ip = socket.gethostbyname(host)
+    prober = RttProber(lambda: (ip, port))
+    for _ in range(10):
+        rtt = prober.probe_once(ip, port)
+        if rtt is None:
+            prober.window.add_failure()
+        else:
+            prober.window.add(rtt)
+    print(prober.window.summary())
@@ -0,0 +1,151 @@
+import ctypes
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+PROFILE_FLAG = "--profile-startup"
+REPORT_NAME = "startup_profile.json"
+PROFILED_IMPORTS = ("PyQt5.QtWidgets", "scapy.all", "psutil", "keyboard", "pynput", "requests")
+
+class _ProcessMemoryCounters(ctypes.Structure):
+    _fields_ = [
+        ("cb", ctypes.c_ulong),
+        ("PageFaultCount", ctypes.c_ulong),
+        ("PeakWorkingSetSize", ctypes.c_size_t),
+        ("WorkingSetSize", ctypes.c_size_t),
+        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+        ("PagefileUsage", ctypes.c_size_t),
+        ("PeakPagefileUsage", ctypes.c_size_t),
+    ]
+
+def current_rss():
+    """Resident set size of this process in bytes (None if unavailable); stdlib only so psutil's import can be profiled"""
+    try:
+        if sys.platform == 'win32':
+            counters = _ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        return None
+
+class StartupProfiler:
+    """Wall-clock time and resident-memory delta per startup phase
+
+    Disabled unless the process was started with --profile-startup, in which
+    case phase() still runs the body but records nothing. RSS is process-wide,
+    so phases that overlap on different threads share their deltas. The report
+    is rewritten whenever a phase finishes after write_report(), so a slow
+    detached phase (the update check) still ends up in it.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started_at = time.perf_counter()
+        self.started_wall = time.time()
+        self.rss_at_start = current_rss() if enabled else None
+        self.phases = []
+        self.report_path = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        entry = {
+            'name': name,
+            'thread': threading.current_thread().name,
+            'start_ms': (time.perf_counter() - self.started_at) * 1000,
+            'end_ms': None,
+            'duration_ms': None,
+            'rss_delta_bytes': None,
+            'state': 'running',
+        }
+        rss_before = current_rss()
+        with self._lock:
+            self.phases.append(entry)
+        try:
+            yield
+            entry['state'] = 'done'
+        except BaseException:
+            entry['state'] = 'failed'
+            raise
+        finally:
+            rss_after = current_rss()
+            entry['end_ms'] = (time.perf_counter() - self.started_at) * 1000
+            entry['duration_ms'] = entry['end_ms'] - entry['start_ms']
+            if rss_before is not None and rss_after is not None:
+                entry['rss_delta_bytes'] = rss_after - rss_before
+            if self.report_path:
+                self.write_report(self.report_path)
+
+    def profile_imports(self, modules=PROFILED_IMPORTS):
+        """Import the heavy dependencies one at a time so each gets its own phase"""
+        if not self.enabled:
+            return
+        for module in modules:
+            if module in sys.modules:
+                continue
+            try:
+                with self.phase(f"import {module.split('.')[0]}"):
+                    importlib.import_module(module)
+            except ImportError as e:
+                print(f"Profiled import of {module} failed: {e}")
+
+    def report(self):
+        with self._lock:
+            phases = sorted((dict(entry) for entry in self.phases), key=lambda entry: entry['start_ms'])
+        rss_now = current_rss()
+        return {
+            'started_at': self.started_wall,
+            'argv': sys.argv,
+            'platform': sys.platform,
+            'python': sys.version.split()[0],
+            'elapsed_ms': (time.perf_counter() - self.started_at) * 1000,
+            'rss_start_bytes': self.rss_at_start,
+            'rss_now_bytes': rss_now,
+            'phases': phases,
+        }
+
+    def write_report(self, path=None):
+        """Write the JSON report (default APP_DATA_DIR/startup_profile.json) and return its path"""
+        if not self.enabled:
+            return None
+        if path is None:
+            import update_checker
+            update_checker.ensure_app_data_dir()
+            path = os.path.join(update_checker.APP_DATA_DIR, REPORT_NAME)
+        data = self.report()
+        temp_path = path + ".tmp"
+        try:
+            with self._write_lock:
+                with open(temp_path, 'w') as f:
+                    json.dump(data, f, indent=2)
+                os.replace(temp_path, path)
+        except Exception as e:
+            print(f"Error writing startup profile: {e}")
+            return None
+        if self.report_path is None:
+            print(f"Startup profile written to {path}")
+            for entry in data['phases']:
+                delta = entry['rss_delta_bytes']
+                memory = "" if delta is None else f" {delta / 1048576:+7.1f} MB"
+                duration = f"{'running':>11}" if entry['duration_ms'] is None else f"{entry['duration_ms']:8.1f} ms"
+                print(f"  {entry['name']:<22} {duration}{memory}  [{entry['thread']}]")
+        self.report_path = path
+        return path
+
+profiler = StartupProfiler(enabled=PROFILE_FLAG in sys.argv)
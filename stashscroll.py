@@ -1,44 +1,155 @@
-from pynput import keyboard, mouse
-from pynput.keyboard import Key, Controller
 import time
 import threading
-import win32api, win32con
-keyboard_controller = Controller()
+import window_tracker
+from input_utils import get_backend
+
 VK_CONTROL = 0x11
+VK_LEFT = 0x25
+VK_RIGHT = 0x27
+MAX_PRESSES_PER_BATCH = 10
 mouse_listener = None
 is_running = False
-def send_right():
-    win32api.keybd_event(win32con.VK_RIGHT, 0, 0, 0)  
-    time.sleep(0.005)  
-    win32api.keybd_event(win32con.VK_RIGHT, 0, win32con.KEYEVENTF_KEYUP, 0)  
-def send_left():
-    win32api.keybd_event(win32con.VK_LEFT, 0, 0, 0)  
-    time.sleep(0.005)  
-    win32api.keybd_event(win32con.VK_LEFT, 0, win32con.KEYEVENTF_KEYUP, 0)  
+worker_thread = None
+pending_lock = threading.Lock()
+pending_event = threading.Event()
+pending_delta = 0.0
+stats = {'wheel_events': 0, 'presses_sent': 0, 'batches': 0, 'max_coalesced': 0}
+
 def on_scroll(x, y, dx, dy):
-    if win32api.GetAsyncKeyState(VK_CONTROL) & 0x8000:
-        if dy < 0:  
-            send_right()
-        elif dy > 0:  
-            send_left()
+    """Runs in the mouse hook thread: only record the delta and wake the worker"""
+    global pending_delta
+    if not window_tracker.is_game_focused():
+        return
+    if not get_backend().is_key_down(VK_CONTROL):
+        return
+    with pending_lock:
+        pending_delta += dy
+        stats['wheel_events'] += 1
+    pending_event.set()
+
+def flush_pending():
+    """Turn the accumulated wheel delta into one batch of at most MAX_PRESSES_PER_BATCH presses
+
+    Any remainder stays pending and the worker is woken again for it.
+    """
+    global pending_delta
+    with pending_lock:
+        steps = max(-MAX_PRESSES_PER_BATCH, min(MAX_PRESSES_PER_BATCH, int(pending_delta)))
+        pending_delta -= steps
+        if abs(pending_delta) >= 1:
+            pending_event.set()
+    if not steps or not window_tracker.is_game_focused():
+        return 0
+    key_code = VK_RIGHT if steps < 0 else VK_LEFT
+    presses = abs(steps)
+    get_backend().send_events([(key_code, False), (key_code, True)] * presses)
+    stats['presses_sent'] += presses
+    stats['batches'] += 1
+    stats['max_coalesced'] = max(stats['max_coalesced'], presses)
+    return presses
+
+def _worker():
+    while is_running:
+        pending_event.wait()
+        pending_event.clear()
+        if not is_running:
+            break
+        try:
+            flush_pending()
+        except Exception as e:
+            print(f"Error sending stash scroll: {e}")
+
 def start_listener():
-    global mouse_listener, is_running
+    global mouse_listener, is_running, worker_thread
     if is_running:
         return False
+    from pynput import mouse
+    window_tracker.start_tracking()
+    is_running = True
+    worker_thread = threading.Thread(target=_worker, daemon=True, name="StashScroll")
+    worker_thread.start()
     mouse_listener = mouse.Listener(on_scroll=on_scroll)
     mouse_listener.start()
-    is_running = True
     return True
 def stop_listener():
-    global mouse_listener, is_running
+    global mouse_listener, is_running, worker_thread
     if is_running and mouse_listener:
         mouse_listener.stop()
+        mouse_listener = None
         is_running = False
+        pending_event.set()
+        if worker_thread:
+            worker_thread.join(1)
+            worker_thread = None
         return True
     return False
 def is_active():
     return is_running
+
+def benchmark_throughput(duration=1.0, rate=None):
+    """Feed synthetic ctrl+wheel events through the worker into a RecordingBackend
+
+    rate=None pushes events as fast as the caller can; otherwise events are paced
+    at rate per second. Returns the measured event rate and whether any were lost.
+    """
+    global is_running, worker_thread, pending_delta
+    from input_backends import RecordingBackend
+    from input_utils import set_backend
+    recorder = RecordingBackend()
+    previous_backend = set_backend(recorder)
+    tracker = window_tracker.tracker
+    saved_focus = (tracker.push_active, tracker.game_focused)
+    tracker.push_active, tracker.game_focused = True, True
+    recorder.pressed.add(VK_CONTROL)
+    for key in stats:
+        stats[key] = 0
+    pending_delta = 0.0
+    is_running = True
+    worker_thread = threading.Thread(target=_worker, daemon=True, name="StashScroll")
+    worker_thread.start()
+    try:
+        sent = 0
+        start = time.perf_counter()
+        interval = 1.0 / rate if rate else 0
+        while time.perf_counter() - start < duration:
+            on_scroll(0, 0, 0, -1)
+            sent += 1
+            if interval:
+                next_time = start + sent * interval
+                while time.perf_counter() < next_time:
+                    pass
+        elapsed = time.perf_counter() - start
+        time.sleep(0.05)
+        pending_event.set()
+        time.sleep(0.05)
+        net_presses = sum(1 for event in recorder.events if not event.up)
+        expected = sent
+        return {
+            'events_per_second': sent / elapsed,
+            'wheel_events': stats['wheel_events'],
+            'presses_sent': net_presses,
+            'expected_presses': expected,
+            'batches': stats['batches'],
+            'max_coalesced': stats['max_coalesced'],
+            'lost': stats['wheel_events'] != sent or net_presses != expected,
+        }
+    finally:
+        is_running = False
+        pending_event.set()
+        worker_thread.join(1)
+        set_backend(previous_backend)
+        tracker.push_active, tracker.game_focused = saved_focus
+
 if __name__ == "__main__":
+    import sys
+    if "--benchmark" in sys.argv:
+        for rate in (100, 1000, 10000, None):
+            result = benchmark_throughput(rate=rate)
+            label = f"{rate} ev/s target" if rate else "unthrottled"
+            print(f"{label:>18}: {result['events_per_second']:.0f} ev/s handled, "
+                  f"{result['batches']} batches, max {result['max_coalesced']} presses/batch, "
+                  f"lost={result['lost']}")
+        sys.exit(0)
     start_listener()
     print("Script running. Hold Ctrl and scroll to move left/right.")
     print("Press Ctrl+C to exit.")
@@ -47,4 +158,4 @@ if __name__ == "__main__":
             time.sleep(0.1)
     except KeyboardInterrupt:
         stop_listener()
-        print("Script terminated.")
\ No newline at end of file
+        print("Script terminated.")
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import update_checker
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body):
+        server = self.server
+        entry = {'method': self.command, 'path': self.path, 'range': self.headers.get('Range'),
+                 'if_none_match': self.headers.get('If-None-Match'), 'status': None}
+        with server.lock:
+            server.requests.append(entry)
+        data = server.files.get(self.path)
+        if data is None:
+            entry['status'] = 404
+            self.send_error(404)
+            return
+        etag = '"%s"' % hashlib.sha256(data).hexdigest()[:16]
+        if self.headers.get('If-None-Match') == etag:
+            entry['status'] = 304
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        start, end, status = 0, len(data) - 1, 200
+        requested = self.headers.get('Range') or ''
+        if requested.startswith('bytes=') and self.headers.get('If-Range') in (None, etag):
+            first, _, last = requested[len('bytes='):].partition('-')
+            start, end, status = int(first), min(int(last), len(data) - 1) if last else len(data) - 1, 206
+        entry['status'] = status
+        self.send_response(status)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('ETag', etag)
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+        if not send_body:
+            return
+
+        offset = start
+        while offset <= end:
+            block = data[offset:min(offset + 64 * 1024, end + 1)]
+            with server.lock:
+                cut = server.cut_after is not None and server.bytes_sent + len(block) > server.cut_after
+                if cut:
+                    server.cut_after = None
+                else:
+                    server.bytes_sent += len(block)
+            if cut:
+                self.close_connection = True
+                return
+            try:
+                self.wfile.write(block)
+            except OSError:
+                return
+            offset += len(block)
+            if server.rate:
+                time.sleep(len(block) / server.rate)
+
+
+class StubServer(ThreadingHTTPServer):
+    """Local HTTP server serving {path: bytes} on 127.0.0.1
+
+    Answers HEAD and GET with an ETag, honours If-None-Match with a 304 and
+    Range/If-Range with a 206. requests logs every request, bytes_sent counts
+    body bytes, rate throttles each response to that many bytes/s and cut_after
+    drops the connection once that many body bytes have been sent in total.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _StubHandler)
+        self.files = {}
+        self.requests = []
+        self.bytes_sent = 0
+        self.rate = None
+        self.cut_after = None
+        self.lock = threading.Lock()
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+
+    def gets(self, since=0):
+        with self.lock:
+            return [entry for entry in self.requests[since:] if entry['method'] == 'GET']
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05},
+                              daemon=True, name="UpdateStubServer")
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def updater(tmp_path, monkeypatch):
+    """update_checker with APP_DATA_DIR and version_state in a temporary directory"""
+    app_data = tmp_path / "appdata"
+    app_data.mkdir()
+    monkeypatch.setattr(update_checker, "APP_DATA_DIR", str(app_data))
+    monkeypatch.setattr(update_checker, "version_state",
+                        update_checker.VersionState(str(app_data / "version.json")))
+    return update_checker
+
+
+@pytest.fixture
+def frozen_exe(tmp_path, monkeypatch):
+    """A fake installed executable, with sys looking like a frozen build running it"""
+    install_dir = tmp_path / "install"
+    install_dir.mkdir()
+    exe = install_dir / "xddbot.exe"
+    exe.write_bytes(b'MZ old build')
+    monkeypatch.setattr(sys, "frozen", True, raising=False)
+    monkeypatch.setattr(sys, "executable", str(exe))
+    return exe
@@ -0,0 +1,286 @@
+import hashlib
+import io
+import json
+import os
+import time
+import zipfile
+
+import pytest
+
+
+RELEASE = {'tag_name': 'v2.0.0', 'assets': []}
+
+
+@pytest.fixture
+def releases_url(updater, stub_server, monkeypatch):
+    stub_server.files['/releases/latest'] = json.dumps(RELEASE).encode()
+    url = stub_server.url + '/releases/latest'
+    monkeypatch.setattr(updater, "RELEASES_URL", url)
+    return url
+
+
+def test_first_check_fetches_release_and_stores_etag(updater, stub_server, releases_url):
+    assert updater.get_latest_release() == RELEASE
+    assert len(stub_server.requests) == 1
+    assert updater.version_state.release_etag is not None
+
+
+def test_check_within_recheck_interval_uses_cache(updater, stub_server, releases_url):
+    updater.get_latest_release()
+    assert updater.get_latest_release() == RELEASE
+    assert len(stub_server.requests) == 1
+
+
+def test_forced_check_sends_etag_and_keeps_cache_on_304(updater, stub_server, releases_url):
+    updater.get_latest_release()
+    checked_at = updater.version_state.last_check
+    time.sleep(0.01)
+
+    assert updater.get_latest_release(force=True) == RELEASE
+    last = stub_server.requests[-1]
+    assert last['if_none_match'] == updater.version_state.release_etag
+    assert last['status'] == 304
+    assert updater.version_state.last_check > checked_at
+
+
+def test_release_and_etag_persist(updater, releases_url):
+    updater.get_latest_release()
+    reloaded = updater.VersionState(updater.version_state.path)
+    assert reloaded.release == RELEASE
+    assert reloaded.release_etag == updater.version_state.release_etag
+
+
+def test_changed_release_replaces_cache(updater, stub_server, releases_url):
+    updater.get_latest_release()
+    newer = {'tag_name': 'v2.0.1', 'assets': []}
+    stub_server.files['/releases/latest'] = json.dumps(newer).encode()
+
+    assert updater.get_latest_release(force=True) == newer
+    assert stub_server.requests[-1]['status'] == 200
+
+
+def test_http_error_returns_none(updater, stub_server, releases_url):
+    assert updater.get_latest_release(force=True, url=stub_server.url + '/missing') is None
+
+
+@pytest.fixture
+def zip_release(updater, stub_server, releases_url):
+    """A v2.0.0 release whose zip holds a new executable, published with its digest"""
+    new_exe = b'MZ new build ' + os.urandom(64 * 1024)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+        zip_ref.writestr('xddbot/xddbot.exe', new_exe)
+        zip_ref.writestr('xddbot/README.txt', b'not part of the update')
+    archive = buffer.getvalue()
+    stub_server.files['/xddbot.zip'] = archive
+    release = {'tag_name': 'v2.0.0', 'assets': [{
+        'name': 'xddbot.zip', 'browser_download_url': stub_server.url + '/xddbot.zip',
+        'digest': 'sha256:' + hashlib.sha256(archive).hexdigest()}]}
+    stub_server.files['/releases/latest'] = json.dumps(release).encode()
+    updater.version_state.set_current_version('1.0.0')
+    return new_exe
+
+
+def test_check_and_stage_update_stages_executable_from_zip(updater, frozen_exe, zip_release):
+    latest_version, staged = updater.check_and_stage_update()
+
+    assert latest_version == '2.0.0'
+    with open(staged, 'rb') as f:
+        assert f.read() == zip_release
+    assert os.listdir(updater.update_slot_dir("staged")) == ['xddbot.exe']
+    assert list(updater.version_state.update_state()['staged']['files']) == ['xddbot.exe']
+    assert frozen_exe.read_bytes() == b'MZ old build'
+
+
+def test_staged_version_is_not_downloaded_again(updater, stub_server, frozen_exe, zip_release):
+    staged = updater.check_and_stage_update()
+    request_count = len(stub_server.requests)
+
+    assert updater.check_and_stage_update() == staged
+    assert len(stub_server.requests) == request_count
+
+
+def test_nothing_staged_when_up_to_date(updater, frozen_exe, zip_release):
+    updater.version_state.set_current_version('2.0.0')
+    assert updater.check_and_stage_update(force=True) == (None, None)
+
+
+def test_zip_without_published_checksum_is_not_staged(updater, stub_server, frozen_exe, zip_release):
+    release = json.loads(stub_server.files['/releases/latest'])
+    del release['assets'][0]['digest']
+    stub_server.files['/releases/latest'] = json.dumps(release).encode()
+
+    assert updater.check_and_stage_update() == (None, None)
+    assert not os.listdir(updater.update_slot_dir("staged"))
+    assert 'staged' not in updater.version_state.update_state()
+    assert not any(entry['path'] == '/xddbot.zip' for entry in stub_server.requests)
+
+
+def test_download_without_checksum_is_refused(updater, stub_server, tmp_path):
+    stub_server.files['/asset.bin'] = b'unverified'
+    dest = tmp_path / 'asset.bin'
+
+    assert not updater.download_file(stub_server.url + '/asset.bin', str(dest))
+    assert not dest.exists()
+    assert stub_server.requests == []
+
+
+SMALL = os.urandom(256 * 1024)
+LARGE = os.urandom(4 * 1024 * 1024)
+
+
+@pytest.fixture
+def assets(updater, stub_server, monkeypatch):
+    stub_server.files['/small.bin'] = SMALL
+    stub_server.files['/large.bin'] = LARGE
+    monkeypatch.setattr(updater, "PARALLEL_DOWNLOAD_THRESHOLD", 1024 * 1024)
+
+
+def fetch(updater, stub_server, dest_dir, name, data):
+    dest = os.path.join(dest_dir, name)
+    ok = updater.download_file(stub_server.url + '/' + name, dest, None, hashlib.sha256(data).hexdigest())
+    if not ok:
+        return False
+    with open(dest, 'rb') as f:
+        return f.read() == data
+
+
+def test_small_asset_comes_over_one_connection(updater, stub_server, assets, tmp_path):
+    assert fetch(updater, stub_server, tmp_path, 'small.bin', SMALL)
+    gets = stub_server.gets()
+    assert len(gets) == 1 and not gets[0]['range']
+
+
+def test_large_asset_comes_as_parallel_ranges(updater, stub_server, assets, tmp_path):
+    assert fetch(updater, stub_server, tmp_path, 'large.bin', LARGE)
+    gets = stub_server.gets()
+    assert len(gets) == updater.DOWNLOAD_SEGMENTS
+    assert all(entry['status'] == 206 for entry in gets)
+
+
+def test_checksum_mismatch_discards_partial_file(updater, stub_server, assets, tmp_path):
+    dest = tmp_path / 'small.bin'
+    assert not updater.download_file(stub_server.url + '/small.bin', str(dest), None, '0' * 64)
+    assert not dest.exists()
+    assert not (tmp_path / 'small.bin.part').exists()
+    assert not (tmp_path / 'small.bin.part.json').exists()
+
+
+@pytest.mark.parametrize('name, threshold', [('small.bin', len(SMALL) + 1), ('large.bin', 1024 * 1024)])
+def test_interrupted_download_resumes_from_part(updater, stub_server, assets, tmp_path, monkeypatch,
+                                                name, threshold):
+    data = stub_server.files['/' + name]
+    monkeypatch.setattr(updater, "PARALLEL_DOWNLOAD_THRESHOLD", threshold)
+    monkeypatch.setattr(updater, "DOWNLOAD_BUFFER_SIZE", 16 * 1024)
+    stub_server.cut_after = len(data) // 2
+    assert not fetch(updater, stub_server, tmp_path, name, data)
+    assert (tmp_path / (name + '.part')).exists()
+    assert (tmp_path / (name + '.part.json')).exists()
+
+    request_count, sent = len(stub_server.requests), stub_server.bytes_sent
+    assert fetch(updater, stub_server, tmp_path, name, data)
+    assert all(entry['range'] for entry in stub_server.gets(request_count))
+    assert stub_server.bytes_sent - sent < len(data)
+
+
+def test_parallel_beats_single_connection_under_per_connection_limit(updater, stub_server, assets,
+                                                                     tmp_path, monkeypatch):
+    stub_server.rate = 8 * 1024 * 1024
+    timings = {}
+    for mode, threshold in (('single', len(LARGE) + 1), ('parallel', len(LARGE))):
+        monkeypatch.setattr(updater, "PARALLEL_DOWNLOAD_THRESHOLD", threshold)
+        start = time.perf_counter()
+        assert fetch(updater, stub_server, tmp_path, 'large.bin', LARGE)
+        timings[mode] = time.perf_counter() - start
+        os.remove(tmp_path / 'large.bin')
+    assert timings['parallel'] < timings['single']
+
+
+OLD_EXE = os.urandom(512 * 1024)
+NEW_EXE = OLD_EXE[:100 * 1024] + os.urandom(2 * 1024) + OLD_EXE[100 * 1024:] + b'v2.0.0'
+
+
+def make_delta(patch_format):
+    if patch_format == 'bsdiff4':
+        bsdiff4 = pytest.importorskip('bsdiff4')
+        return bsdiff4.diff(OLD_EXE, NEW_EXE)
+    zstandard = pytest.importorskip('zstandard')
+    dictionary = zstandard.ZstdCompressionDict(OLD_EXE, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+    return zstandard.ZstdCompressor(level=19, dict_data=dictionary).compress(NEW_EXE)
+
+
+@pytest.fixture
+def delta_install(updater, tmp_path):
+    current_exe = tmp_path / 'xddbot.exe'
+    current_exe.write_bytes(OLD_EXE)
+    staging_dir = tmp_path / 'staged'
+    staging_dir.mkdir()
+    return str(current_exe), str(staging_dir)
+
+
+def publish_delta(stub_server, patch_format, patch, **manifest_changes):
+    """Serve an update_manifest.json and its patch; returns the release listing both"""
+    manifest = {'version': '2.0.0', 'sha256': hashlib.sha256(NEW_EXE).hexdigest(), 'deltas': [{
+        'from': '1.0.0', 'from_sha256': hashlib.sha256(OLD_EXE).hexdigest(), 'format': patch_format,
+        'asset': 'xddbot.delta', 'sha256': hashlib.sha256(patch).hexdigest()}]}
+    manifest.update(manifest_changes)
+    stub_server.files['/update_manifest.json'] = json.dumps(manifest).encode()
+    stub_server.files['/xddbot.delta'] = patch
+    return {'tag_name': 'v2.0.0', 'assets': [
+        {'name': 'update_manifest.json', 'browser_download_url': stub_server.url + '/update_manifest.json'},
+        {'name': 'xddbot.delta', 'browser_download_url': stub_server.url + '/xddbot.delta', 'size': len(patch)}]}
+
+
+@pytest.mark.parametrize('patch_format', ['bsdiff4', 'zstd'])
+def test_delta_rebuilds_executable_from_patch_only(updater, stub_server, delta_install, patch_format):
+    patch = make_delta(patch_format)
+    release = publish_delta(stub_server, patch_format, patch)
+    current_exe, staging_dir = delta_install
+
+    staged = updater.stage_delta_update('2.0.0', current_exe, staging_dir, release=release)
+
+    with open(staged, 'rb') as f:
+        assert f.read() == NEW_EXE
+    assert stub_server.bytes_sent < len(NEW_EXE) // 4
+    assert updater.apply_delta(OLD_EXE, patch, patch_format) == NEW_EXE
+
+
+def test_rebuilt_file_with_wrong_hash_is_not_staged(updater, stub_server, delta_install):
+    release = publish_delta(stub_server, 'bsdiff4', make_delta('bsdiff4'), sha256='0' * 64)
+    current_exe, staging_dir = delta_install
+
+    assert updater.stage_delta_update('2.0.0', current_exe, staging_dir, release=release) is None
+    assert not os.listdir(staging_dir)
+
+
+def test_manifest_for_another_version_is_ignored(updater, stub_server, delta_install):
+    release = publish_delta(stub_server, 'bsdiff4', make_delta('bsdiff4'))
+    current_exe, staging_dir = delta_install
+
+    assert updater.stage_delta_update('2.0.1', current_exe, staging_dir, release=release) is None
+
+
+def test_modified_installed_executable_falls_back(updater, stub_server, delta_install):
+    release = publish_delta(stub_server, 'bsdiff4', make_delta('bsdiff4'))
+    current_exe, staging_dir = delta_install
+    with open(current_exe, 'r+b') as f:
+        f.write(b'XX')
+
+    assert updater.stage_delta_update('2.0.0', current_exe, staging_dir, release=release) is None
+    assert not any(entry['path'] == '/xddbot.delta' for entry in stub_server.requests)
+
+
+def test_delta_without_published_checksum_is_skipped(updater, stub_server, delta_install):
+    patch = make_delta('bsdiff4')
+    release = publish_delta(stub_server, 'bsdiff4', patch)
+    manifest = json.loads(stub_server.files['/update_manifest.json'])
+    del manifest['deltas'][0]['sha256']
+    stub_server.files['/update_manifest.json'] = json.dumps(manifest).encode()
+    current_exe, staging_dir = delta_install
+
+    assert updater.stage_delta_update('2.0.0', current_exe, staging_dir, release=release) is None
+
+
+def test_unknown_delta_format_raises(updater):
+    with pytest.raises(ValueError):
+        updater.apply_delta(OLD_EXE, b'', 'xdelta')
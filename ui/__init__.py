@@ -1,13 +1,7 @@
-from PyQt5.QtWidgets import QApplication
-
-_qapp = None
-if QApplication.instance() is None and not hasattr(QApplication, '_in_test'):
-    import sys
-    _qapp = QApplication([sys.argv[0]])
-    _qapp.setQuitOnLastWindowClosed(False)
-
 from ui.key_capture import KeyCaptureWidget
 from ui.command_row import CommandRowCreator
 from ui.command_ui import CommandUI
+from ui.signals import GuiInvoker, EngineSignals
+from ui.theme import apply_theme
 
-__all__ = ['KeyCaptureWidget', 'CommandUI', 'CommandRowCreator'] 
\ No newline at end of file
+__all__ = ['KeyCaptureWidget', 'CommandUI', 'CommandRowCreator', 'GuiInvoker', 'EngineSignals', 'apply_theme'] 
\ No newline at end of file
@@ -0,0 +1,136 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+def command_sort_key(cmd_id):
+    """commandN / whisperN sort by N, anything else first"""
+    digits = ''.join(ch for ch in cmd_id if ch.isdigit())
+    return int(digits) if digits else 0
+
+class CommandListModel(QObject):
+    """Ordered command or whisper entries; views update row by row from its signals"""
+    row_inserted = pyqtSignal(int, str, object)
+    row_removed = pyqtSignal(int, str)
+    row_changed = pyqtSignal(int, str, object)
+
+    def __init__(self, entries=None, exclude=(), parent=None):
+        super().__init__(parent)
+        self.exclude = set(exclude)
+        self.ids = []
+        self.entries = {}
+        if entries:
+            for cmd_id in sorted(entries, key=command_sort_key):
+                if cmd_id not in self.exclude:
+                    self.ids.append(cmd_id)
+                    self.entries[cmd_id] = entries[cmd_id]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, cmd_id):
+        return cmd_id in self.entries
+
+    def index_of(self, cmd_id):
+        return self.ids.index(cmd_id)
+
+    def insert(self, cmd_id, data):
+        if cmd_id in self.exclude:
+            return -1
+        if cmd_id in self.entries:
+            return self.update(cmd_id, data)
+        key = command_sort_key(cmd_id)
+        row = len(self.ids)
+        for i, existing in enumerate(self.ids):
+            if command_sort_key(existing) > key:
+                row = i
+                break
+        self.ids.insert(row, cmd_id)
+        self.entries[cmd_id] = data
+        self.row_inserted.emit(row, cmd_id, data)
+        return row
+
+    def remove(self, cmd_id):
+        if cmd_id not in self.entries:
+            return -1
+        row = self.ids.index(cmd_id)
+        del self.ids[row]
+        del self.entries[cmd_id]
+        self.row_removed.emit(row, cmd_id)
+        return row
+
+    def update(self, cmd_id, data):
+        row = self.ids.index(cmd_id)
+        self.entries[cmd_id] = data
+        self.row_changed.emit(row, cmd_id, data)
+        return row
+
+    def set_entries(self, entries):
+        """Move to a new set of entries: missing rows are removed, new rows inserted, the rest refreshed in place"""
+        for cmd_id in [cmd_id for cmd_id in self.ids if cmd_id not in entries]:
+            self.remove(cmd_id)
+        for cmd_id in sorted(entries, key=command_sort_key):
+            if cmd_id in self.exclude:
+                continue
+            if cmd_id not in self.entries:
+                self.insert(cmd_id, entries[cmd_id])
+            else:
+                self.update(cmd_id, entries[cmd_id])
+
+def benchmark_row_changes(count=15, repeats=20):
+    """Time adding and removing one command row: full CommandUI rebuild vs the model
+
+    Returns {'rebuild_ms': ..., 'incremental_ms': ...} averaged per add+remove.
+    """
+    import time
+    from PyQt5.QtCore import QEvent
+    from PyQt5.QtWidgets import QApplication, QWidget
+    from ui.command_ui import CommandUI
+    app = QApplication.instance() or QApplication([])
+
+    def make_entries(prefix):
+        return {f'{prefix}{i}': {'label': '', 'text': f'{prefix} text {i}', 'hotkey': f'f{i % 12 + 1}',
+                                 'is_editable': True} for i in range(1, count + 1)}
+
+    settings = make_entries('command')
+    settings['logout'] = {'label': 'Logout:', 'text': 'logout', 'hotkey': 'f9', 'is_editable': True}
+    whispers = make_entries('whisper')
+    noop = lambda *args: None
+
+    def settle():
+        app.processEvents()
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    def build(host):
+        command_ui = CommandUI(host)
+        container = command_ui.build_ui(settings, whispers, noop, noop, noop, noop, noop, noop, noop, noop, noop)
+        return command_ui, container
+
+    host = QWidget()
+    host.show()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for _ in range(2):
+            _, container = build(host)
+            container.show()
+            settle()
+            container.deleteLater()
+            settle()
+    rebuild_ms = (time.perf_counter() - start) * 1000 / repeats
+
+    command_ui, container = build(host)
+    container.show()
+    settle()
+    new_id = f'command{count + 1}'
+    start = time.perf_counter()
+    for _ in range(repeats):
+        command_ui.command_model.insert(new_id, {'label': '', 'text': '', 'hotkey': '', 'is_editable': True})
+        settle()
+        command_ui.command_model.remove(new_id)
+        settle()
+    incremental_ms = (time.perf_counter() - start) * 1000 / repeats
+    return {'rebuild_ms': rebuild_ms, 'incremental_ms': incremental_ms}
+
+if __name__ == "__main__":
+    import os
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    result = benchmark_row_changes()
+    print(f"add+remove one row with 15 commands and 15 whispers: "
+          f"full rebuild {result['rebuild_ms']:.1f} ms, incremental {result['incremental_ms']:.1f} ms")
@@ -20,60 +20,18 @@ class CommandRowCreator:
         font.setBold(True)
         text_input.setFont(font)
         
-        text_input.setStyleSheet("""
-            QLineEdit {
-                border: 1px solid #555555;
-                background-color: #202020;
-                border-radius: 3px;
-                padding: 3px 5px;
-            }
-            QLineEdit:focus {
-                border: 1px solid #b08d57;
-                background-color: #252525;
-            }
-        """)
+        text_input.setObjectName("commandText")
         row_layout.addWidget(text_input, 3)
         components['text'] = text_input
             
         hotkey_widget = KeyCaptureWidget(cmd_settings['hotkey'])
         hotkey_widget.setFixedWidth(120)
-        hotkey_widget.setStyleSheet("""
-            KeyCaptureWidget {
-                border: 1px solid #555555;
-                background-color: #202020;
-                border-radius: 3px;
-                padding: 3px 5px;
-            }
-            KeyCaptureWidget:focus {
-                border: 1px solid #b08d57;
-                background-color: #252525;
-            }
-        """)
+        hotkey_widget.setObjectName("hotkeyCapture")
         
         clear_button = QPushButton("×")
         clear_button.setObjectName("clearButton")
         clear_button.setFixedWidth(22)
         clear_button.setFixedHeight(22)
-        clear_button.setStyleSheet("""
-            QPushButton#clearButton {
-                background-color: #303030;
-                color: #E07777;
-                font-weight: bold;
-                font-size: 14px;
-                border: 1px solid #555555;
-                border-radius: 11px;
-                padding: 0px;
-            }
-            QPushButton#clearButton:hover {
-                background-color: #404040;
-                color: #FF5555;
-                border-color: #AA4444;
-            }
-            QPushButton#clearButton:pressed {
-                background-color: #252525;
-                color: #FF3333;
-            }
-        """)
         clear_button.clicked.connect(lambda checked=False, cid=cmd_id: clear_callback(cid))
         
         hotkey_layout = QHBoxLayout()
@@ -108,58 +66,16 @@ class CommandRowCreator:
         font.setBold(True)
         text_input.setFont(font)
         
-        text_input.setStyleSheet("""
-            QLineEdit {
-                border: 1px solid #555555;
-                background-color: #202020;
-                border-radius: 3px;
-                padding: 3px 5px;
-            }
-            QLineEdit:focus {
-                border: 1px solid #b08d57;
-                background-color: #252525;
-            }
-        """)
+        text_input.setObjectName("commandText")
             
         hotkey_widget = KeyCaptureWidget(cmd_settings['hotkey'])
         hotkey_widget.setFixedWidth(120)
-        hotkey_widget.setStyleSheet("""
-            KeyCaptureWidget {
-                border: 1px solid #555555;
-                background-color: #202020;
-                border-radius: 3px;
-                padding: 3px 5px;
-            }
-            KeyCaptureWidget:focus {
-                border: 1px solid #b08d57;
-                background-color: #252525;
-            }
-        """)
+        hotkey_widget.setObjectName("hotkeyCapture")
         
         clear_button = QPushButton("×")
         clear_button.setObjectName("clearButton")
         clear_button.setFixedWidth(22)
         clear_button.setFixedHeight(22)
-        clear_button.setStyleSheet("""
-            QPushButton#clearButton {
-                background-color: #303030;
-                color: #E07777;
-                font-weight: bold;
-                font-size: 14px;
-                border: 1px solid #555555;
-                border-radius: 11px;
-                padding: 0px;
-            }
-            QPushButton#clearButton:hover {
-                background-color: #404040;
-                color: #FF5555;
-                border-color: #AA4444;
-            }
-            QPushButton#clearButton:pressed {
-                background-color: #252525;
-                color: #FF3333;
-            }
-        """)
         clear_button.clicked.connect(lambda checked=False, cid=cmd_id: clear_callback(cid))
         
         row_layout.addWidget(text_input, 3)
@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import QWidget
 from ui.layout import TabLayout
-from ui.builder import UIBuilder
+from ui.theme import apply_theme
 
 class CommandUI:
     def __init__(self, parent):
@@ -8,13 +8,20 @@ class CommandUI:
         self.status_bar = None
         self.ui_components = {}
         self.whisper_components = {}
+        self.logout_indicator = None
+        self.ping_label = None
+        self.connection_image = None
+        self.tab_layout = None
+        self.command_model = None
+        self.whisper_model = None
         
     def build_ui(self, settings, whisper_settings, clear_callback, clear_whisper_callback, add_command_callback, add_whisper_callback, delete_command_callback, delete_whisper_callback, discard_callback, apply_callback, hide_callback):
+        apply_theme()
         container = QWidget(self.parent)
-        
-        container.setStyleSheet(UIBuilder.setup_default_stylesheet())
+        container.setObjectName("commandContent")
         
         layout = TabLayout()
+        self.tab_layout = layout
         ui_components, whisper_components, status_bar = layout.build_ui(
             container, 
             settings, 
@@ -35,5 +42,10 @@ class CommandUI:
         self.ui_components = ui_components
         self.whisper_components = whisper_components
         self.status_bar = status_bar
+        self.logout_indicator = layout.logout_indicator
+        self.command_model = layout.command_model
+        self.whisper_model = layout.whisper_model
+        self.ping_label = self.logout_indicator.ping_label
+        self.connection_image = self.logout_indicator.connection_image
         
         return container 
\ No newline at end of file
@@ -1,6 +1,7 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame, QGraphicsDropShadowEffect
 from PyQt5.QtCore import Qt, QPoint
 from PyQt5.QtGui import QColor
+from ui.theme import set_style_state
 
 class CustomTitleBar(QWidget):
     def __init__(self, parent=None, title="", minimize_callback=None, close_callback=None):
@@ -11,28 +12,6 @@ class CustomTitleBar(QWidget):
         self.oldPos = None
         self.close_callback = close_callback or (lambda: None)
         
-        self.setStyleSheet("""
-            #titleBar {
-                background-color: #1c1c1c;
-                border-top-left-radius: 5px;
-                border-top-right-radius: 5px;
-            }
-            #titleLabel {
-                color: #b08d57;
-                font-weight: bold;
-            }
-            #closeButton {
-                background-color: transparent;
-                color: #AAAAAA;
-                font-weight: bold;
-                border: none;
-            }
-            #closeButton:hover {
-                background-color: #FF3030;
-                color: #FFFFFF;
-            }
-        """)
-        
         self.setMouseTracking(True)
         
         layout = QHBoxLayout(self)
@@ -68,26 +47,12 @@ class CollapsibleSection(QWidget):
     def __init__(self, title, parent=None):
         super(CollapsibleSection, self).__init__(parent)
         
-        self.button_stylesheet = """
-            QPushButton {
-                text-align: left;
-                padding: 8px;
-                border: none;
-                background-color: #121212;
-                color: white;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #1a1a1a;
-            }
-        """
-        
         self.main_layout = QVBoxLayout(self)
         self.main_layout.setContentsMargins(0, 0, 0, 0)
         self.main_layout.setSpacing(0)
         
         self.toggle_button = QPushButton(title)
-        self.toggle_button.setStyleSheet(self.button_stylesheet)
+        self.toggle_button.setObjectName("sectionToggle")
         self.toggle_button.setCheckable(True)
         self.toggle_button.setChecked(False)
         self.toggle_button.clicked.connect(self.toggle_section)
@@ -113,17 +78,7 @@ class CollapsibleSection(QWidget):
         self.add_button_layout.addStretch()
         self.add_row_button = QPushButton("+")
         self.add_row_button.setFixedSize(24, 24)
-        self.add_row_button.setStyleSheet("""
-            QPushButton {
-                border-radius: 12px;
-                background-color: #2a2a2a;
-                color: white;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #3a3a3a;
-            }
-        """)
+        self.add_row_button.setObjectName("sectionAddButton")
         self.add_button_layout.addWidget(self.add_row_button)
         self.add_button_layout.addStretch()
         
@@ -158,17 +113,6 @@ class LogoutIndicator(QFrame):
         
         self.setFixedHeight(36)
         
-        self.setStyleSheet("""
-            #logoutIndicator {
-                background-color: transparent;
-                border-radius: 4px;
-                padding: 0px;
-            }
-            QLabel {
-                color: white;
-            }
-        """)
-        
         self.layout = QHBoxLayout(self)
         self.layout.setContentsMargins(8, 0, 8, 0)
         self.layout.setSpacing(5)
@@ -178,11 +122,7 @@ class LogoutIndicator(QFrame):
         left_layout.setContentsMargins(0, 0, 0, 0)
         
         self.logout_text = QLabel("LOGOUT:")
-        self.logout_text.setStyleSheet("""
-            font-weight: bold; 
-            font-size: 16px;
-            color: #b08d57;
-        """)
+        self.logout_text.setObjectName("logoutText")
         
         shadow_effect = QGraphicsDropShadowEffect()
         shadow_effect.setOffset(1, 1)
@@ -192,15 +132,6 @@ class LogoutIndicator(QFrame):
         
         self.key_box = QFrame()
         self.key_box.setObjectName("keyBox")
-        self.key_box.setStyleSheet("""
-            #keyBox {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #e74c3c, stop:1 #c0392b);
-                border-radius: 3px;
-                border: 1px solid #a52a2a;
-                border-bottom: 2px solid #8b0000;
-            }
-        """)
         self.key_box.setFixedWidth(120)
         
         key_layout = QHBoxLayout(self.key_box)
@@ -208,11 +139,7 @@ class LogoutIndicator(QFrame):
         key_layout.setSpacing(0)
         
         self.key_label = QLabel(self.hotkey.upper())
-        self.key_label.setStyleSheet("""
-            font-weight: bold; 
-            font-size: 16px;
-            color: white;
-        """)
+        self.key_label.setObjectName("keyLabel")
         
         key_shadow_effect = QGraphicsDropShadowEffect()
         key_shadow_effect.setOffset(1, 1)
@@ -226,4 +153,58 @@ class LogoutIndicator(QFrame):
         left_layout.addWidget(self.key_box)
         left_layout.addStretch(1)
         
-        self.layout.addLayout(left_layout, 3) 
\ No newline at end of file
+        self.layout.addLayout(left_layout, 3)         
+        right_layout = QHBoxLayout()
+        right_layout.setSpacing(6)
+        right_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.connection_image = QLabel("●")
+        self.connection_image.setToolTip("Not connected to a game server")
+        self.connection_image.setObjectName("connectionDot")
+        
+        self.ping_label = QLabel("Ping: -- ms")
+        self.ping_label.setObjectName("pingLabel")
+        
+        right_layout.addStretch(1)
+        right_layout.addWidget(self.connection_image)
+        right_layout.addWidget(self.ping_label)
+        
+        self.layout.addLayout(right_layout, 2)
+    
+    def set_connected(self, connected, description=""):
+        set_style_state(self.connection_image, "connected", bool(connected))
+        if connected:
+            self.connection_image.setToolTip(description or "Connected")
+        else:
+            self.connection_image.setToolTip("Not connected to a game server")
+            self.ping_label.setText("Ping: -- ms")
+            set_style_state(self.ping_label, "quality", "none")
+    
+    def set_hotkey(self, hotkey):
+        self.hotkey = hotkey
+        self.key_label.setText(hotkey.upper())
+    
+    def set_armed(self, armed):
+        set_style_state(self.logout_text, "armed", bool(armed))
+        if armed:
+            self.key_box.setToolTip("Logout hotkey is armed")
+        else:
+            self.key_box.setToolTip("Logout hotkey is not armed")
+    
+    def set_latency(self, stats):
+        """Show an RttProber summary (ms values, None when there are no samples)"""
+        if not stats or stats.get('last') is None:
+            self.ping_label.setText("Ping: -- ms")
+            set_style_state(self.ping_label, "quality", "bad")
+            return
+        ping = stats['last']
+        self.ping_label.setText(f"Ping: {ping:.0f} ms")
+        self.ping_label.setToolTip(
+            f"min {stats['min']:.0f} / avg {stats['avg']:.0f} / p95 {stats['p95']:.0f} ms\n"
+            f"jitter {stats['jitter']:.1f} ms, loss {stats['loss'] * 100:.0f}%")
+        if ping < 100:
+            set_style_state(self.ping_label, "quality", "good")
+        elif ping < 200:
+            set_style_state(self.ping_label, "quality", "fair")
+        else:
+            set_style_state(self.ping_label, "quality", "bad")
@@ -3,6 +3,7 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushBut
 from PyQt5.QtCore import Qt
 from ui.command_row import CommandRowCreator
 from ui.custom_components import LogoutIndicator
+from ui.command_model import CommandListModel
 
 def create_safe_discard_callback(original_callback):
     """Create a wrapper around discard callback that handles potential UI issues safely"""
@@ -21,9 +22,57 @@ def create_safe_discard_callback(original_callback):
                 raise
     return safe_discard_wrapper
 
+class CommandListView:
+    """Keeps one row widget per model entry in list_layout, in model order"""
+    
+    def __init__(self, model, list_layout, row_factory, clear_callback, components, name_prefix):
+        self.model = model
+        self.list_layout = list_layout
+        self.row_factory = row_factory
+        self.clear_callback = clear_callback
+        self.components = components
+        self.name_prefix = name_prefix
+        for row, cmd_id in enumerate(model.ids):
+            self.insert_row(row, cmd_id, model.entries[cmd_id])
+        model.row_inserted.connect(self.insert_row)
+        model.row_removed.connect(self.remove_row)
+        model.row_changed.connect(self.update_row)
+    
+    def insert_row(self, row, cmd_id, data):
+        row_layout, components = self.row_factory(cmd_id, data, self.clear_callback)
+        
+        row_container = QWidget()
+        row_container.setObjectName(f"{self.name_prefix}_container_{cmd_id}")
+        row_container.setProperty("commandRow", True)
+        container_layout = QVBoxLayout(row_container)
+        container_layout.setContentsMargins(5, 5, 5, 5)
+        container_layout.addLayout(row_layout)
+        
+        self.list_layout.insertWidget(row, row_container)
+        components['container'] = row_container
+        self.components[cmd_id] = components
+    
+    def remove_row(self, row, cmd_id):
+        components = self.components.pop(cmd_id, None)
+        if components and 'container' in components:
+            container = components['container']
+            self.list_layout.removeWidget(container)
+            container.hide()
+            container.deleteLater()
+    
+    def update_row(self, row, cmd_id, data):
+        components = self.components.get(cmd_id)
+        if components:
+            components['text'].setText(data.get('text', ''))
+            components['hotkey'].set_hotkey(data.get('hotkey', ''))
+
 class TabLayout:
     def __init__(self):
         self.name = "tab_layout"
+        self.logout_indicator = None
+        self.command_model = None
+        self.whisper_model = None
+        self.views = []
         self.description = "Tab-based Layout with Game Commands and Whisper Tabs"
         
     def build_ui(self, parent, settings, whisper_settings, callbacks):
@@ -45,13 +94,6 @@ class TabLayout:
         
         main_widget = QWidget()
         main_widget.setObjectName("mainWidget")
-        main_widget.setStyleSheet("""
-            #mainWidget {
-                background-color: #1c1c1c;
-                border-radius: 5px;
-                border: 1px solid #3a3a3a;
-            }
-        """)
         
         widget_layout = QVBoxLayout(main_widget)
         widget_layout.setContentsMargins(10, 10, 10, 10)
@@ -64,44 +106,10 @@ class TabLayout:
             'is_editable': True
         })
         logout_indicator = LogoutIndicator(logout_settings)
+        self.logout_indicator = logout_indicator
         
         tab_widget = QTabWidget()
         tab_widget.setObjectName("mainTabs")
-        tab_widget.setStyleSheet("""
-            QTabWidget::pane {
-                border: 1px solid #3a3a3a;
-                background-color: #2c2c2c;
-                border-radius: 3px;
-            }
-            
-            QTabBar::tab {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                            stop:0 #333333, stop:1 #222222);
-                border: 1px solid #444444;
-                border-bottom: none;
-                border-top-left-radius: 4px;
-                border-top-right-radius: 4px;
-                min-width: 150px;
-                padding: 10px 15px;
-                margin-right: 2px;
-                font-weight: bold;
-                font-size: 12px;
-                color: #a0a0a0;
-            }
-            
-            QTabBar::tab:selected {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                            stop:0 #444444, stop:1 #333333);
-                border-bottom: 3px solid #907347;
-                color: #e0e0e0;
-            }
-            
-            QTabBar::tab:hover:!selected {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                            stop:0 #3a3a3a, stop:1 #2a2a2a);
-                color: #c0c0c0;
-            }
-        """)
         
         game_content = QWidget()
         game_layout = QVBoxLayout(game_content)
@@ -113,25 +121,6 @@ class TabLayout:
         game_scroll.setFrameShape(QFrame.NoFrame)
         game_scroll.setWidget(game_content)
         game_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        game_scroll.setStyleSheet("""
-            QScrollArea {
-                background-color: transparent;
-                border: none;
-            }
-            QScrollBar:vertical {
-                background: #2a2a2a;
-                width: 12px;
-                margin: 0px;
-            }
-            QScrollBar::handle:vertical {
-                background: #555555;
-                min-height: 20px;
-                border-radius: 6px;
-            }
-            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-                height: 0px;
-            }
-        """)
         
         whisper_content = QWidget()
         whisper_layout = QVBoxLayout(whisper_content)
@@ -143,25 +132,6 @@ class TabLayout:
         whisper_scroll.setFrameShape(QFrame.NoFrame)
         whisper_scroll.setWidget(whisper_content)
         whisper_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        whisper_scroll.setStyleSheet("""
-            QScrollArea {
-                background-color: transparent;
-                border: none;
-            }
-            QScrollBar:vertical {
-                background: #2a2a2a;
-                width: 12px;
-                margin: 0px;
-            }
-            QScrollBar::handle:vertical {
-                background: #555555;
-                min-height: 20px;
-                border-radius: 6px;
-            }
-            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-                height: 0px;
-            }
-        """)
         
         tab_widget.addTab(game_scroll, "GAME COMMANDS")
         tab_widget.addTab(whisper_scroll, "WHISPER COMMANDS")
@@ -170,12 +140,6 @@ class TabLayout:
         footer.setObjectName("footer")
         footer.setFixedHeight(60)
         footer.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        footer.setStyleSheet("""
-            #footer {
-                background-color: #1c1c1c;
-                border-top: 1px solid #3a3a3a;
-            }
-        """)
         
         footer_layout = QHBoxLayout(footer)
         footer_layout.setContentsMargins(10, 5, 10, 5)
@@ -212,35 +176,15 @@ class TabLayout:
         ui_components = {}
         whisper_components = {}
         
-        def sort_command_keys(cmd_id):
-            if cmd_id == 'logout':
-                return -1
-            try:
-                if cmd_id.startswith('command'):
-                    return int(cmd_id.replace('command', ''))
-                elif cmd_id.startswith('whisper'):
-                    return int(cmd_id.replace('whisper', ''))
-                return 0
-            except ValueError:
-                return 0
-        
-        for key in sorted([k for k in settings.keys() if k != 'logout'], key=sort_command_keys):
-            command = settings[key]
-            row_layout, components = CommandRowCreator.create_command_row(
-                key,
-                command,
-                callbacks.get("clear_callback", lambda x: None)
-            )
-            
-            row_container = QWidget()
-            row_container.setObjectName(f"command_container_{key}")
-            row_container.setStyleSheet("background-color: #3d3d3d; border-radius: 4px;")
-            container_layout = QVBoxLayout(row_container)
-            container_layout.setContentsMargins(5, 5, 5, 5)
-            container_layout.addLayout(row_layout)
-            
-            game_layout.addWidget(row_container)
-            ui_components[key] = components
+        self.command_model = CommandListModel(settings, exclude=('logout',))
+        self.views.append(CommandListView(
+            self.command_model,
+            game_layout,
+            CommandRowCreator.create_command_row,
+            callbacks.get("clear_callback", lambda x: None),
+            ui_components,
+            "command"
+        ))
         
         if 'logout' in settings:
             row_layout, components = CommandRowCreator.create_command_row(
@@ -259,62 +203,12 @@ class TabLayout:
         add_command_button.setObjectName("addButton")
         add_command_button.setToolTip("Add new command")
         add_command_button.setFixedSize(40, 40)
-        add_command_button.setStyleSheet("""
-            QPushButton#addButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #454545, stop:1 #353535);
-                color: #CCCCCC; 
-                font-weight: bold;
-                font-size: 18pt;
-                border: 1px solid #555555;
-                border-bottom: 3px solid #444444;
-                border-radius: 4px;
-            }
-            QPushButton#addButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #505050, stop:1 #404040);
-                color: #FFFFFF;
-                border-color: #666666;
-            }
-            QPushButton#addButton:pressed {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #353535, stop:1 #454545);
-                padding-top: 2px;
-                color: #FFFFFF;
-                border-bottom: 1px solid #444444;
-            }
-        """)
         add_command_button.clicked.connect(callbacks.get("add_command_callback", lambda: None))
         
         remove_command_button = QPushButton("-")
         remove_command_button.setObjectName("deleteButton")
         remove_command_button.setToolTip("Remove last command")
         remove_command_button.setFixedSize(40, 40)
-        remove_command_button.setStyleSheet("""
-            QPushButton#deleteButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #454545, stop:1 #353535);
-                color: #CCCCCC;
-                font-weight: bold;
-                font-size: 18pt;
-                border: 1px solid #555555;
-                border-bottom: 3px solid #444444;
-                border-radius: 4px;
-            }
-            QPushButton#deleteButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #505050, stop:1 #404040);
-                color: #FFFFFF;
-                border-color: #666666;
-            }
-            QPushButton#deleteButton:pressed {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #353535, stop:1 #454545);
-                padding-top: 2px;
-                color: #FFFFFF;
-                border-bottom: 1px solid #444444;
-            }
-        """)
         remove_command_button.clicked.connect(callbacks.get("delete_command_callback", lambda: None))
         
         game_add_layout.addWidget(add_command_button)
@@ -325,23 +219,15 @@ class TabLayout:
         game_layout.addWidget(game_add_container)
         game_layout.addStretch()
         
-        for key in sorted(whisper_settings.keys(), key=sort_command_keys):
-            whisper = whisper_settings[key]
-            row_layout, components = CommandRowCreator.create_whisper_row(
-                key, 
-                whisper, 
-                callbacks.get("clear_whisper_callback", lambda x: None)
-            )
-            
-            row_container = QWidget()
-            row_container.setObjectName(f"whisper_container_{key}")
-            row_container.setStyleSheet("background-color: #3d3d3d; border-radius: 4px;")
-            container_layout = QVBoxLayout(row_container)
-            container_layout.setContentsMargins(5, 5, 5, 5)
-            container_layout.addLayout(row_layout)
-            
-            whisper_layout.addWidget(row_container)
-            whisper_components[key] = components
+        self.whisper_model = CommandListModel(whisper_settings)
+        self.views.append(CommandListView(
+            self.whisper_model,
+            whisper_layout,
+            CommandRowCreator.create_whisper_row,
+            callbacks.get("clear_whisper_callback", lambda x: None),
+            whisper_components,
+            "whisper"
+        ))
             
         whisper_add_container = QWidget()
         whisper_add_layout = QHBoxLayout(whisper_add_container)
@@ -352,62 +238,12 @@ class TabLayout:
         add_whisper_button.setObjectName("addButton")
         add_whisper_button.setToolTip("Add new whisper")
         add_whisper_button.setFixedSize(40, 40)
-        add_whisper_button.setStyleSheet("""
-            QPushButton#addButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #454545, stop:1 #353535);
-                color: #CCCCCC; 
-                font-weight: bold;
-                font-size: 18pt;
-                border: 1px solid #555555;
-                border-bottom: 3px solid #444444;
-                border-radius: 4px;
-            }
-            QPushButton#addButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #505050, stop:1 #404040);
-                color: #FFFFFF;
-                border-color: #666666;
-            }
-            QPushButton#addButton:pressed {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #353535, stop:1 #454545);
-                padding-top: 2px;
-                color: #FFFFFF;
-                border-bottom: 1px solid #444444;
-            }
-        """)
         add_whisper_button.clicked.connect(callbacks.get("add_whisper_callback", lambda: None))
         
         remove_whisper_button = QPushButton("-")
         remove_whisper_button.setObjectName("deleteButton")
         remove_whisper_button.setToolTip("Remove last whisper")
         remove_whisper_button.setFixedSize(40, 40)
-        remove_whisper_button.setStyleSheet("""
-            QPushButton#deleteButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #454545, stop:1 #353535);
-                color: #CCCCCC;
-                font-weight: bold;
-                font-size: 18pt;
-                border: 1px solid #555555;
-                border-bottom: 3px solid #444444;
-                border-radius: 4px;
-            }
-            QPushButton#deleteButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #505050, stop:1 #404040);
-                color: #FFFFFF;
-                border-color: #666666;
-            }
-            QPushButton#deleteButton:pressed {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #353535, stop:1 #454545);
-                padding-top: 2px;
-                color: #FFFFFF;
-                border-bottom: 1px solid #444444;
-            }
-        """)
         remove_whisper_button.clicked.connect(callbacks.get("delete_whisper_callback", lambda: None))
         
         whisper_add_layout.addWidget(add_whisper_button)
@@ -421,7 +257,6 @@ class TabLayout:
         status_bar = QStatusBar()
         status_bar.setSizeGripEnabled(False)
         status_bar.setFixedHeight(30)
-        status_bar.setStyleSheet("color: white; background: #2c2c2c; border-top: 1px solid #3a3a3a;")
         
         parent.setMinimumSize(650, 530)
         
@@ -0,0 +1,26 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+class GuiInvoker(QObject):
+    """Runs callables posted from worker threads on the thread that owns this object"""
+    invoked = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.invoked.connect(self._run)
+
+    def post(self, fn):
+        self.invoked.emit(fn)
+
+    def _run(self, fn):
+        try:
+            fn()
+        except Exception as e:
+            print(f"Error in GUI callback: {e}")
+
+class EngineSignals(QObject):
+    """Qt signals for updates produced by the logout engine's worker threads"""
+    latency_updated = pyqtSignal(object)
+    stall_detected = pyqtSignal(object)
+    connection_added = pyqtSignal(object)
+    connection_removed = pyqtSignal(object)
+    armed = pyqtSignal(bool)
@@ -1,17 +1,27 @@
+from PyQt5.QtWidgets import QApplication
+
 class DarkMinimalTheme:
     def __init__(self):
         self.name = "dark_minimal"
         self.description = "Dark Minimalist with Subtle Accents"
-        
+
     def get_stylesheet(self):
         return """
             QWidget {
                 background-color: transparent;
                 color: #E0E0E0;
+            }
+            
+            #commandContent, #commandContent QWidget {
                 font-family: 'Helvetica', sans-serif;
                 font-size: 10pt;
             }
             
+            QMessageBox, QDialog, QMenu, QToolTip {
+                background-color: #1c1c1c;
+                color: #E0E0E0;
+            }
+            
             QLabel {
                 color: #E0E0E0;
                 background-color: transparent;
@@ -59,6 +69,10 @@ class DarkMinimalTheme:
                 color: #E0E0E0;
             }
             
+            QLineEdit {
+                font-weight: bold;
+            }
+            
             QLineEdit:focus, QComboBox:focus {
                 border: 1px solid #b08d57;
                 background-color: #252525;
@@ -87,89 +101,65 @@ class DarkMinimalTheme:
             }
             
             QPushButton#clearButton {
-                background-color: transparent;
-                color: #B0B0B0;
+                background-color: #303030;
+                color: #E07777;
                 font-weight: bold;
+                font-size: 14px;
                 min-width: 20px;
                 max-width: 20px;
-                border: 1px solid #444444;
-                border-radius: 10px;
+                border: 1px solid #555555;
+                border-radius: 11px;
                 padding: 0px;
             }
             
             QPushButton#clearButton:hover {
-                background-color: #252525;
-                color: #FF4444;
-                border-color: #FF4444;
+                background-color: #404040;
+                color: #FF5555;
+                border-color: #AA4444;
             }
             
             QPushButton#clearButton:pressed {
-                background-color: #333333;
-                color: #FF0000;
+                background-color: #252525;
+                color: #FF3333;
             }
             
-            QPushButton#deleteButton {
+            QPushButton#addButton, QPushButton#deleteButton {
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                           stop:0 #3a3a3a, stop:1 #2a2a2a);
-                color: #E07777;
+                                           stop:0 #454545, stop:1 #353535);
+                color: #CCCCCC;
                 font-weight: bold;
-                font-size: 24pt;
+                font-size: 18pt;
                 min-width: 40px;
                 max-width: 40px;
                 min-height: 40px;
                 max-height: 40px;
-                border: 1px solid #AA4444;
-                border-bottom: 3px solid #883333;
-                border-radius: 20px;
+                border: 1px solid #555555;
+                border-bottom: 3px solid #444444;
+                border-radius: 4px;
                 padding: 0px;
             }
             
-            QPushButton#deleteButton:hover {
+            QPushButton#addButton:hover, QPushButton#deleteButton:hover {
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                           stop:0 #4a3a3a, stop:1 #3a2a2a);
+                                           stop:0 #505050, stop:1 #404040);
                 color: #FFFFFF;
-                border-color: #CC4444;
-                border-bottom: 3px solid #AA4444;
-            }
-            
-            QPushButton#deleteButton:pressed {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                           stop:0 #2a2a2a, stop:1 #3a3a3a);
-                padding-top: 3px;
-                padding-bottom: -3px;
-                border-bottom: 1px solid #AA4444;
-            }
-            
-            QPushButton#addButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                           stop:0 #3a3a3a, stop:1 #2a2a2a);
-                color: #77B877;
-                font-weight: bold;
-                font-size: 24pt;
-                min-width: 40px;
-                max-width: 40px;
-                min-height: 40px;
-                max-height: 40px;
-                border: 1px solid #44AA44;
-                border-bottom: 3px solid #338833;
-                border-radius: 20px;
-                padding: 0px;
+                border-color: #666666;
             }
             
-            QPushButton#addButton:hover {
+            QPushButton#addButton:pressed, QPushButton#deleteButton:pressed {
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                           stop:0 #3a4a3a, stop:1 #2a3a2a);
+                                           stop:0 #353535, stop:1 #454545);
                 color: #FFFFFF;
-                border-color: #66CC66;
-                border-bottom: 3px solid #44AA44;
+                padding-top: 2px;
+                border-bottom: 1px solid #444444;
             }
             
             QPushButton#addButton:pressed {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                           stop:0 #2a2a2a, stop:1 #3a3a3a);
-                padding-top: 2px;
                 padding-bottom: -2px;
-                border-bottom: 1px solid #44AA44;
+            }
+            
+            QPushButton#deleteButton:pressed {
+                padding-bottom: -3px;
             }
             
             QPushButton#applyButton {
@@ -230,12 +220,41 @@ class DarkMinimalTheme:
                 border-bottom: 1px solid #AA4444;
             }
             
+            QPushButton#sectionToggle {
+                text-align: left;
+                padding: 8px;
+                border: none;
+                background: #121212;
+                color: white;
+                font-weight: bold;
+            }
+            
+            QPushButton#sectionToggle:hover {
+                background: #1a1a1a;
+            }
+            
+            QPushButton#sectionAddButton {
+                border-radius: 12px;
+                background: #2a2a2a;
+                color: white;
+                font-weight: bold;
+            }
+            
+            QPushButton#sectionAddButton:hover {
+                background: #3a3a3a;
+            }
+            
             QLabel#logoutLabel {
                 color: #b08d57;
                 font-weight: bold;
                 font-size: 16pt;
             }
             
+            QLabel#logoutRowLabel {
+                color: #FF3030;
+                font-weight: bold;
+            }
+            
             KeyCaptureWidget {
                 background-color: #1c1c1c;
                 color: #E0E0E0;
@@ -249,6 +268,23 @@ class DarkMinimalTheme:
                 background-color: #252525;
             }
             
+            QLineEdit#commandText, KeyCaptureWidget#hotkeyCapture {
+                border: 1px solid #555555;
+                background-color: #202020;
+                border-radius: 3px;
+                padding: 3px 5px;
+            }
+            
+            QLineEdit#commandText:focus, KeyCaptureWidget#hotkeyCapture:focus {
+                border: 1px solid #b08d57;
+                background-color: #252525;
+            }
+            
+            QWidget[commandRow="true"] {
+                background-color: #3d3d3d;
+                border-radius: 4px;
+            }
+            
             QFrame#separator {
                 background-color: #3a3a3a;
                 min-height: 1px;
@@ -260,77 +296,196 @@ class DarkMinimalTheme:
                 background-color: transparent;
             }
             
+            QScrollArea QScrollBar:vertical {
+                background: #2a2a2a;
+                width: 12px;
+                margin: 0px;
+            }
+            
+            QScrollArea QScrollBar::handle:vertical {
+                background: #555555;
+                min-height: 20px;
+                border-radius: 6px;
+            }
+            
+            QScrollArea QScrollBar::add-line:vertical, QScrollArea QScrollBar::sub-line:vertical {
+                height: 0px;
+            }
+            
             QStatusBar {
-                background-color: #1c1c1c;
-                color: #E0E0E0;
+                background: #2c2c2c;
+                color: white;
                 border-top: 1px solid #3a3a3a;
             }
             
+            #mainContainer {
+                background-color: #1c1c1c;
+                border-radius: 10px;
+                border: 1px solid #333333;
+            }
+            
             #titleBar {
-                border-bottom: 1px solid #3a3a3a;
-                border-top-left-radius: 5px;
-                border-top-right-radius: 5px;
-                background-color: transparent;
+                background-color: #121212;
+                border-top-left-radius: 10px;
+                border-top-right-radius: 10px;
+                border-bottom: 1px solid #333333;
             }
             
             #titleLabel {
-                color: #b08d57;
                 font-weight: bold;
+                font-size: 14px;
                 background-color: transparent;
             }
             
-            #minimizeButton, #closeButton {
-                background-color: transparent;
-                color: #AAAAAA;
-                font-weight: bold;
+            QPushButton#closeButton {
+                background: transparent;
+                color: #E0E0E0;
+                font-size: 20px;
+                padding: 0px;
                 border: none;
             }
             
-            #minimizeButton:hover, #closeButton:hover {
-                background-color: #252525;
-                color: #FFFFFF;
+            QPushButton#closeButton:hover {
+                background: #E04040;
+                color: white;
+                border-radius: 12px;
             }
             
-            #closeButton:hover {
-                background-color: #FF3030;
-            }
-            
-            #mainContainer {
-                background-color: transparent;
-                border: 1px solid #3a3a3a;
+            #mainWidget {
+                background-color: #1c1c1c;
                 border-radius: 5px;
+                border: 1px solid #3a3a3a;
             }
             
-            #contentContainer {
-                background-color: transparent;
+            #footer {
+                background-color: #1c1c1c;
+                border-top: 1px solid #3a3a3a;
             }
             
-            #logoutContainer {
+            #logoutIndicator {
                 background-color: transparent;
-                border: 1px solid #3a3a3a;
-                border-radius: 5px;
-                padding: 10px;
-                margin-bottom: 10px;
+                border: none;
+                border-radius: 4px;
+                padding: 0px;
             }
             
-            #statusBarContainer {
-                background-color: transparent;
-                border-top: 1px solid #3a3a3a;
-                border-bottom-left-radius: 5px;
-                border-bottom-right-radius: 5px;
+            #logoutIndicator QLabel {
+                color: white;
             }
             
-            #mainTabs {
-                background-color: transparent;
+            QLabel#logoutText {
+                font-weight: bold;
+                font-size: 16px;
+                color: #b08d57;
             }
             
-            #logoutIndicator {
-                background-color: transparent;
-                border: none;
+            QLabel#logoutText[armed="false"] {
+                color: #666666;
             }
             
             #keyBox {
-                background-color: #c0392b;
-                border-radius: 4px;
+                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                                          stop:0 #e74c3c, stop:1 #c0392b);
+                border-radius: 3px;
+                border: 1px solid #a52a2a;
+                border-bottom: 2px solid #8b0000;
+            }
+            
+            QLabel#keyLabel {
+                font-weight: bold;
+                font-size: 16px;
+                color: white;
+            }
+            
+            QLabel#connectionDot {
+                color: #555555;
+                font-size: 14px;
+            }
+            
+            QLabel#connectionDot[connected="true"] {
+                color: #00CC00;
+            }
+            
+            QLabel#pingLabel {
+                color: #888888;
+            }
+            
+            QLabel#pingLabel[quality="good"] {
+                color: #00FF00;
+            }
+            
+            QLabel#pingLabel[quality="fair"] {
+                color: #FFFF00;
+            }
+            
+            QLabel#pingLabel[quality="bad"] {
+                color: #FF0000;
             }
-        """ 
\ No newline at end of file
+        """
+
+def apply_theme(app=None):
+    """Install the theme as the application stylesheet; widgets only set object names and properties"""
+    app = app or QApplication.instance()
+    if app is None:
+        return False
+    stylesheet = DarkMinimalTheme().get_stylesheet()
+    if app.styleSheet() != stylesheet:
+        app.setStyleSheet(stylesheet)
+    return True
+
+def set_style_state(widget, name, value):
+    """Set a dynamic property the stylesheet selects on and re-polish only this widget"""
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+
+def benchmark_build_and_show(count=15, repeats=30):
+    """Time building the settings content and showing it under the application stylesheet
+
+    Returns {'build_ms': ..., 'show_ms': ...} averaged per CommandUI.build_ui.
+    """
+    import time
+    from PyQt5.QtCore import QEvent
+    from PyQt5.QtWidgets import QWidget
+    from ui.command_ui import CommandUI
+    app = QApplication.instance() or QApplication([])
+    apply_theme(app)
+
+    def make_entries(prefix):
+        return {f'{prefix}{i}': {'label': '', 'text': f'{prefix} text {i}', 'hotkey': f'f{i % 12 + 1}',
+                                 'is_editable': True} for i in range(1, count + 1)}
+
+    settings = make_entries('command')
+    settings['logout'] = {'label': 'Logout:', 'text': 'logout', 'hotkey': 'f9', 'is_editable': True}
+    whispers = make_entries('whisper')
+    noop = lambda *args: None
+
+    def settle():
+        app.processEvents()
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    host = QWidget()
+    host.show()
+    settle()
+    build = show = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        container = CommandUI(host).build_ui(settings, whispers, noop, noop, noop, noop, noop, noop, noop, noop, noop)
+        built = time.perf_counter()
+        container.show()
+        settle()
+        build += built - start
+        show += time.perf_counter() - built
+        container.deleteLater()
+        settle()
+    return {'build_ms': build * 1000 / repeats, 'show_ms': show * 1000 / repeats}
+
+if __name__ == "__main__":
+    import os
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    result = benchmark_build_and_show()
+    print(f"settings UI with 15 commands and 15 whispers: "
+          f"build {result['build_ms']:.1f} ms, show {result['show_ms']:.1f} ms")
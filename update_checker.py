@@ -1,4 +1,5 @@
 import os
+import hashlib
 import json
 import requests
 import re
@@ -18,78 +19,171 @@ REPO_NAME = "xddbot"
 APP_DATA_DIR = os.path.join(os.path.expanduser('~'), '.xddbot')
 VERSION_FILE = os.path.join(APP_DATA_DIR, "version.json")
 DEFAULT_VERSION = "0.0.0"
+LEGACY_UPDATE_VERSION = "999.999.999"
 SETTINGS_FILE = os.path.join(APP_DATA_DIR, "poe_settings.json")
+RELEASES_URL = os.environ.get(
+    "XDDBOT_RELEASES_URL", f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/releases/latest")
+MIN_RECHECK_INTERVAL = 6 * 3600
+REQUEST_TIMEOUT = 10
+DOWNLOAD_TIMEOUT = 60
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+PARALLEL_DOWNLOAD_THRESHOLD = 8 * 1024 * 1024
+DOWNLOAD_SEGMENTS = 4
+CHECKSUM_ASSET_NAMES = ("sha256sums", "sha256sums.txt", "checksums.txt")
+UPDATE_CONTENTS_MEMBER = "update_contents.json"
+UPDATE_SLOTS_DIR = "update_slots"
+MAX_TRIAL_LAUNCHES = 2
+RESTART_WAIT_FLAG = "--wait-for-pid"
+RESTART_WAIT_TIMEOUT = 15
+RELEASE_MANIFEST_NAME = "update_manifest.json"
+DELTA_FORMATS = ("bsdiff4", "zstd")
+DELTA_MAX_WINDOW_SIZE = 1 << 31
 
 def ensure_app_data_dir():
     if not os.path.exists(APP_DATA_DIR):
         os.makedirs(APP_DATA_DIR, exist_ok=True)
 
-def get_current_version():
-    if os.path.exists(VERSION_FILE):
-        try:
-            with open(VERSION_FILE, 'r') as f:
-                data = json.load(f)
-                return data.get("version", DEFAULT_VERSION)
-        except:
-            pass
-    return DEFAULT_VERSION
+class VersionState:
+    """version.json, read once and then served from memory
 
-def save_current_version(version_str):
-    ensure_app_data_dir()
-    data = {"version": version_str, "skipped_versions": []}
-    if os.path.exists(VERSION_FILE):
-        try:
-            with open(VERSION_FILE, 'r') as f:
-                existing_data = json.load(f)
-                if "skipped_versions" in existing_data:
-                    data["skipped_versions"] = existing_data["skipped_versions"]
-        except:
-            pass
-            
-    with open(VERSION_FILE, 'w') as f:
-        json.dump(data, f)
+    Holds the installed version, the versions the user chose to skip, the
+    latest release metadata with its ETag and the time of the last check, and
+    the staged/trial bookkeeping of an update in progress. Every change is
+    written back through a temporary file and a rename. The updater and the UI
+    share the module-level version_state.
+    """
 
-def add_skipped_version(version_str):
-    ensure_app_data_dir()
-    data = {"version": get_current_version(), "skipped_versions": [version_str]}
-    
-    if os.path.exists(VERSION_FILE):
-        try:
-            with open(VERSION_FILE, 'r') as f:
-                existing_data = json.load(f)
-                data["version"] = existing_data.get("version", DEFAULT_VERSION)
-                skipped = existing_data.get("skipped_versions", [])
-                if version_str not in skipped:
-                    skipped.append(version_str)
-                data["skipped_versions"] = skipped
-        except:
-            pass
-    
-    with open(VERSION_FILE, 'w') as f:
-        json.dump(data, f)
+    def __init__(self, path=VERSION_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._data = None
+
+    def _state(self):
+        with self._lock:
+            if self._data is None:
+                self._data = self._read()
+            return self._data
 
-def is_version_skipped(version_str):
-    if os.path.exists(VERSION_FILE):
+    def _read(self):
+        data = {}
         try:
-            with open(VERSION_FILE, 'r') as f:
-                data = json.load(f)
-                skipped_versions = data.get("skipped_versions", [])
-                return version_str in skipped_versions
+            with open(self.path, 'r') as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                data = loaded
         except:
             pass
-    return False
+        current = data.get('version') or DEFAULT_VERSION
+        if current == LEGACY_UPDATE_VERSION:
+            # Written by the old update.bat to stop update loops, not a real version
+            current = DEFAULT_VERSION
+        return {
+            'version': current,
+            'skipped_versions': set(data.get('skipped_versions') or []),
+            'last_check': data.get('last_check'),
+            'release': data.get('release') if isinstance(data.get('release'), dict) else None,
+            'release_etag': data.get('release_etag'),
+            'update': data.get('update') if isinstance(data.get('update'), dict) else {},
+        }
+
+    def save(self):
+        with self._lock:
+            data = dict(self._state())
+            data['skipped_versions'] = sorted(data['skipped_versions'])
+            ensure_app_data_dir()
+            temp_path = self.path + ".tmp"
+            try:
+                with open(temp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(temp_path, self.path)
+            except Exception as e:
+                print(f"Error saving version state: {e}")
+
+    @property
+    def current_version(self):
+        return self._state()['version']
+
+    def set_current_version(self, version_str):
+        with self._lock:
+            self._state()['version'] = version_str or DEFAULT_VERSION
+            self.save()
+
+    def is_skipped(self, version_str):
+        return version_str in self._state()['skipped_versions']
+
+    def skip(self, version_str):
+        with self._lock:
+            self._state()['skipped_versions'].add(version_str)
+            self.save()
+
+    def clear_skipped(self):
+        with self._lock:
+            self._state()['skipped_versions'].clear()
+            self.save()
+
+    @property
+    def release(self):
+        """Metadata of the latest release from the last successful check, or None"""
+        return self._state()['release']
 
-def get_latest_release():
+    @property
+    def release_etag(self):
+        return self._state()['release_etag']
+
+    @property
+    def last_check(self):
+        return self._state()['last_check']
+
+    def record_check(self, release=None, etag=None):
+        """Remember when the releases API was last asked, and its answer if it sent a new one"""
+        with self._lock:
+            state = self._state()
+            state['last_check'] = time.time()
+            if release is not None:
+                state['release'] = release
+                state['release_etag'] = etag
+            self.save()
+
+    def update_state(self):
+        """Copy of the staged/trial update bookkeeping"""
+        with self._lock:
+            return json.loads(json.dumps(self._state()['update']))
+
+    def set_update_state(self, update):
+        with self._lock:
+            self._state()['update'] = update
+            self.save()
+
+version_state = VersionState()
+
+def get_latest_release(force=False, url=None):
+    """Latest release metadata, served from the cache within MIN_RECHECK_INTERVAL
+
+    Otherwise the releases API is asked with If-None-Match, so an unchanged
+    release costs a 304 with no body. force skips the interval but still sends
+    the ETag.
+    """
+    url = url or RELEASES_URL
+    cached = version_state.release
+    if cached and not force and time.time() - (version_state.last_check or 0) < MIN_RECHECK_INTERVAL:
+        print("Using cached release information")
+        return cached
     try:
-        url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/releases/latest"
         print(f"Requesting releases from {url}")
         
         headers = {"Accept": "application/vnd.github.v3+json"}
-        response = requests.get(url, headers=headers, timeout=3)
+        if cached and version_state.release_etag:
+            headers["If-None-Match"] = version_state.release_etag
+        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
         print(f"Response status code: {response.status_code}")
         
+        if response.status_code == 304 and cached:
+            version_state.record_check()
+            return cached
+        
         response.raise_for_status()
         data = response.json()
+        version_state.record_check(data, response.headers.get('ETag'))
         return data
     except requests.exceptions.RequestException as e:
         print(f"Request failed or timed out: {e}")
@@ -108,9 +202,9 @@ def extract_version_from_tag(tag_name):
     
     return tag_name
 
-def check_for_updates():
+def check_for_updates(force=False):
     try:
-        latest_release = get_latest_release()
+        latest_release = get_latest_release(force=force)
         if not latest_release:
             print("No latest release found")
             return None, None
@@ -122,10 +216,10 @@ def check_for_updates():
             print(f"Could not extract version from tag: {latest_tag}")
             return None, None
         
-        current_version = get_current_version()
+        current_version = version_state.current_version
         print(f"Current version: {current_version}, Latest version: {latest_version}")
         
-        if is_version_skipped(latest_version):
+        if version_state.is_skipped(latest_version):
             print(f"Version {latest_version} has been skipped")
             return None, None
             
@@ -153,91 +247,605 @@ def check_for_updates():
         print(f"Error checking for updates: {e}")
         return None, None
 
-def download_file(url, dest_path, progress_callback=None):
+def find_published_sha256(download_url, release=None):
+    """SHA-256 hex digest the release publishes for the asset at download_url, or None
+
+    GitHub reports a 'digest' for every uploaded asset; releases can also ship a
+    '<asset>.sha256' file or a SHA256SUMS list next to the zip.
+    """
+    if release is None:
+        release = version_state.release or {}
+    assets = release.get('assets', [])
+    asset = next((a for a in assets if a.get('browser_download_url') == download_url), None)
+    if not asset:
+        return None
+    
+    digest = asset.get('digest') or ''
+    if digest.lower().startswith('sha256:'):
+        return digest[len('sha256:'):].lower()
+    
+    name = asset.get('name', '')
+    for candidate in assets:
+        candidate_name = candidate.get('name', '').lower()
+        if candidate_name != f"{name.lower()}.sha256" and candidate_name not in CHECKSUM_ASSET_NAMES:
+            continue
+        try:
+            response = requests.get(candidate.get('browser_download_url'), timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Could not fetch checksum file {candidate_name}: {e}")
+            continue
+        for line in response.text.splitlines():
+            parts = line.split()
+            if not parts or not re.fullmatch(r'[0-9a-fA-F]{64}', parts[0]):
+                continue
+            if len(parts) == 1 or parts[-1].lstrip('*') == name:
+                return parts[0].lower()
+    return None
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(DOWNLOAD_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _probe_download(url):
+    """(final url, size, validator, accepts ranges) from a HEAD request, following redirects"""
+    response = requests.head(url, allow_redirects=True, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    size = int(response.headers.get('Content-Length') or 0) or None
+    validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+    if validator and validator.startswith('W/'):
+        validator = None
+    accepts_ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+    return response.url, size, validator, accepts_ranges
+
+def _load_download_state(state_path):
     try:
-        response = requests.get(url, stream=True, timeout=60)
+        with open(state_path, 'r') as f:
+            return json.load(f)
+    except:
+        return None
+
+def _save_download_state(state_path, state):
+    temp_path = state_path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(temp_path, state_path)
+
+def _remove_files(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _download_stream(url, part_path, state, report):
+    """Single connection; appends to an existing .part with a Range request when possible"""
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    size = state['size']
+    if size and offset >= size:
+        return
+    headers = {}
+    if offset and state['validator']:
+        headers['Range'] = f"bytes={offset}-"
+        headers['If-Range'] = state['validator']
+    
+    with requests.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
         response.raise_for_status()
+        if response.status_code != 206:
+            offset = 0
+        with open(part_path, 'ab' if offset else 'wb', buffering=0) as f:
+            report(offset)
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_BUFFER_SIZE):
+                f.write(chunk)
+                offset += len(chunk)
+                report(offset)
+    if size and offset < size:
+        raise IOError(f"download ended early at {offset} of {size} bytes")
+
+def _download_segments(url, part_path, state, state_path, report):
+    """Fetch the remaining part of every segment concurrently into the preallocated .part
+
+    Workers only write file data; this thread persists the segment offsets and
+    reports progress, so progress_callback still runs on the caller's thread.
+    """
+    segments = state['segments']
+    lock = threading.Lock()
+    errors = []
+    
+    def fetch(segment):
+        start, end = segment[0], segment[1]
+        try:
+            headers = {'Range': f"bytes={start + segment[2]}-{end}", 'If-Range': state['validator']}
+            with requests.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise IOError(f"server did not honour the range request (status {response.status_code})")
+                with open(part_path, 'r+b', buffering=0) as f:
+                    f.seek(start + segment[2])
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_BUFFER_SIZE):
+                        chunk = chunk[:end + 1 - start - segment[2]]
+                        f.write(chunk)
+                        with lock:
+                            segment[2] += len(chunk)
+            if start + segment[2] <= end:
+                raise IOError(f"segment {start}-{end} ended early")
+        except Exception as e:
+            errors.append(e)
+    
+    threads = []
+    for segment in segments:
+        if segment[0] + segment[2] > segment[1]:
+            continue
+        thread = threading.Thread(target=fetch, args=(segment,), daemon=True, name=f"Download-{segment[0]}")
+        thread.start()
+        threads.append(thread)
+    
+    while threads:
+        threads[0].join(timeout=0.1)
+        threads = [thread for thread in threads if thread.is_alive()]
+        with lock:
+            snapshot = dict(state, segments=[list(segment) for segment in segments])
+        _save_download_state(state_path, snapshot)
+        report(sum(segment[2] for segment in snapshot['segments']))
+    
+    if errors:
+        raise errors[0]
+
+def download_file(url, dest_path, progress_callback=None, expected_sha256=None):
+    """Download url to dest_path through dest_path.part, resuming and verifying it
+
+    Assets of PARALLEL_DOWNLOAD_THRESHOLD bytes or more are fetched as
+    DOWNLOAD_SEGMENTS concurrent Range requests; smaller ones over a single
+    connection. The .part.json next to the partial file records how far each
+    segment got, so an interrupted download carries on from there as long as
+    the server still reports the same size and ETag. The finished file is hashed
+    against expected_sha256 before it replaces dest_path; a mismatch discards it.
+    Without a published expected_sha256 nothing is downloaded and False is returned.
+    """
+    if not expected_sha256:
+        print(f"No published checksum for {url}; refusing to download it")
+        return False
+    part_path = dest_path + ".part"
+    state_path = part_path + ".json"
+    size = None
+    
+    def report(done):
+        if progress_callback and size:
+            progress_callback(min(100, int(100 * done / size)))
+    
+    try:
+        final_url, size, validator, accepts_ranges = _probe_download(url)
+        resumable = bool(accepts_ranges and validator and size)
         
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
-        
-        with open(dest_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if progress_callback and total_size > 0:
-                        progress_callback(int(100 * downloaded / total_size))
+        state = _load_download_state(state_path)
+        if not (resumable and state and os.path.exists(part_path)
+                and (state.get('url'), state.get('size'), state.get('validator')) == (url, size, validator)):
+            if state or os.path.exists(part_path):
+                print("Discarding partial download")
+            _remove_files(part_path, state_path)
+            segments = None
+            if resumable and size >= PARALLEL_DOWNLOAD_THRESHOLD:
+                step = -(-size // DOWNLOAD_SEGMENTS)
+                segments = [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+                with open(part_path, 'wb') as f:
+                    f.truncate(size)
+            state = {'url': url, 'size': size, 'validator': validator, 'segments': segments}
+            if resumable:
+                _save_download_state(state_path, state)
+        else:
+            print(f"Resuming partial download of {url}")
         
-        return True
-    except:
+        if state['segments']:
+            _download_segments(final_url, part_path, state, state_path, report)
+        else:
+            _download_stream(final_url, part_path, state, report)
+    except Exception as e:
+        print(f"Download interrupted: {e}")
+        return False
+    
+    if size and os.path.getsize(part_path) != size:
+        print(f"Downloaded size {os.path.getsize(part_path)} does not match expected {size}")
+        _remove_files(part_path, state_path)
         return False
+    
+    actual = file_sha256(part_path)
+    if actual != expected_sha256.lower():
+        print(f"Checksum mismatch: expected {expected_sha256}, got {actual}")
+        _remove_files(part_path, state_path)
+        return False
+    
+    os.replace(part_path, dest_path)
+    _remove_files(state_path)
+    return True
+
+def _member_path(name):
+    """Relative path for a zip member name, or None if it would leave the staging dir"""
+    parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.')]
+    if not parts or '..' in parts or ':' in parts[0]:
+        return None
+    return os.path.join(*parts)
+
+def select_update_members(zip_ref):
+    """(executable member, [support members]) picked from the archive's central directory
+
+    An update_contents.json member, when present, names the executable and the
+    support files that ship with it: {"executable": "xddbot.exe", "files": [...]}.
+    Otherwise the first .exe member is used on its own.
+    """
+    members = {info.filename: info for info in zip_ref.infolist() if not info.is_dir()}
+    if UPDATE_CONTENTS_MEMBER in members:
+        contents = json.loads(zip_ref.read(UPDATE_CONTENTS_MEMBER))
+        exe_member = members.get(contents.get('executable'))
+        support_members = []
+        for name in contents.get('files', []):
+            if name not in members:
+                raise ValueError(f"{UPDATE_CONTENTS_MEMBER} lists {name}, which is not in the archive")
+            support_members.append(members[name])
+        return exe_member, support_members
+    
+    for name, info in members.items():
+        if name.lower().endswith('.exe'):
+            return info, []
+    return None, []
+
+def stage_update_from_zip(zip_path, staging_dir):
+    """Stream the executable (and declared support files) out of zip_path into staging_dir
 
-def extract_zip(zip_path, extract_dir):
+    Members are chosen from the central directory alone and each one is copied
+    straight to its final place through a temporary name, so nothing else in
+    the archive is written or rescanned. Support files keep their path relative
+    to the executable's folder. Returns the staged executable's path, or None.
+    """
     try:
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
-        return True
-    except:
-        return False
+            exe_member, support_members = select_update_members(zip_ref)
+            if exe_member is None:
+                print("No executable found in update archive")
+                return None
+            
+            prefix = exe_member.filename.rpartition('/')[0] + '/'
+            staged_exe = None
+            for info in [exe_member] + support_members:
+                name = info.filename
+                if prefix != '/' and name.startswith(prefix):
+                    name = name[len(prefix):]
+                relative = _member_path(name)
+                if relative is None:
+                    raise ValueError(f"Refusing to stage archive member {info.filename}")
+                target = os.path.join(staging_dir, relative)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                temp_path = target + ".tmp"
+                with zip_ref.open(info) as source, open(temp_path, 'wb') as dest:
+                    shutil.copyfileobj(source, dest, DOWNLOAD_BUFFER_SIZE)
+                os.replace(temp_path, target)
+                if info is exe_member:
+                    staged_exe = target
+            return staged_exe
+    except Exception as e:
+        print(f"Error staging update: {e}")
+        return None
 
-def find_exe_in_dir(directory):
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.lower().endswith('.exe'):
-                return os.path.join(root, file)
-    return None
+def _find_asset(release, name):
+    return next((asset for asset in release.get('assets', []) if asset.get('name') == name), None)
+
+def get_release_manifest(release=None):
+    """The release's update_manifest.json asset, parsed; None when it has none
+
+    {"version": "1.4.2", "sha256": <new exe>, "deltas": [{"from": "1.4.1",
+     "from_sha256": <old exe>, "format": "bsdiff4" | "zstd", "asset": <patch asset name>,
+     "sha256": <patch file>}]}
+    """
+    if release is None:
+        release = version_state.release or {}
+    asset = _find_asset(release, RELEASE_MANIFEST_NAME)
+    if not asset:
+        return None
+    try:
+        response = requests.get(asset.get('browser_download_url'), timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print(f"Could not fetch update manifest: {e}")
+        return None
+
+def apply_delta(old_data, patch_data, patch_format):
+    """New file contents from old_data and a bsdiff4 patch or a zstd --patch-from frame"""
+    if patch_format == 'bsdiff4':
+        import bsdiff4
+        return bsdiff4.patch(old_data, patch_data)
+    if patch_format == 'zstd':
+        import zstandard
+        dictionary = zstandard.ZstdCompressionDict(old_data, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+        decompressor = zstandard.ZstdDecompressor(dict_data=dictionary, max_window_size=DELTA_MAX_WINDOW_SIZE)
+        return decompressor.decompress(patch_data)
+    raise ValueError(f"Unsupported delta format {patch_format}")
+
+def stage_delta_update(latest_version, current_exe, staging_dir, progress_callback=None, release=None):
+    """Rebuild the new executable from current_exe and a published delta into staging_dir
 
-def create_update_script(current_exe, new_exe, extract_dir, zip_path):
-    ensure_app_data_dir()
-    batch_path = os.path.join(APP_DATA_DIR, "update.bat")
+    The delta is chosen by the SHA-256 of the running executable rather than the
+    recorded version, and the rebuilt file must match the manifest's hash before
+    it is staged. Returns the staged path, or None whenever there is no usable
+    delta or anything fails, so the caller can fall back to the full zip.
+    """
+    if release is None:
+        release = version_state.release or {}
+    manifest = get_release_manifest(release)
+    if not manifest or manifest.get('version') != latest_version or not manifest.get('sha256'):
+        return None
+    deltas = [delta for delta in manifest.get('deltas', [])
+              if delta.get('format') in DELTA_FORMATS and delta.get('sha256')]
+    if not deltas:
+        return None
     
-    with open(batch_path, 'w') as f:
-        f.write(f'''@echo off
-echo Updating xddbot...
-
-:: Kill all running instances
-echo Closing application...
-taskkill /F /IM xddbot.exe /T >nul 2>&1
-timeout /t 2 /nobreak >nul
-
-:: Update version file FIRST to prevent update loop
-echo Updating version information...
-echo {{{{"version": "999.999.999", "skipped_versions": []}}}} > "{VERSION_FILE}"
-
-:: Forcibly delete and replace EXE
-echo Replacing executable...
-del /F "{current_exe}" >nul 2>&1
-copy /Y "{new_exe}" "{current_exe}" >nul 2>&1
-
-:: Check if copy succeeded
-if exist "{current_exe}" (
-    echo Starting updated application...
-    start "" "{current_exe}"
-) else (
-    echo Copy failed! Starting from extract location instead...
-    start "" "{new_exe}"
-)
-
-:: Clean up files
-echo Cleaning up...
-timeout /t 2 /nobreak >nul
-if exist "{zip_path}" del /F "{zip_path}" >nul 2>&1
-
-:: Self-delete this batch file
-(goto) 2>nul & del "%~f0"
-''')
+    patch_path = None
+    try:
+        current_sha256 = file_sha256(current_exe)
+        delta = next((delta for delta in deltas if delta.get('from_sha256', '').lower() == current_sha256), None)
+        if not delta:
+            print("No delta published for the installed executable")
+            return None
+        asset = _find_asset(release, delta.get('asset'))
+        if not asset:
+            print(f"Delta asset {delta.get('asset')} is missing from the release")
+            return None
+        
+        print(f"Downloading {delta['format']} delta from {delta.get('from')} ({asset.get('size', 0)} bytes)")
+        patch_path = os.path.join(APP_DATA_DIR, os.path.basename(asset['name']))
+        if not download_file(asset.get('browser_download_url'), patch_path, progress_callback, delta.get('sha256')):
+            return None
+        
+        with open(current_exe, 'rb') as f:
+            old_data = f.read()
+        with open(patch_path, 'rb') as f:
+            new_data = apply_delta(old_data, f.read(), delta['format'])
+        if hashlib.sha256(new_data).hexdigest() != manifest['sha256'].lower():
+            print("Patched executable does not match the published checksum")
+            return None
+        
+        target = os.path.join(staging_dir, os.path.basename(current_exe))
+        temp_path = target + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(new_data)
+        os.replace(temp_path, target)
+        return target
+    except Exception as e:
+        print(f"Delta update failed: {e}")
+        return None
+    finally:
+        if patch_path:
+            _remove_files(patch_path)
+
+def is_frozen():
+    return getattr(sys, 'frozen', False)
+
+def update_slot_dir(name):
+    """update_slots/<name> next to the running executable, so swaps are same-volume renames"""
+    return os.path.join(os.path.dirname(os.path.abspath(sys.executable)), UPDATE_SLOTS_DIR, name)
+
+def _slot_files(slot_dir):
+    files = {}
+    for root, dirs, names in os.walk(slot_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            files[os.path.relpath(path, slot_dir)] = file_sha256(path)
+    return files
+
+def stage_update(latest_version, download_url, progress_callback=None):
+    """Download, verify and stage latest_version for the swap at the next launch
+
+    The executable is rebuilt from a delta when possible and otherwise streamed
+    out of the verified zip, straight into the staged slot; the slot's file
+    hashes are recorded so the launcher can check them again before swapping.
+    Returns the staged executable's path, or None.
+    """
+    if not is_frozen():
+        print("Running from source; not staging update")
+        return None
+    current_exe = os.path.abspath(sys.executable)
+    staged_dir = update_slot_dir("staged")
+    discard_staged_update()
+    try:
+        os.makedirs(staged_dir, exist_ok=True)
+        ensure_app_data_dir()
+        
+        new_exe = stage_delta_update(latest_version, current_exe, staged_dir, progress_callback)
+        if not new_exe:
+            zip_path = os.path.join(APP_DATA_DIR, "xddbot_update.zip")
+            expected_sha256 = find_published_sha256(download_url)
+            if not expected_sha256:
+                print("Release publishes no SHA-256 for the update zip; not staging it")
+                return None
+            if not download_file(download_url, zip_path, progress_callback, expected_sha256):
+                return None
+            new_exe = stage_update_from_zip(zip_path, staged_dir)
+            _remove_files(zip_path)
+            if not new_exe:
+                return None
+        
+        target = os.path.join(staged_dir, os.path.basename(current_exe))
+        if os.path.normcase(new_exe) != os.path.normcase(target):
+            os.replace(new_exe, target)
+        
+        state = version_state.update_state()
+        state['staged'] = {'version': latest_version, 'files': _slot_files(staged_dir)}
+        version_state.set_update_state(state)
+        print(f"Update {latest_version} staged in {staged_dir}")
+        return target
+    except Exception as e:
+        print(f"Error staging update: {e}")
+        return None
+
+def discard_staged_update():
+    shutil.rmtree(update_slot_dir("staged"), ignore_errors=True)
+    state = version_state.update_state()
+    if state.pop('staged', None) is not None:
+        version_state.set_update_state(state)
+
+def check_and_stage_update(force=False):
+    """Background update check: (latest_version, staged exe) once an update is staged, else (None, None)"""
+    latest_version, download_url = check_for_updates(force=force)
+    if not (latest_version and download_url):
+        return None, None
+    staged = version_state.update_state().get('staged')
+    if staged and staged.get('version') == latest_version and os.path.isdir(update_slot_dir("staged")):
+        return latest_version, os.path.join(update_slot_dir("staged"), os.path.basename(sys.executable))
+    staged_exe = stage_update(latest_version, download_url)
+    if not staged_exe:
+        return None, None
+    return latest_version, staged_exe
+
+def restart_application():
+    """Start the executable again; the new process swaps in any staged update
+
+    The child is told this process's PID and waits for it to exit first, so
+    it does not find the single-instance lock still held by this process.
+    """
+    subprocess.Popen([sys.executable, RESTART_WAIT_FLAG, str(os.getpid())] + sys.argv[1:])
+
+def wait_for_restarting_parent():
+    """When started by restart_application, drop its arguments and wait for the old process to exit"""
+    if RESTART_WAIT_FLAG not in sys.argv:
+        return
+    index = sys.argv.index(RESTART_WAIT_FLAG)
+    try:
+        pid = int(sys.argv[index + 1])
+        del sys.argv[index:index + 2]
+    except (IndexError, ValueError):
+        del sys.argv[index]
+        return
+    import psutil
+    try:
+        psutil.Process(pid).wait(RESTART_WAIT_TIMEOUT)
+    except psutil.NoSuchProcess:
+        pass
+    except psutil.TimeoutExpired:
+        print(f"Previous process {pid} still running after {RESTART_WAIT_TIMEOUT}s")
+
+def _restore_previous(files):
+    """Put the previous slot back over the files of a swapped-in update"""
+    exe_dir = os.path.dirname(os.path.abspath(sys.executable))
+    previous_dir = update_slot_dir("previous")
+    failed_dir = update_slot_dir("failed")
+    for relative in files:
+        target = os.path.join(exe_dir, relative)
+        previous = os.path.join(previous_dir, relative)
+        if os.path.exists(target):
+            # The running executable cannot be deleted on Windows, but it can be renamed
+            failed = os.path.join(failed_dir, relative)
+            os.makedirs(os.path.dirname(failed), exist_ok=True)
+            os.replace(target, failed)
+        if os.path.exists(previous):
+            os.replace(previous, target)
+
+def apply_staged_update():
+    """Swap a staged update into place at launch; True if the new version was started and the caller should exit
+
+    Each staged file is re-verified, then the current file is renamed into the
+    previous slot and the staged one renamed into its place. If a rename fails
+    part-way the files already moved are put back.
+    """
+    if not is_frozen():
+        return False
+    shutil.rmtree(update_slot_dir("failed"), ignore_errors=True)
+    state = version_state.update_state()
+    staged = state.get('staged')
+    if not staged:
+        return False
     
-    subprocess.Popen(
-        ["cmd.exe", "/c", batch_path],
-        shell=True,
-        creationflags=subprocess.CREATE_NO_WINDOW
-    )
+    staged_dir = update_slot_dir("staged")
+    files = staged.get('files', {})
+    for relative, sha256 in files.items():
+        path = os.path.join(staged_dir, relative)
+        if not os.path.isfile(path) or file_sha256(path) != sha256:
+            print(f"Staged update {staged.get('version')} is incomplete or modified; discarding it")
+            discard_staged_update()
+            return False
     
+    exe_dir = os.path.dirname(os.path.abspath(sys.executable))
+    previous_dir = update_slot_dir("previous")
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    swapped = []
+    try:
+        for relative in files:
+            target = os.path.join(exe_dir, relative)
+            if os.path.exists(target):
+                previous = os.path.join(previous_dir, relative)
+                os.makedirs(os.path.dirname(previous), exist_ok=True)
+                os.replace(target, previous)
+            swapped.append(relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(os.path.join(staged_dir, relative), target)
+    except OSError as e:
+        print(f"Could not swap in update {staged.get('version')}: {e}")
+        try:
+            _restore_previous(swapped)
+        except OSError as restore_error:
+            print(f"Could not restore previous files: {restore_error}")
+        discard_staged_update()
+        return False
+    
+    shutil.rmtree(staged_dir, ignore_errors=True)
+    state.pop('staged', None)
+    state['trial'] = {'version': staged.get('version'), 'previous_version': version_state.current_version,
+                      'files': list(files), 'launches': 0}
+    version_state.set_update_state(state)
+    version_state.set_current_version(staged.get('version'))
+    print(f"Swapped in update {staged.get('version')}, restarting")
+    restart_application()
+    return True
+
+def rollback_update(reason):
+    """Restore the previous slot after a swapped-in update failed; True if the previous version was started"""
+    state = version_state.update_state()
+    trial = state.get('trial')
+    if not trial or not is_frozen():
+        return False
+    print(f"Update {trial.get('version')} {reason}; rolling back to {trial.get('previous_version')}")
+    try:
+        _restore_previous(trial.get('files', []))
+    except OSError as e:
+        print(f"Rollback failed: {e}")
+        return False
+    state.pop('trial', None)
+    version_state.set_update_state(state)
+    version_state.set_current_version(trial.get('previous_version'))
+    version_state.skip(trial.get('version'))
+    restart_application()
     return True
 
+def check_update_health():
+    """Count a launch of a freshly swapped-in version; rolls back (returning True) once it has
+    failed to finish starting MAX_TRIAL_LAUNCHES times
+
+    Call only after taking the single-instance lock, so a second copy started
+    while the app is running is not counted as a failed launch.
+    """
+    state = version_state.update_state()
+    trial = state.get('trial')
+    if not trial or not is_frozen():
+        return False
+    trial['launches'] = trial.get('launches', 0) + 1
+    version_state.set_update_state(state)
+    if trial['launches'] > MAX_TRIAL_LAUNCHES:
+        return rollback_update(f"did not finish starting in {MAX_TRIAL_LAUNCHES} launches")
+    return False
+
+def confirm_update_health():
+    """Startup finished: keep the swapped-in version and drop the previous slot"""
+    state = version_state.update_state()
+    trial = state.pop('trial', None)
+    if not trial:
+        return
+    version_state.set_update_state(state)
+    shutil.rmtree(update_slot_dir("previous"), ignore_errors=True)
+    print(f"Update {trial.get('version')} started successfully")
+
 class UpdateDialog(QDialog):
-    def __init__(self, latest_version, download_url, parent=None):
+    def __init__(self, latest_version, download_url, parent=None, staged=False):
         super().__init__(parent)
         self.setWindowTitle("Update Available")
         self.setFixedWidth(400)
@@ -245,15 +853,20 @@ class UpdateDialog(QDialog):
         
         self.download_url = download_url
         self.latest_version = latest_version
+        self.staged = staged
         self.result_code = 0
         
         layout = QVBoxLayout(self)
         
+        if staged:
+            prompt = "<p>The update has been downloaded and will be installed the next time xddbot starts.</p>"
+        else:
+            prompt = "<p>Would you like to install the update?</p>"
         message = QLabel(
             f"<h3>A new version is available</h3>"
-            f"<p>Your version: {get_current_version()}</p>"
+            f"<p>Your version: {version_state.current_version}</p>"
             f"<p>Latest version: {latest_version}</p>"
-            f"<p>Would you like to install the update?</p>"
+            f"{prompt}"
         )
         message.setTextFormat(Qt.RichText)
         message.setWordWrap(True)
@@ -269,12 +882,12 @@ class UpdateDialog(QDialog):
         
         button_layout = QVBoxLayout()
         
-        self.install_btn = QPushButton("Install Update")
+        self.install_btn = QPushButton("Restart Now" if staged else "Install Update")
         self.install_btn.setMinimumHeight(40)
         self.install_btn.clicked.connect(self.download_update)
         button_layout.addWidget(self.install_btn)
         
-        self.skip_btn = QPushButton("Skip This Time")
+        self.skip_btn = QPushButton("Install on Next Launch" if staged else "Skip This Time")
         self.skip_btn.clicked.connect(self.skip_update)
         button_layout.addWidget(self.skip_btn)
         
@@ -301,47 +914,19 @@ class UpdateDialog(QDialog):
         self.progress_bar.setVisible(True)
         
         try:
-            self.set_status("Downloading update...")
-            
-            ensure_app_data_dir()
-            app_dir = APP_DATA_DIR
-            zip_path = os.path.join(app_dir, "xddbot_update.zip")
-            extract_dir = os.path.join(app_dir, "update_extract")
-            
-            if os.path.exists(extract_dir):
-                shutil.rmtree(extract_dir, ignore_errors=True)
-            os.makedirs(extract_dir, exist_ok=True)
-            
-            if not download_file(self.download_url, zip_path, self.update_progress):
-                self.set_status("Failed to download update")
-                self.restore_buttons()
-                return
-                
-            self.set_status("Extracting update...")
-            if not extract_zip(zip_path, extract_dir):
-                self.set_status("Failed to extract update")
-                self.restore_buttons()
-                return
-            
-            self.set_status("Locating new executable...")
-            new_exe = find_exe_in_dir(extract_dir)
-            if not new_exe:
-                self.set_status("No executable found in update package")
-                self.restore_buttons()
-                return
-            
-            self.set_status("Starting update...")
-            current_exe = sys.executable
-            update_script = create_update_script(current_exe, new_exe, extract_dir, zip_path)
+            if not self.staged:
+                self.set_status("Downloading update...")
+                if not stage_update(self.latest_version, self.download_url, self.update_progress):
+                    self.set_status("Failed to download update")
+                    self.restore_buttons()
+                    return
+                self.staged = True
             
-            subprocess.Popen(
-                [sys.executable, update_script],
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
+            self.set_status("Restarting...")
+            restart_application()
             
             self.result_code = 1
             self.accept()
-            sys.exit(0)
             
         except Exception as e:
             self.set_status(f"Error: {str(e)}")
@@ -357,72 +942,41 @@ class UpdateDialog(QDialog):
         self.reject()
     
     def skip_always(self):
-        add_skipped_version(self.latest_version)
+        version_state.skip(self.latest_version)
+        discard_staged_update()
         self.result_code = 2
         self.reject()
 
-def check_for_update_at_startup():
+def check_for_update_at_startup(force=False):
     """
     Checks for updates at application startup.
     Returns:
         0 if no update is available
-        1 if updated and should exit
+        1 if an update is being installed and the app should exit
         2 if update was skipped
     """
-    latest_version, download_url = check_for_updates()
+    latest_version, download_url = check_for_updates(force=force)
     
     if (latest_version and download_url):
         app = QApplication.instance()
         if not app:
             app = QApplication(sys.argv)
         
-        dialog = UpdateDialog(latest_version, download_url)
-        result = dialog.exec_()
-        
-        if result == QDialog.Accepted:
-            return 1
-        else:
-            return 2
+        return prompt_for_update(latest_version, download_url)
     
     return 0
 
-def reset_version_info():
-    ensure_app_data_dir()
-    if os.path.exists(VERSION_FILE):
-        os.remove(VERSION_FILE)
-    save_current_version("0.0.0")
-    return True
+def prompt_for_update(latest_version, download_url, staged=False):
+    """Show the UpdateDialog on the GUI thread; returns 1 if the app should exit to install, 2 if skipped"""
+    dialog = UpdateDialog(latest_version, download_url, staged=staged)
+    result = dialog.exec_()
+    
+    if result == QDialog.Accepted:
+        return 1
+    return 2
 
 def force_update_check():
-    """Force check for updates by resetting version info first"""
+    """Check now, ignoring the recheck interval and any skipped versions"""
     print("Forcing update check...")
-    reset_version_info()
-    return check_for_update_at_startup()
-
-def check_for_update_background():
-    """Run update check in a background thread that won't block startup"""
-    def run_check():
-        try:
-            latest_version, download_url = check_for_updates()
-            if (latest_version and download_url):
-                app = QApplication.instance()
-                if not app:
-                    return
-                
-                def show_dialog():
-                    dialog = UpdateDialog(latest_version, download_url)
-                    result = dialog.exec_()
-                
-                from PyQt5.QtCore import QTimer
-                QTimer.singleShot(100, show_dialog)
-        except Exception as e:
-            print(f"Background update check failed: {e}")
-    
-    update_thread = threading.Thread(target=run_check)
-    update_thread.daemon = True
-    update_thread.start()
-    return 0
-
-ensure_app_data_dir()
-if not os.path.exists(VERSION_FILE):
-    save_current_version(DEFAULT_VERSION)
\ No newline at end of file
+    version_state.clear_skipped()
+    return check_for_update_at_startup(force=True)
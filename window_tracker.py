@@ -0,0 +1,220 @@
+import ctypes
+import os
+import select
+import sys
+import threading
+from ctypes import wintypes
+
+GAME_PROCESS_MARKER = "pathofexile"
+GAME_WINDOW_TITLE = "Path of Exile"
+
+EVENT_SYSTEM_FOREGROUND = 0x0003
+WINEVENT_OUTOFCONTEXT = 0x0000
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+WM_QUIT = 0x0012
+
+class ForegroundWindowTracker:
+    """Keeps a cached "game is focused" flag that is updated on focus-change events
+
+    Windows uses SetWinEventHook(EVENT_SYSTEM_FOREGROUND); X11 watches
+    _NET_ACTIVE_WINDOW on the root window. Hotkey handlers only read
+    game_focused, they never query the window system themselves.
+    """
+
+    def __init__(self):
+        self.game_focused = False
+        self.game_window = None
+        self.game_pid = None
+        self.push_active = False
+        self.focus_changes = 0
+        self._listeners = []
+        self._thread = None
+        self._thread_id = None
+        self._stop_pipe = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def add_listener(self, callback):
+        """callback(focused) runs on the tracker thread whenever the flag flips"""
+        self._listeners.append(callback)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return self.push_active
+            if sys.platform == 'win32':
+                target = self._run_windows
+            elif os.environ.get('DISPLAY'):
+                target = self._run_x11
+            else:
+                return False
+            self._ready.clear()
+            self._thread = threading.Thread(target=target, daemon=True, name="ForegroundTracker")
+            self._thread.start()
+        self._ready.wait(2)
+        return self.push_active
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        if sys.platform == 'win32' and self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        elif self._stop_pipe:
+            os.write(self._stop_pipe[1], b'x')
+        thread.join(1)
+        self.push_active = False
+
+    def _set_foreground(self, window, pid, is_game):
+        changed = is_game != self.game_focused
+        if is_game:
+            self.game_window = window
+            self.game_pid = pid
+        self.game_focused = is_game
+        self.focus_changes += 1
+        if changed:
+            for callback in list(self._listeners):
+                try:
+                    callback(is_game)
+                except Exception as e:
+                    print(f"Error in focus listener: {e}")
+
+    def refresh(self):
+        """Query the current foreground window once (used when no event source is available)"""
+        try:
+            if sys.platform == 'win32':
+                hwnd = ctypes.windll.user32.GetForegroundWindow()
+                self._set_foreground(hwnd, *self._describe_windows(hwnd))
+        except Exception as e:
+            print(f"Error checking window: {e}")
+        return self.game_focused
+
+    def _describe_windows(self, hwnd):
+        user32 = ctypes.windll.user32
+        pid = wintypes.DWORD()
+        user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        pid = pid.value
+        if pid and pid == self.game_pid:
+            return pid, True
+        name = ""
+        handle = ctypes.windll.kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if handle:
+            try:
+                size = wintypes.DWORD(260)
+                buff = ctypes.create_unicode_buffer(size.value)
+                if ctypes.windll.kernel32.QueryFullProcessImageNameW(handle, 0, buff, ctypes.byref(size)):
+                    name = os.path.basename(buff.value)
+            finally:
+                ctypes.windll.kernel32.CloseHandle(handle)
+        if name:
+            return pid, GAME_PROCESS_MARKER in name.lower()
+        length = user32.GetWindowTextLengthW(hwnd)
+        buff = ctypes.create_unicode_buffer(length + 1)
+        user32.GetWindowTextW(hwnd, buff, length + 1)
+        return pid, GAME_WINDOW_TITLE in buff.value
+
+    def _run_windows(self):
+        user32 = ctypes.windll.user32
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+
+        def on_foreground(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+            try:
+                self._set_foreground(hwnd, *self._describe_windows(hwnd))
+            except Exception as e:
+                print(f"Error handling foreground change: {e}")
+
+        callback = WinEventProc(on_foreground)
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        hook = user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND,
+                                      0, callback, 0, 0, WINEVENT_OUTOFCONTEXT)
+        if not hook:
+            self._ready.set()
+            return
+        self.refresh()
+        self.push_active = True
+        self._ready.set()
+        try:
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            user32.UnhookWinEvent(hook)
+            self.push_active = False
+
+    def _run_x11(self):
+        try:
+            from Xlib import X, display
+            disp = display.Display()
+            root = disp.screen().root
+            active_atom = disp.intern_atom('_NET_ACTIVE_WINDOW')
+            pid_atom = disp.intern_atom('_NET_WM_PID')
+            name_atom = disp.intern_atom('_NET_WM_NAME')
+            root.change_attributes(event_mask=X.PropertyChangeMask)
+        except Exception as e:
+            print(f"X11 focus tracking unavailable: {e}")
+            self._ready.set()
+            return
+
+        def describe_active():
+            prop = root.get_full_property(active_atom, X.AnyPropertyType)
+            window_id = prop.value[0] if prop and len(prop.value) else 0
+            if not window_id:
+                return None, None, False
+            window = disp.create_resource_object('window', window_id)
+            pid_prop = window.get_full_property(pid_atom, X.AnyPropertyType)
+            pid = pid_prop.value[0] if pid_prop and len(pid_prop.value) else None
+            if pid and pid == self.game_pid:
+                return window_id, pid, True
+            if pid:
+                try:
+                    with open(f"/proc/{pid}/comm") as f:
+                        if GAME_PROCESS_MARKER in f.read().lower():
+                            return window_id, pid, True
+                except OSError:
+                    pass
+            name_prop = window.get_full_property(name_atom, X.AnyPropertyType)
+            title = name_prop.value if name_prop else b""
+            if isinstance(title, bytes):
+                title = title.decode("utf-8", "replace")
+            return window_id, pid, GAME_WINDOW_TITLE in title
+
+        self._stop_pipe = os.pipe()
+        try:
+            self._set_foreground(*describe_active())
+        except Exception:
+            pass
+        self.push_active = True
+        self._ready.set()
+        try:
+            while True:
+                while disp.pending_events():
+                    event = disp.next_event()
+                    if event.type == X.PropertyNotify and event.atom == active_atom:
+                        try:
+                            self._set_foreground(*describe_active())
+                        except Exception as e:
+                            print(f"Error handling foreground change: {e}")
+                readable, _, _ = select.select([disp.fileno(), self._stop_pipe[0]], [], [])
+                if self._stop_pipe[0] in readable:
+                    break
+        finally:
+            self.push_active = False
+            disp.close()
+            for fd in self._stop_pipe:
+                os.close(fd)
+            self._stop_pipe = None
+
+tracker = ForegroundWindowTracker()
+
+def start_tracking():
+    """Start the shared tracker (safe to call more than once)"""
+    return tracker.start()
+
+def is_game_focused():
+    """Cached flag while focus events are flowing, otherwise a one-off query"""
+    if tracker.push_active:
+        return tracker.game_focused
+    return tracker.refresh()